@@ -0,0 +1,115 @@
+"""
+Admission control for the Hello World service
+Bounds the number of requests in flight and the number waiting for a slot,
+fast-failing the rest with 503 + Retry-After instead of queueing them until
+clients time out
+"""
+
+import os
+import threading
+
+from flask import Response, g, request
+
+
+SHED_COUNTER = 'http_requests_shed_total'
+
+# 健康检查与监控端点永远不参与限流
+EXEMPT_PATHS = ('/health', '/metrics', '/livez', '/readyz')
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded wait queue"""
+
+    def __init__(self, max_concurrency, max_queue_depth=0, queue_timeout=1.0, retry_after=1):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    @property
+    def waiting(self):
+        return self._waiting
+
+    def try_acquire(self):
+        """Take a slot; returns None when admitted, otherwise the shed reason"""
+        if self._slots.acquire(blocking=False):
+            return None
+
+        with self._waiting_lock:
+            if self._waiting >= self.max_queue_depth:
+                return 'queue_full'
+            self._waiting += 1
+        try:
+            admitted = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+        return None if admitted else 'queue_timeout'
+
+    def release(self):
+        self._slots.release()
+
+
+def declare_metrics(metrics):
+    metrics.declare_counter(SHED_COUNTER, 'Requests rejected by admission control', ('reason',))
+
+
+def overloaded_body(reason):
+    """JSON body of a shed response"""
+    return '{"status":"overloaded","reason":"%s"}\n' % reason
+
+
+def init_app(app, controller=None, metrics=None, exempt_paths=EXEMPT_PATHS):
+    """Install admission control on a Flask app
+
+    Without an explicit controller, limits are read from the environment:
+    MAX_CONCURRENCY (0 disables admission control), MAX_QUEUE_DEPTH,
+    QUEUE_TIMEOUT (seconds) and RETRY_AFTER (seconds).
+    """
+    if controller is None:
+        max_concurrency = int(os.environ.get('MAX_CONCURRENCY', 0))
+        if max_concurrency <= 0:
+            return None
+        controller = AdmissionController(
+            max_concurrency,
+            max_queue_depth=int(os.environ.get('MAX_QUEUE_DEPTH', 0)),
+            queue_timeout=float(os.environ.get('QUEUE_TIMEOUT', 1.0)),
+            retry_after=int(os.environ.get('RETRY_AFTER', 1)),
+        )
+
+    if metrics is not None:
+        declare_metrics(metrics)
+
+    exempt = frozenset(exempt_paths)
+
+    @app.before_request
+    def admit_request():
+        if request.path in exempt:
+            return None
+        reason = controller.try_acquire()
+        if reason is None:
+            g.admission_slot = True
+            return None
+
+        if metrics is not None:
+            metrics.inc(SHED_COUNTER, (reason,))
+        response = Response(
+            overloaded_body(reason),
+            status=503,
+            mimetype='application/json',
+        )
+        response.headers['Retry-After'] = str(controller.retry_after)
+        return response
+
+    @app.teardown_request
+    def release_slot(exc=None):
+        if g.pop('admission_slot', False):
+            controller.release()
+
+    app.extensions['admission_controller'] = controller
+    return controller
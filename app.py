@@ -1,28 +1,68 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, request
+from werkzeug.http import generate_etag
+import json
 import os
 
+from admission import init_app as init_admission
+from metrics import init_app as init_metrics
+from readiness import init_app as init_readiness, serve
+from report_jobs import init_app as init_report_jobs
+
 app = Flask(__name__)
+request_metrics = init_metrics(app)
+admission_controller = init_admission(app, metrics=request_metrics)
+readiness = init_readiness(app, metrics=request_metrics)
+report_jobs = init_report_jobs(app, metrics=request_metrics)
+
+
+def prepare_static_json(payload):
+    """Serialize a constant payload once, returning (body, etag)"""
+    # 与 jsonify 在非调试模式下的输出保持一致
+    body = (json.dumps(payload, separators=(",", ":"), sort_keys=True) + "\n").encode("utf-8")
+    return body, generate_etag(body)
+
+
+def static_json_response(body, etag):
+    """Serve pre-serialized JSON bytes, answering 304 on a matching If-None-Match"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    return response
+
+
+HELLO_BODY, HELLO_ETAG = prepare_static_json({
+    "message": "Hello World",
+    "status": "success",
+    "version": "1.0.0"
+})
+
+HEALTH_BODY, HEALTH_ETAG = prepare_static_json({
+    "status": "healthy",
+    "service": "hello-world-service"
+})
+
 
 @app.route('/hello', methods=['GET'])
 def hello_world():
-    return jsonify({
-        "message": "Hello World",
-        "status": "success",
-        "version": "1.0.0"
-    })
+    return static_json_response(HELLO_BODY, HELLO_ETAG)
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({
-        "status": "healthy",
-        "service": "hello-world-service"
-    })
+    return static_json_response(HEALTH_BODY, HEALTH_ETAG)
+
+@readiness.warmup
+def warm_up_routing():
+    """Build the URL matcher before the first request instead of on it"""
+    adapter = app.url_map.bind('localhost')
+    for path in ('/hello', '/health'):
+        adapter.match(path)
 
-if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
-    
 # 添加此函数以便在测试中使用
 def run_app():
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
+    serve(app, '0.0.0.0', port, readiness)
+
+if __name__ == '__main__':
+    run_app()
@@ -0,0 +1,255 @@
+"""
+ASGI entry point for the Hello World service
+Serves the static endpoints directly on the event loop and bridges every
+other route to the Flask WSGI app through a bounded thread pool. The static
+fast path applies the same admission control, request metrics and
+first-request timing as the Flask request hooks.
+"""
+
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.http import parse_etags
+
+from admission import EXEMPT_PATHS, SHED_COUNTER, declare_metrics as declare_admission_metrics, overloaded_body
+from app import (app as flask_app, admission_controller, readiness as app_readiness, request_metrics,
+                 HELLO_BODY, HELLO_ETAG, HEALTH_BODY, HEALTH_ETAG)
+from asgi_server import serve
+from readiness import PROBE_PATHS
+
+
+# 由事件循环直接处理的静态路由，与 app.py 共享预序列化的响应体
+STATIC_ROUTES = {
+    '/hello': (HELLO_BODY, HELLO_ETAG),
+    '/health': (HEALTH_BODY, HEALTH_ETAG),
+}
+
+WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 8))
+
+
+class ASGIApplication:
+    """ASGI application wrapping the Flask service"""
+
+    def __init__(self, wsgi_app, static_routes=None, max_threads=WSGI_THREADS, metrics=None,
+                 admission=None, readiness=None, exempt_paths=EXEMPT_PATHS):
+        self.wsgi_app = wsgi_app
+        self.static_routes = static_routes or {}
+        self.metrics = metrics
+        self.admission = admission
+        self.readiness = readiness
+        self.exempt_paths = frozenset(exempt_paths)
+        if admission is not None and metrics is not None:
+            declare_admission_metrics(metrics)
+        self.max_threads = max_threads
+        self._executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.handle_lifespan(receive, send)
+        elif scope['type'] == 'http':
+            static = self.static_routes.get(scope['path'])
+            if static is not None and scope['method'] in ('GET', 'HEAD'):
+                await self.serve_static(scope, send, *static)
+            else:
+                await self.call_wsgi(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_threads,
+                                                thread_name_prefix='asgi-wsgi')
+        return self._executor
+
+    async def handle_lifespan(self, receive, send):
+        """Handle startup/shutdown events from the server"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.readiness is not None and not self.readiness.is_ready:
+                    # 与 WSGI 版本相同：预热在后台进行，期间 /readyz 返回 503
+                    threading.Thread(target=self.readiness.start, daemon=True, name='readiness-warmup').start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def serve_static(self, scope, send, body, etag):
+        """Answer a static route, applying the checks the Flask request hooks would"""
+        # 静态路由不经过 Flask 的 before/after_request 钩子，在这里依次补上
+        start = time.perf_counter()
+        guarded = self.admission is not None and scope['path'] not in self.exempt_paths
+        reason = await self.admit() if guarded else None
+        if reason is not None:
+            status = await self.send_overloaded(send, reason)
+        else:
+            try:
+                status = await self.send_static(scope, send, body, etag)
+            finally:
+                if guarded:
+                    self.admission.release()
+        if self.metrics is not None:
+            self.metrics.observe(scope['method'], scope['path'], status, time.perf_counter() - start)
+        if self.readiness is not None and self.readiness.first_request_seconds is None \
+                and scope['path'] not in PROBE_PATHS:
+            self.readiness.record_request()
+
+    async def admit(self):
+        """Take an admission slot; returns None when admitted, otherwise the shed reason"""
+        if not self.admission.max_queue_depth:
+            # 没有等待队列时 try_acquire 不会阻塞
+            return self.admission.try_acquire()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.admission.try_acquire)
+
+    async def send_overloaded(self, send, reason):
+        """Send the 503 shed response admission control gives on the Flask routes"""
+        if self.metrics is not None:
+            self.metrics.inc(SHED_COUNTER, (reason,))
+        body = overloaded_body(reason).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('latin-1')),
+                (b'retry-after', str(self.admission.retry_after).encode('latin-1')),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        return 503
+
+    async def send_static(self, scope, send, body, etag):
+        """Send a pre-serialized JSON body, answering 304 on a matching If-None-Match; returns the status"""
+        quoted_etag = f'"{etag}"'.encode('latin-1')
+        if_none_match = get_header(scope, b'if-none-match')
+        if if_none_match is not None and parse_etags(if_none_match.decode('latin-1')).contains(etag):
+            await send({'type': 'http.response.start', 'status': 304,
+                        'headers': [(b'etag', quoted_etag)]})
+            await send({'type': 'http.response.body', 'body': b''})
+            return 304
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('latin-1')),
+                (b'etag', quoted_etag),
+            ],
+        })
+        await send({'type': 'http.response.body',
+                    'body': b'' if scope['method'] == 'HEAD' else body})
+        return 200
+
+    async def call_wsgi(self, scope, receive, send):
+        """Run the request through the Flask app on a worker thread"""
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+
+        environ = build_environ(scope, b''.join(chunks))
+        loop = asyncio.get_running_loop()
+        status, headers, body = await loop.run_in_executor(self.executor, run_wsgi, self.wsgi_app, environ)
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def get_header(scope, name):
+    """Return the first value of a request header from an ASGI scope"""
+    for key, value in scope.get('headers', []):
+        if key.lower() == name:
+            return value
+    return None
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope into a WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            key = name
+        else:
+            key = f'HTTP_{name}'
+        if key in environ:
+            value = f'{environ[key]},{value}'
+        environ[key] = value
+    return environ
+
+
+def run_wsgi(wsgi_app, environ):
+    """Call a WSGI app and collect (status, headers, body)"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+        return lambda data: None
+
+    iterable = wsgi_app(environ, start_response)
+    try:
+        body = b''.join(iterable)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+    return response['status'], response['headers'], body
+
+
+application = ASGIApplication(flask_app, STATIC_ROUTES, metrics=request_metrics,
+                              admission=admission_controller, readiness=app_readiness)
+
+
+def run_app():
+    port = int(os.environ.get('PORT', 5000))
+    try:
+        import uvicorn
+    except ImportError:
+        uvicorn = None
+
+    if uvicorn is not None:
+        uvicorn.run(application, host='0.0.0.0', port=port, log_level='warning')
+    else:
+        try:
+            asyncio.run(serve(application, port=port))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    run_app()
@@ -0,0 +1,216 @@
+"""
+Minimal HTTP/1.1 server for ASGI applications
+Serves keep-alive connections on an asyncio event loop with Content-Length
+or chunked request bodies and chunked streaming responses. Kept free of
+application imports so the service (asgi_app.py) and the mock LLM server
+can both run on it without loading each other; deployments should prefer
+uvicorn, this server is the fallback when it is not installed.
+"""
+
+import asyncio
+import os
+import sys
+from http import HTTPStatus
+
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', 16 * 1024 * 1024))
+
+
+class BadRequest(Exception):
+    """Request framing the built-in server cannot accept; carries the status to answer with"""
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+async def read_chunked_body(reader):
+    """Read a ``Transfer-Encoding: chunked`` request body, discarding trailers"""
+    chunks = []
+    size = 0
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        try:
+            length = int(line.split(b';', 1)[0].strip(), 16)
+        except ValueError:
+            raise BadRequest(400)
+        if length == 0:
+            # 末尾的 trailer 头部以空行结束
+            while await reader.readuntil(b'\r\n') != b'\r\n':
+                pass
+            return b''.join(chunks)
+        size += length
+        if size > MAX_BODY_BYTES:
+            raise BadRequest(413)
+        chunks.append(await reader.readexactly(length))
+        if await reader.readexactly(2) != b'\r\n':
+            raise BadRequest(400)
+
+
+async def read_body(reader, header_map):
+    """Read the request body framed by Content-Length or chunked transfer coding"""
+    encoding = header_map.get(b'transfer-encoding')
+    if encoding is not None:
+        # 只支持 chunked；其他传输编码（gzip 等）无法解帧
+        if encoding.lower() != b'chunked':
+            raise BadRequest(501)
+        if b'content-length' in header_map:
+            raise BadRequest(400)
+        return await read_chunked_body(reader)
+    try:
+        length = int(header_map.get(b'content-length', b'0') or 0)
+    except ValueError:
+        raise BadRequest(400)
+    if length < 0:
+        raise BadRequest(400)
+    if length > MAX_BODY_BYTES:
+        raise BadRequest(413)
+    return await reader.readexactly(length) if length else b''
+
+
+def error_response(status):
+    """A bodiless response that closes the connection"""
+    return (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"content-length: 0\r\nconnection: close\r\n\r\n").encode('latin-1')
+
+
+async def handle_connection(app, reader, writer):
+    """Serve keep-alive HTTP/1.1 requests on one connection"""
+    peer = writer.get_extra_info('peername')
+    sock = writer.get_extra_info('sockname')
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            if len(head) > MAX_HEADER_BYTES:
+                return
+
+            lines = head[:-4].split(b'\r\n')
+            try:
+                method, target, version = lines[0].decode('latin-1').split(' ', 2)
+                if not version.startswith('HTTP/') or not version[5:]:
+                    raise ValueError(f"bad HTTP version {version!r}")
+            except ValueError:
+                writer.write(error_response(400))
+                await writer.drain()
+                return
+            headers = []
+            for line in lines[1:]:
+                name, _, value = line.partition(b':')
+                headers.append((name.strip().lower(), value.strip()))
+
+            header_map = dict(headers)
+            try:
+                body = await read_body(reader, header_map)
+            except BadRequest as e:
+                writer.write(error_response(e.status))
+                await writer.drain()
+                return
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            keep_alive = (version == 'HTTP/1.1' and header_map.get(b'connection', b'').lower() != b'close') \
+                or header_map.get(b'connection', b'').lower() == b'keep-alive'
+
+            path, _, query = target.partition('?')
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': version.split('/', 1)[1],
+                'method': method.upper(),
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode('latin-1'),
+                'query_string': query.encode('latin-1'),
+                'root_path': '',
+                'headers': headers,
+                'client': peer[:2] if peer else None,
+                'server': sock[:2] if sock else None,
+            }
+            keep_alive = await run_asgi_request(app, scope, body, writer, keep_alive)
+            if not keep_alive:
+                return
+    finally:
+        writer.close()
+
+
+async def run_asgi_request(app, scope, body, writer, keep_alive):
+    """Drive one ASGI request/response cycle over the connection; returns keep-alive"""
+    state = {'started': False, 'chunked': False, 'done': False}
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # 请求体已整体交付，之后的 receive 视为连接结束，不让应用永久挂起
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            headers = list(message.get('headers', []))
+            names = {name.lower() for name, _ in headers}
+            if b'content-length' not in names and message['status'] not in (204, 304) \
+                    and scope['method'] != 'HEAD':
+                headers.append((b'transfer-encoding', b'chunked'))
+                state['chunked'] = True
+            headers.append((b'connection', b'keep-alive' if keep_alive else b'close'))
+            try:
+                reason = HTTPStatus(message['status']).phrase
+            except ValueError:
+                reason = ''
+            lines = [f"HTTP/1.1 {message['status']} {reason}".encode('latin-1')]
+            lines.extend(name + b': ' + value for name, value in headers)
+            writer.write(b'\r\n'.join(lines) + b'\r\n\r\n')
+            state['started'] = True
+        elif message['type'] == 'http.response.body':
+            data = message.get('body', b'')
+            more = message.get('more_body', False)
+            if scope['method'] == 'HEAD':
+                pass
+            elif state['chunked']:
+                if data:
+                    writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+                if not more:
+                    writer.write(b'0\r\n\r\n')
+            elif data:
+                writer.write(data)
+            await writer.drain()
+            if not more:
+                state['done'] = True
+
+    try:
+        await app(scope, receive, send)
+    except Exception as e:
+        print(f"Error handling {scope['method']} {scope['path']}: {e}", file=sys.stderr)
+        if not state['started']:
+            writer.write(b'HTTP/1.1 500 Internal Server Error\r\ncontent-length: 0\r\nconnection: close\r\n\r\n')
+        return False
+    return keep_alive and state['done']
+
+
+async def start_server(app, host='0.0.0.0', port=5000, backlog=4096):
+    """Start listening with the built-in server; returns the asyncio server"""
+    return await asyncio.start_server(lambda r, w: handle_connection(app, r, w),
+                                      host, port, backlog=backlog, limit=MAX_HEADER_BYTES)
+
+
+async def serve(app, host='0.0.0.0', port=5000, backlog=4096):
+    """Run the built-in event-loop server until cancelled"""
+    startup = asyncio.Queue()
+    lifespan_queue = asyncio.Queue()
+    await lifespan_queue.put({'type': 'lifespan.startup'})
+    lifespan = asyncio.create_task(app({'type': 'lifespan'}, lifespan_queue.get, startup.put))
+    await startup.get()
+
+    server = await start_server(app, host, port, backlog)
+    print(f"ASGI server listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await lifespan_queue.put({'type': 'lifespan.shutdown'})
+        await lifespan
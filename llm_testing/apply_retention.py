@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+LLM测试数据保留策略
+将数据文件中过期的原始运行汇总为日/周汇总，控制历史数据规模
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir.parent))
+
+from llm_testing.framework.retention import RetentionPolicy, apply_to_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="将过期的运行汇总为日/周汇总")
+    parser.add_argument("data_dir", nargs="?", default=str(current_dir / "data"), help="数据目录")
+    parser.add_argument("--raw-days", type=int, help="保留原始运行的天数（默认取文件中的 retention 设置或 30）")
+    parser.add_argument("--daily-days", type=int, help="保留日汇总的天数（默认取文件中的 retention 设置或 180）")
+    args = parser.parse_args()
+
+    policy = None
+    if args.raw_days is not None or args.daily_days is not None:
+        default = RetentionPolicy()
+        policy = RetentionPolicy(args.raw_days if args.raw_days is not None else default.raw_days,
+                                 args.daily_days if args.daily_days is not None else default.daily_days)
+    for path in sorted(Path(args.data_dir).glob("*.json")):
+        runs, days = apply_to_file(path, policy)
+        print(f"{path.name}: 汇总 {runs} 次运行，{days} 个日汇总并入周汇总")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
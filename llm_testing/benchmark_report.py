@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+LLM报告生成链路的规模基准测试
+在不同数据规模下测量加载、表格渲染、图表渲染与完整报告生成的耗时和峰值内存，
+并与基线比较以发现性能回归
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+
+current_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(current_dir))
+sys.path.insert(0, str(current_dir.parent))
+
+from llm_testing.framework import LLMTestData, ChartRenderer
+from llm_testing.framework.generator_html import LLMReportGenerator
+from llm_testing.synthetic_data import generate_history
+
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+RESULTS_DIR = current_dir / "benchmarks"
+# 基线耗时低于此值的阶段不比较耗时，计时噪声会超过阈值
+MIN_COMPARED_SECONDS = 0.05
+
+
+def measure(func, with_memory=True):
+    """运行 func，返回 (结果, 耗时秒, 峰值内存字节)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+
+        peak = None
+        if with_memory:
+            # 单独再跑一遍测内存，避免 tracemalloc 的开销污染计时
+            result = None
+            tracemalloc.start()
+            try:
+                baseline = tracemalloc.get_traced_memory()[0]
+                result = func()
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+            finally:
+                tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark_size(total_runs, n_tools, n_metrics, with_memory, work_dir):
+    """Benchmark every pipeline phase at one data size"""
+    data_dir = Path(work_dir) / f"data_{total_runs}"
+    generate_history(data_dir, n_tools, n_metrics, total_runs)
+
+    phases = {}
+
+    def record(name, func):
+        result, elapsed, peak = measure(func, with_memory)
+        phases[name] = {"seconds": round(elapsed, 4), "peak_bytes": peak}
+        return result
+
+    generator = record("load_generator", lambda: LLMReportGenerator(str(data_dir)))
+    test_data = record("load_test_data", lambda: LLMTestData(str(data_dir)))
+    model = record("build_model", generator.build_model)
+
+    record("table_render", lambda: [generator.generate_metrics_table(tool) for tool in model.tools])
+    record("chart_render", lambda: [generator.generate_charts(tool) for tool in model.tools])
+    record("plugin_table_render", lambda: [
+        ChartRenderer.render_table(tool) for tool in test_data.model.tools
+    ])
+    record("full_report", lambda: generator.generate_html_report(str(Path(work_dir) / f"report_{total_runs}.html")))
+
+    return {
+        "runs": total_runs,
+        "tools": n_tools,
+        "metrics": n_metrics,
+        "phases": phases,
+    }
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """Return a list of regressions beyond ``threshold`` (ratio) against the baseline"""
+    regressions = []
+    baseline_by_size = {entry["runs"]: entry for entry in baseline.get("results", [])}
+    for entry in results:
+        base_entry = baseline_by_size.get(entry["runs"])
+        if not base_entry:
+            continue
+        for phase, values in entry["phases"].items():
+            base_values = base_entry["phases"].get(phase)
+            if not base_values:
+                continue
+            for key in ("seconds", "peak_bytes"):
+                current, previous = values.get(key), base_values.get(key)
+                if current is None or not previous:
+                    continue
+                if key == "seconds" and previous < MIN_COMPARED_SECONDS:
+                    continue
+                ratio = current / previous
+                if ratio > threshold:
+                    regressions.append(f"{entry['runs']} runs / {phase} / {key}: "
+                                       f"{previous} -> {current} ({ratio:.2f}x)")
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'runs':>9} {'phase':<20}{'seconds':>10}{'peak MB':>10}")
+    for entry in results:
+        for phase, values in entry["phases"].items():
+            peak = values["peak_bytes"]
+            peak_mb = f"{peak / 1024 / 1024:.1f}" if peak is not None else "-"
+            print(f"{entry['runs']:>9} {phase:<20}{values['seconds']:>10.3f}{peak_mb:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM报告生成链路规模基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='运行总数列表')
+    parser.add_argument('--tools', type=int, default=3, help='工具数量')
+    parser.add_argument('--metrics', type=int, default=5, help='每个工具的指标数量')
+    parser.add_argument('--no-memory', action='store_true', help='跳过 tracemalloc 内存测量')
+    parser.add_argument('--output', default=str(RESULTS_DIR / "latest.json"), help='结果输出文件')
+    parser.add_argument('--baseline', default=str(RESULTS_DIR / "baseline.json"), help='基线结果文件')
+    parser.add_argument('--threshold', type=float, default=1.5, help='判定为回归的倍数阈值')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为新的基线')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="llm_bench_") as work_dir:
+        for size in args.sizes:
+            print(f"正在测试 {size} 次运行的数据规模...")
+            results.append(benchmark_size(size, args.tools, args.metrics, not args.no_memory, work_dir))
+
+    print_results(results)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n结果已保存: {output_path}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"基线已更新: {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回归 (阈值 {args.threshold}x):")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n未发现性能回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+流式推理性能基准测试
+对 OpenAI 兼容的流式接口发起并发请求，逐 token 记录到达时间，
+计算 TTFT、TPOT、延迟分位数与吞吐量，并以标准数据格式写入 llm_testing/data
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+
+current_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(current_dir.parent))
+
+from llm_testing.framework.async_http import AsyncHTTPClient, HTTPError
+from llm_testing.framework.runs import append_run, build_run, default_build_id, percentile
+from llm_testing.framework.sketch import LatencySketch
+
+
+DEFAULT_OUTPUT = current_dir / "data" / "streaming_bench.json"
+
+TOOL_NAME = "StreamingBench"
+TOOL_DESCRIPTION = "Streaming inference benchmark against an OpenAI-compatible endpoint"
+
+METRICS_SCHEMA = [
+    {
+        "name": "TTFT",
+        "display_name": "TTFT",
+        "unit": "ms",
+        "description": "Mean time from request submission to the first streamed token",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": "line",
+        "sketch": "ttft",
+        "statistic": "mean"
+    },
+    {
+        "name": "ttft_p99",
+        "display_name": "TTFT P99",
+        "unit": "ms",
+        "description": "99% of requests receive their first token within this time",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": None,
+        "sketch": "ttft",
+        "statistic": "p99"
+    },
+    {
+        "name": "TPOT",
+        "display_name": "TPOT",
+        "unit": "ms",
+        "description": "Mean time per output token after the first",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": "bar"
+    },
+    {
+        "name": "itl_p99",
+        "display_name": "ITL P99",
+        "unit": "ms",
+        "description": "99th percentile inter-token latency",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": None,
+        "sketch": "itl",
+        "statistic": "p99"
+    },
+    {
+        "name": "latency_p50",
+        "display_name": "P50",
+        "unit": "s",
+        "description": "Median end-to-end request latency",
+        "lower_is_better": True,
+        "format": "{:.3f}",
+        "default_chart_type": None,
+        "sketch": "latency",
+        "statistic": "p50"
+    },
+    {
+        "name": "latency_p99",
+        "display_name": "P99",
+        "unit": "s",
+        "description": "99% of requests finish within this time",
+        "lower_is_better": True,
+        "format": "{:.3f}",
+        "default_chart_type": None,
+        "sketch": "latency",
+        "statistic": "p99"
+    },
+    {
+        "name": "Throughput",
+        "display_name": "Throughput",
+        "unit": "tokens/s",
+        "description": "Output tokens generated per second across all requests",
+        "lower_is_better": False,
+        "format": "{:.2f}",
+        "default_chart_type": "bar"
+    },
+    {
+        "name": "request_throughput",
+        "display_name": "Request Throughput",
+        "unit": "req/s",
+        "description": "Completed requests per second",
+        "lower_is_better": False,
+        "format": "{:.2f}",
+        "default_chart_type": None
+    },
+    {
+        "name": "error_rate",
+        "display_name": "Error Rate",
+        "unit": "%",
+        "description": "Share of requests that failed",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": None
+    }
+]
+
+
+class RequestResult:
+    """Timing of one streamed request"""
+
+    __slots__ = ("start", "token_times", "output_tokens", "end", "error")
+
+    def __init__(self, start):
+        self.start = start
+        self.token_times = []
+        self.output_tokens = 0
+        self.end = None
+        self.error = None
+
+    @property
+    def ttft(self):
+        return self.token_times[0] - self.start if self.token_times else None
+
+    @property
+    def latency(self):
+        return self.end - self.start if self.end is not None else None
+
+    @property
+    def tpot(self):
+        if self.output_tokens < 2 or not self.token_times:
+            return None
+        return (self.token_times[-1] - self.token_times[0]) / (self.output_tokens - 1)
+
+    def inter_token_latencies(self):
+        return [b - a for a, b in zip(self.token_times, self.token_times[1:])]
+
+
+def build_payload(endpoint, model, prompt, max_tokens, temperature):
+    if endpoint.endswith('/chat/completions'):
+        return {"model": model, "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens, "temperature": temperature, "stream": True}
+    return {"model": model, "prompt": prompt, "max_tokens": max_tokens,
+            "temperature": temperature, "stream": True}
+
+
+def extract_text(event):
+    """Text carried by one streamed completion/chat chunk"""
+    choices = event.get("choices") or []
+    if not choices:
+        return ""
+    choice = choices[0]
+    if "delta" in choice:
+        return choice["delta"].get("content") or ""
+    return choice.get("text") or ""
+
+
+async def send_streaming_request(client, endpoint, payload, timeout):
+    """Send one streaming request and record per-token arrival times"""
+    result = RequestResult(time.perf_counter())
+    usage_tokens = None
+    done_at = None
+
+    async def consume():
+        nonlocal usage_tokens, done_at
+        async with client.request('POST', endpoint, json_body=payload,
+                                  headers={'Accept': 'text/event-stream'}) as response:
+            if response.status != 200:
+                body = await response.read()
+                raise HTTPError(f"HTTP {response.status}: {body[:200]!r}")
+            async for line in response.iter_lines():
+                # [DONE] 之后继续读到分块结束标记，连接才能放回连接池复用
+                if done_at is not None or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    done_at = time.perf_counter()
+                    continue
+                event = json.loads(data)
+                if event.get("usage"):
+                    usage_tokens = event["usage"].get("completion_tokens")
+                if extract_text(event):
+                    result.token_times.append(time.perf_counter())
+
+    try:
+        await asyncio.wait_for(consume(), timeout)
+        result.end = done_at or time.perf_counter()
+        result.output_tokens = usage_tokens or len(result.token_times)
+        if not result.token_times:
+            result.error = "no tokens received"
+    except (HTTPError, asyncio.TimeoutError, ValueError) as e:
+        result.error = str(e) or type(e).__name__
+    return result
+
+
+def arrival_intervals(request_rate, count, distribution, rng):
+    """Delays between request submissions; 0 when the rate is unlimited"""
+    for _ in range(count):
+        if request_rate == float('inf'):
+            yield 0.0
+        elif distribution == 'poisson':
+            yield rng.expovariate(request_rate)
+        else:
+            yield 1.0 / request_rate
+
+
+async def run_benchmark(base_url, prompts, model, max_tokens=128, concurrency=8,
+                        request_rate=float('inf'), distribution='poisson',
+                        endpoint='/v1/completions', temperature=0.0, timeout=300.0, seed=0):
+    """Run every prompt once; returns (results, duration_seconds)"""
+    client = AsyncHTTPClient(base_url, limit=concurrency, timeout=timeout)
+    slots = asyncio.Semaphore(concurrency)
+    rng = random.Random(seed)
+
+    async def limited(prompt):
+        async with slots:
+            payload = build_payload(endpoint, model, prompt, max_tokens, temperature)
+            return await send_streaming_request(client, endpoint, payload, timeout)
+
+    started = time.perf_counter()
+    tasks = []
+    try:
+        for prompt, delay in zip(prompts, arrival_intervals(request_rate, len(prompts), distribution, rng)):
+            tasks.append(asyncio.create_task(limited(prompt)))
+            if delay:
+                await asyncio.sleep(delay)
+        results = await asyncio.gather(*tasks)
+    finally:
+        await client.close()
+    return results, time.perf_counter() - started
+
+
+def summarize(results, duration):
+    """Aggregate request results into run metrics"""
+    ok = [r for r in results if r.error is None]
+    ttfts = sorted(r.ttft * 1000 for r in ok)
+    tpots = [r.tpot * 1000 for r in ok if r.tpot is not None]
+    itls = sorted(itl * 1000 for r in ok for itl in r.inter_token_latencies())
+    latencies = sorted(r.latency for r in ok)
+    output_tokens = sum(r.output_tokens for r in ok)
+    return {
+        "TTFT": sum(ttfts) / len(ttfts) if ttfts else 0.0,
+        "ttft_p99": percentile(ttfts, 99),
+        "TPOT": sum(tpots) / len(tpots) if tpots else 0.0,
+        "itl_p99": percentile(itls, 99),
+        "latency_p50": percentile(latencies, 50),
+        "latency_p99": percentile(latencies, 99),
+        "Throughput": output_tokens / duration if duration > 0 else 0.0,
+        "request_throughput": len(ok) / duration if duration > 0 else 0.0,
+        "error_rate": 100.0 * (len(results) - len(ok)) / len(results) if results else 0.0,
+    }
+
+
+def build_sketches(results):
+    """Mergeable TTFT/ITL (ms) and latency (s) sketches of the successful requests"""
+    ok = [r for r in results if r.error is None]
+    return {
+        "ttft": LatencySketch().update(r.ttft * 1000 for r in ok).to_dict(),
+        "itl": LatencySketch().update(itl * 1000 for r in ok for itl in r.inter_token_latencies()).to_dict(),
+        "latency": LatencySketch().update(r.latency for r in ok).to_dict(),
+    }
+
+
+def load_prompts(prompt_file, num_prompts, prompt_words, seed):
+    """Prompts from a JSONL/text file, or synthetic prompts of ``prompt_words`` words"""
+    if prompt_file:
+        prompts = []
+        with open(prompt_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith('{'):
+                    line = json.loads(line).get('prompt', '')
+                prompts.append(line)
+        return (prompts * (num_prompts // max(len(prompts), 1) + 1))[:num_prompts]
+
+    rng = random.Random(seed)
+    vocabulary = ["model", "token", "latency", "batch", "cache", "kernel", "tensor", "prompt",
+                  "decode", "prefill", "memory", "attention", "throughput", "request", "stream"]
+    return [" ".join(rng.choice(vocabulary) for _ in range(prompt_words)) for _ in range(num_prompts)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式推理性能基准测试')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='OpenAI 兼容服务地址')
+    parser.add_argument('--endpoint', default='/v1/completions', help='/v1/completions 或 /v1/chat/completions')
+    parser.add_argument('--model', required=True, help='模型名称')
+    parser.add_argument('--backend', default='unknown', help='推理后端名称，写入 env')
+    parser.add_argument('--num-prompts', type=int, default=100)
+    parser.add_argument('--prompt-file', help='每行一个 prompt 的文本或 JSONL（prompt 字段）')
+    parser.add_argument('--prompt-words', type=int, default=64, help='合成 prompt 的词数')
+    parser.add_argument('--max-tokens', type=int, default=128)
+    parser.add_argument('--concurrency', type=int, default=8, help='最大并发请求数')
+    parser.add_argument('--request-rate', type=float, default=float('inf'), help='每秒请求数，默认不限速')
+    parser.add_argument('--distribution', choices=['poisson', 'constant'], default='poisson')
+    parser.add_argument('--timeout', type=float, default=300.0, help='单个请求超时（秒）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--build-id', default=default_build_id())
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='追加结果的数据文件')
+    parser.add_argument('--no-save', action='store_true', help='只打印结果')
+    args = parser.parse_args()
+
+    prompts = load_prompts(args.prompt_file, args.num_prompts, args.prompt_words, args.seed)
+    print(f"向 {args.base_url}{args.endpoint} 发送 {len(prompts)} 个请求 (并发 {args.concurrency}) ...")
+    results, duration = asyncio.run(run_benchmark(
+        args.base_url, prompts, args.model, args.max_tokens, args.concurrency,
+        args.request_rate, args.distribution, args.endpoint, timeout=args.timeout, seed=args.seed))
+
+    metrics = summarize(results, duration)
+    for metric in METRICS_SCHEMA:
+        print(f"  {metric['display_name']:<20} {metric['format'].format(metrics[metric['name']])} {metric['unit']}")
+
+    errors = [r.error for r in results if r.error]
+    if errors:
+        print(f"  失败请求 {len(errors)} 个，示例: {errors[0]}")
+
+    if not args.no_save:
+        env = {
+            "model": args.model,
+            "backend": args.backend,
+            "endpoint": args.base_url + args.endpoint,
+            "concurrency": args.concurrency,
+            "request_rate": "inf" if args.request_rate == float('inf') else args.request_rate,
+            "num_prompts": len(prompts),
+            "max_tokens": args.max_tokens,
+            "description": f"{args.backend} / {args.model} c={args.concurrency}",
+        }
+        output_path = append_run(args.output, build_run(args.build_id, metrics, env, sketches=build_sketches(results)),
+                                 TOOL_NAME, TOOL_DESCRIPTION, METRICS_SCHEMA)
+        print(f"结果已追加到 {output_path}")
+    return 0 if len(errors) < len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
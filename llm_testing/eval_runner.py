@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+MMLU 风格精度评测运行器
+分批并发调用模型接口并评分，结果以标准数据格式写入 llm_testing/data。
+按 (模型, prompt 哈希, 解码参数) 缓存模型回答，跨构建复用；
+每批完成后写检查点，中断后可从检查点继续
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+
+current_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(current_dir.parent))
+
+from llm_testing.framework.async_http import AsyncHTTPClient, HTTPError
+from llm_testing.framework.runs import append_run, build_run, default_build_id
+
+
+DEFAULT_OUTPUT = current_dir / "data" / "mmlu_eval.json"
+DEFAULT_CACHE_DIR = current_dir / ".cache"
+
+TOOL_NAME = "MMLUEval"
+TOOL_DESCRIPTION = "MMLU-style multiple choice evaluation run against a model endpoint"
+
+CHOICE_LETTERS = "ABCDEFGHIJ"
+
+CATEGORIES = ["stem", "humanities", "social_sciences", "other"]
+
+# MMLU 学科到大类的映射；数据集也可以直接提供 category 字段
+SUBJECT_CATEGORIES = {
+    "abstract_algebra": "stem", "anatomy": "stem", "astronomy": "stem", "college_biology": "stem",
+    "college_chemistry": "stem", "college_computer_science": "stem", "college_mathematics": "stem",
+    "college_physics": "stem", "computer_security": "stem", "conceptual_physics": "stem",
+    "electrical_engineering": "stem", "elementary_mathematics": "stem", "high_school_biology": "stem",
+    "high_school_chemistry": "stem", "high_school_computer_science": "stem",
+    "high_school_mathematics": "stem", "high_school_physics": "stem", "high_school_statistics": "stem",
+    "machine_learning": "stem",
+    "formal_logic": "humanities", "high_school_european_history": "humanities",
+    "high_school_us_history": "humanities", "high_school_world_history": "humanities",
+    "international_law": "humanities", "jurisprudence": "humanities", "logical_fallacies": "humanities",
+    "moral_disputes": "humanities", "moral_scenarios": "humanities", "philosophy": "humanities",
+    "prehistory": "humanities", "professional_law": "humanities", "world_religions": "humanities",
+    "econometrics": "social_sciences", "high_school_geography": "social_sciences",
+    "high_school_government_and_politics": "social_sciences", "high_school_macroeconomics": "social_sciences",
+    "high_school_microeconomics": "social_sciences", "high_school_psychology": "social_sciences",
+    "human_sexuality": "social_sciences", "professional_psychology": "social_sciences",
+    "public_relations": "social_sciences", "security_studies": "social_sciences",
+    "sociology": "social_sciences", "us_foreign_policy": "social_sciences",
+}
+
+METRICS_SCHEMA = [
+    {
+        "name": "accuracy",
+        "display_name": "Accuracy",
+        "unit": "%",
+        "description": "Overall accuracy across all subjects",
+        "lower_is_better": False,
+        "format": "{:.2f}",
+        "default_chart_type": "line"
+    },
+    {
+        "name": "f1_score",
+        "display_name": "F1 Score",
+        "unit": "",
+        "description": "Macro-averaged F1 score over answer choices",
+        "lower_is_better": False,
+        "format": "{:.3f}",
+        "default_chart_type": "line"
+    },
+    {
+        "name": "stem_accuracy",
+        "display_name": "STEM Accuracy",
+        "unit": "%",
+        "description": "Accuracy in STEM subjects",
+        "lower_is_better": False,
+        "format": "{:.2f}",
+        "default_chart_type": "bar"
+    },
+    {
+        "name": "humanities_accuracy",
+        "display_name": "Humanities Accuracy",
+        "unit": "%",
+        "description": "Accuracy in humanities subjects",
+        "lower_is_better": False,
+        "format": "{:.2f}",
+        "default_chart_type": "bar"
+    },
+    {
+        "name": "social_sciences_accuracy",
+        "display_name": "Social Sciences Accuracy",
+        "unit": "%",
+        "description": "Accuracy in social science subjects",
+        "lower_is_better": False,
+        "format": "{:.2f}",
+        "default_chart_type": None
+    },
+    {
+        "name": "other_accuracy",
+        "display_name": "Other Accuracy",
+        "unit": "%",
+        "description": "Accuracy in the remaining subjects",
+        "lower_is_better": False,
+        "format": "{:.2f}",
+        "default_chart_type": None
+    },
+    {
+        "name": "cache_hit_rate",
+        "display_name": "Cache Hit Rate",
+        "unit": "%",
+        "description": "Share of questions answered from the prompt cache",
+        "lower_is_better": False,
+        "format": "{:.1f}",
+        "default_chart_type": None
+    }
+]
+
+
+def stable_hash(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+
+def endpoint_url(base_url, endpoint):
+    """Full URL a request goes to; the same model name can be served by different deployments"""
+    return base_url.rstrip('/') + endpoint
+
+
+class ResponseCache:
+    """Persistent model-response cache keyed by (endpoint URL, model, prompt hash, decoding params)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(responses)")]
+        if columns and 'endpoint' not in columns:
+            # 旧缓存未记录服务地址，无法判断回答来自哪个部署，整体丢弃
+            print(f"Warning: discarding response cache {self.path} without endpoint keys")
+            self.conn.execute("DROP TABLE responses")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " endpoint TEXT NOT NULL, model TEXT NOT NULL, prompt_hash TEXT NOT NULL, params TEXT NOT NULL,"
+            " response TEXT NOT NULL, created REAL NOT NULL,"
+            " PRIMARY KEY (endpoint, model, prompt_hash, params))"
+        )
+        self.conn.commit()
+
+    def get_many(self, endpoint, model, prompt_hashes, params):
+        """Look up many prompts at once; returns {prompt_hash: response}"""
+        found = {}
+        hashes = list(prompt_hashes)
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT prompt_hash, response FROM responses WHERE endpoint = ? AND model = ? AND params = ?"
+                f" AND prompt_hash IN ({placeholders})",
+                [endpoint, model, params, *chunk],
+            )
+            found.update(rows)
+        return found
+
+    def put_many(self, endpoint, model, params, responses):
+        """Store {prompt_hash: response} in one transaction"""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            [(endpoint, model, h, params, text, now) for h, text in responses.items()],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class Checkpoint:
+    """Append-only JSONL of scored items for one evaluation configuration"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def load(self):
+        completed = {}
+        if not self.path.exists():
+            return completed
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 中断时可能留下半行，忽略即可
+                    continue
+                completed[record["id"]] = record
+        return completed
+
+    def append(self, records):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self):
+        if self.path.exists():
+            self.path.unlink()
+
+
+def load_dataset(path):
+    """Read MMLU-style items from JSONL (question, choices, answer, subject)"""
+    items = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for index, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            answer = item["answer"]
+            if isinstance(answer, int):
+                answer = CHOICE_LETTERS[answer]
+            subject = item.get("subject", "unknown")
+            items.append({
+                "id": str(item.get("id", index)),
+                "question": item["question"],
+                "choices": item["choices"],
+                "answer": answer.strip().upper(),
+                "subject": subject,
+                "category": item.get("category") or SUBJECT_CATEGORIES.get(subject, "other"),
+            })
+    return items
+
+
+def format_prompt(item):
+    lines = [item["question"]]
+    for letter, choice in zip(CHOICE_LETTERS, item["choices"]):
+        lines.append(f"{letter}. {choice}")
+    lines.append("Answer:")
+    return "\n".join(lines)
+
+
+def parse_answer(text, num_choices):
+    """First standalone choice letter in the model output"""
+    letters = CHOICE_LETTERS[:num_choices]
+    match = re.search(rf"\b([{letters}])\b", text or "")
+    return match.group(1) if match else None
+
+
+def macro_f1(records, letters):
+    scores = []
+    for letter in letters:
+        tp = sum(1 for r in records if r["predicted"] == letter and r["answer"] == letter)
+        fp = sum(1 for r in records if r["predicted"] == letter and r["answer"] != letter)
+        fn = sum(1 for r in records if r["predicted"] != letter and r["answer"] == letter)
+        if tp + fp + fn == 0:
+            continue
+        scores.append(2 * tp / (2 * tp + fp + fn))
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def score(records):
+    """Compute run metrics from scored items"""
+    def accuracy(subset):
+        return 100.0 * sum(1 for r in subset if r["correct"]) / len(subset) if subset else 0.0
+
+    letters = sorted({r["answer"] for r in records})
+    metrics = {
+        "accuracy": accuracy(records),
+        "f1_score": macro_f1(records, letters),
+    }
+    for category in CATEGORIES:
+        metrics[f"{category}_accuracy"] = accuracy([r for r in records if r["category"] == category])
+    return metrics
+
+
+async def ask_model(client, endpoint, model, prompt, params):
+    if endpoint.endswith('/chat/completions'):
+        payload = {"model": model, "messages": [{"role": "user", "content": prompt}], **params}
+    else:
+        payload = {"model": model, "prompt": prompt, **params}
+    async with client.request('POST', endpoint, json_body=payload) as response:
+        if response.status != 200:
+            raise HTTPError(f"HTTP {response.status}")
+        body = await response.json()
+    choice = body["choices"][0]
+    return choice["message"]["content"] if "message" in choice else choice.get("text", "")
+
+
+async def evaluate(items, base_url, model, params, cache, checkpoint, endpoint='/v1/completions',
+                   batch_size=64, concurrency=16, timeout=120.0, retries=2):
+    """Evaluate items batch by batch; returns (records, stats)"""
+    params_text = params_key(params)
+    url = endpoint_url(base_url, endpoint)
+    completed = checkpoint.load()
+    stats = {"resumed": len(completed), "cache_hits": 0, "requests": 0, "failed": 0}
+    pending = [item for item in items if item["id"] not in completed]
+
+    client = AsyncHTTPClient(base_url, limit=concurrency, timeout=timeout)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def answer(prompt):
+        async with slots:
+            for attempt in range(retries + 1):
+                try:
+                    stats["requests"] += 1
+                    return await ask_model(client, endpoint, model, prompt, params)
+                except (HTTPError, OSError, asyncio.TimeoutError, KeyError, IndexError, ValueError):
+                    if attempt == retries:
+                        return None
+                    await asyncio.sleep(0.5 * (attempt + 1))
+
+    try:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            prompts = {item["id"]: format_prompt(item) for item in batch}
+            hashes = {item_id: stable_hash(prompt) for item_id, prompt in prompts.items()}
+            cached = cache.get_many(url, model, set(hashes.values()), params_text)
+
+            to_ask = [item for item in batch if hashes[item["id"]] not in cached]
+            stats["cache_hits"] += len(batch) - len(to_ask)
+            answers = await asyncio.gather(*(answer(prompts[item["id"]]) for item in to_ask))
+
+            fresh = {hashes[item["id"]]: text for item, text in zip(to_ask, answers) if text is not None}
+            if fresh:
+                cache.put_many(url, model, params_text, fresh)
+            responses = {**cached, **fresh}
+
+            records = []
+            for item in batch:
+                text = responses.get(hashes[item["id"]])
+                if text is None:
+                    # 请求失败的题目不写入检查点，下次续跑时重试
+                    stats["failed"] += 1
+                    continue
+                predicted = parse_answer(text, len(item["choices"]))
+                records.append({
+                    "id": item["id"],
+                    "subject": item["subject"],
+                    "category": item["category"],
+                    "answer": item["answer"],
+                    "predicted": predicted,
+                    "correct": predicted == item["answer"],
+                })
+            checkpoint.append(records)
+            completed.update((r["id"], r) for r in records)
+            print(f"  已完成 {len(completed)}/{len(items)} 题")
+    finally:
+        await client.close()
+
+    return [completed[item["id"]] for item in items if item["id"] in completed], stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MMLU 风格精度评测运行器')
+    parser.add_argument('dataset', help='JSONL 数据集 (question, choices, answer, subject)')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--endpoint', default='/v1/completions')
+    parser.add_argument('--model', required=True)
+    parser.add_argument('--max-tokens', type=int, default=4)
+    parser.add_argument('--temperature', type=float, default=0.0)
+    parser.add_argument('--top-p', type=float, default=1.0)
+    parser.add_argument('--batch-size', type=int, default=64, help='每批题目数（每批写一次缓存与检查点）')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_DIR / "eval_cache.sqlite3"), help='回答缓存文件')
+    parser.add_argument('--checkpoint', help='检查点文件，默认按数据集/服务地址/模型/参数自动命名')
+    parser.add_argument('--build-id', default=default_build_id())
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT))
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    params = {"max_tokens": args.max_tokens, "temperature": args.temperature, "top_p": args.top_p}
+    items = load_dataset(args.dataset)
+    run_key = stable_hash(f"{Path(args.dataset).resolve()}|{endpoint_url(args.base_url, args.endpoint)}|"
+                          f"{args.model}|{params_key(params)}")[:16]
+    checkpoint = Checkpoint(args.checkpoint or DEFAULT_CACHE_DIR / f"eval_checkpoint_{run_key}.jsonl")
+    cache = ResponseCache(args.cache)
+
+    print(f"评测 {len(items)} 道题，模型 {args.model} ...")
+    started = time.perf_counter()
+    try:
+        records, stats = asyncio.run(evaluate(
+            items, args.base_url, args.model, params, cache, checkpoint, args.endpoint,
+            args.batch_size, args.concurrency, args.timeout))
+    finally:
+        cache.close()
+    elapsed = time.perf_counter() - started
+
+    print(f"续跑 {stats['resumed']} 题，缓存命中 {stats['cache_hits']} 题，"
+          f"请求 {stats['requests']} 次，失败 {stats['failed']} 题，耗时 {elapsed:.1f}s")
+    if len(records) < len(items):
+        print(f"仍有 {len(items) - len(records)} 题未完成，检查点已保留: {checkpoint.path}")
+        return 1
+
+    metrics = score(records)
+    answered_now = len(items) - stats["resumed"]
+    metrics["cache_hit_rate"] = 100.0 * stats["cache_hits"] / answered_now if answered_now else 100.0
+    for metric in METRICS_SCHEMA:
+        print(f"  {metric['display_name']:<26} {metric['format'].format(metrics[metric['name']])} {metric['unit']}")
+
+    if not args.no_save:
+        env = {
+            "model": args.model,
+            "dataset": Path(args.dataset).stem,
+            "questions": len(items),
+            "max_tokens": args.max_tokens,
+            "temperature": args.temperature,
+            "description": f"{Path(args.dataset).stem} / {args.model}",
+        }
+        output_path = append_run(args.output, build_run(args.build_id, metrics, env),
+                                 TOOL_NAME, TOOL_DESCRIPTION, METRICS_SCHEMA)
+        print(f"结果已追加到 {output_path}")
+    checkpoint.remove()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,35 +9,44 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 import pytest
 
+from .records import MetricSchema, Run, Tool, load_tools
+from .report_model import MODEL_ENV_VAR, ReportModel, ToolReport, Chart, Table, build_report_model
+
 
 class LLMTestData:
     """Manages LLM test data from JSON files"""
     
-    def __init__(self, data_dir: str = "../llm_testing/data"):
+    def __init__(self, data_dir: str = "../llm_testing/data", model_file: Optional[str] = None):
         self.data_dir = Path(data_dir)
-        self.test_data: Dict[str, Dict] = {}
-        self.load_all_data()
+        self.test_data: Dict[str, Tool] = {}
+        self._model: Optional[ReportModel] = None
+        # 报告生成步骤已保存模型时直接加载，不再重复读取和计算
+        model_file = model_file or os.environ.get(MODEL_ENV_VAR)
+        if model_file and Path(model_file).exists():
+            self._model = ReportModel.load(model_file)
+        else:
+            self.load_all_data()
     
     def load_all_data(self):
         """Load all JSON files from the data directory"""
         if not self.data_dir.exists():
             return
-        
-        for json_file in self.data_dir.glob("*.json"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    tool_name = data.get('tool', json_file.stem)
-                    self.test_data[tool_name] = data
-            except Exception as e:
-                print(f"Warning: Could not load {json_file}: {e}")
+        self.test_data = load_tools(self.data_dir)
+        self._model = None
+    
+    @property
+    def model(self) -> ReportModel:
+        """Report model shared with the standalone generator"""
+        if self._model is None:
+            self._model = build_report_model(self.test_data)
+        return self._model
     
     def get_tools(self) -> List[str]:
         """Get list of available tools"""
-        return list(self.test_data.keys())
+        return [tool.name for tool in self.model.tools]
     
-    def get_tool_data(self, tool_name: str) -> Optional[Dict]:
-        """Get data for a specific tool"""
+    def get_tool_data(self, tool_name: str) -> Optional[Tool]:
+        """Get the loaded records of a specific tool"""
         return self.test_data.get(tool_name)
 
 
@@ -45,15 +54,13 @@ class ChartRenderer:
     """Renders charts for LLM metrics"""
     
     @staticmethod
-    def render_table(metrics_data: List[Dict], metric_schema: List[Dict]) -> str:
+    def render_table(tool: ToolReport) -> str:
         """Render metrics as a table"""
-        if not metrics_data:
+        if not tool.rows:
             return '<div class="no-data">No data available</div>'
         
         # Create table header
-        headers = ['Build ID', 'Timestamp', 'Environment']
-        for metric in metric_schema:
-            headers.append(f"{metric['display_name']} ({metric['unit']})")
+        headers = ['Build ID', 'Timestamp', 'Environment'] + [column.header for column in tool.columns]
         
         # Create table HTML
         html_content = '<table class="llm-metrics-table">'
@@ -64,52 +71,54 @@ class ChartRenderer:
         
         # Create table rows
         html_content += '<tbody>'
-        for run in metrics_data:
+        for row in tool.rows:
             html_content += '<tr>'
-            html_content += f'<td>{run["build_id"]}</td>'
-            html_content += f'<td>{run["timestamp"][:10]}</td>'
-            html_content += f'<td>{run["env"].get("description", "N/A")}</td>'
+            html_content += f'<td>{row.build_id}</td>'
+            html_content += f'<td>{row.date}</td>'
+            html_content += f'<td>{row.environment}</td>'
             
-            for metric in metric_schema:
-                metric_name = metric['name']
-                value = run['metrics'].get(metric_name, 'N/A')
-                if value != 'N/A':
-                    formatted_value = metric['format'].format(value)
-                    html_content += f'<td>{formatted_value}</td>'
-                else:
-                    html_content += '<td>N/A</td>'
+            for cell in row.cells:
+                html_content += f'<td>{cell if cell is not None else "N/A"}</td>'
             
             html_content += '</tr>'
         
+        # Merged row: true percentiles across all runs from their sketches
+        if tool.merged:
+            html_content += '<tr class="merged-row">'
+            html_content += f'<td>Merged</td><td>-</td><td>{tool.merged.run_count} runs</td>'
+            for cell in tool.merged.cells:
+                html_content += f'<td>{cell if cell is not None else "-"}</td>'
+            html_content += '</tr>'
+        
         html_content += '</tbody></table>'
         return html_content
     
     @staticmethod
-    def render_line_chart(metrics_data: List[Dict], metric_schema: List[Dict], metric_name: str) -> str:
+    def render_extra_table(table: Table) -> str:
+        """Render a pre-formatted table of the report model"""
+        html_content = '<table class="llm-metrics-table">'
+        html_content += '<thead><tr>'
+        for header in table.headers:
+            html_content += f'<th>{header}</th>'
+        html_content += '</tr></thead><tbody>'
+        for row in table.rows:
+            html_content += '<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>'
+        html_content += '</tbody></table>'
+        return html_content
+    
+    @staticmethod
+    def render_line_chart(chart: Chart) -> str:
         """Render a line chart for a specific metric"""
-        if not metrics_data:
+        if not chart.values:
             return '<div class="no-data">No data available</div>'
         
-        # Find the metric schema
-        metric_info = next((m for m in metric_schema if m['name'] == metric_name), None)
-        if not metric_info:
-            return f'<div class="error">Metric {metric_name} not found</div>'
-        
-        # Prepare data for chart
-        labels = []
-        values = []
-        
-        for run in sorted(metrics_data, key=lambda x: x['timestamp']):
-            labels.append(run['build_id'])
-            values.append(run['metrics'].get(metric_name, 0))
-        
         # Create chart container
-        chart_id = f"chart-{metric_name}"
+        chart_id = f"chart-{chart.metric}"
         chart_data = {
-            'labels': labels,
+            'labels': list(chart.labels),
             'datasets': [{
-                'label': metric_info['display_name'],
-                'data': values,
+                'label': chart.display_name,
+                'data': list(chart.values),
                 'borderColor': 'rgb(75, 192, 192)',
                 'backgroundColor': 'rgba(75, 192, 192, 0.2)',
                 'tension': 0.1
@@ -118,7 +127,7 @@ class ChartRenderer:
         
         chart_html = f"""
         <div class="llm-chart-container">
-            <h4>{metric_info['display_name']} ({metric_info['unit']})</h4>
+            <h4>{chart.title}</h4>
             <canvas id="{chart_id}" width="400" height="200"></canvas>
             <script>
                 document.addEventListener('DOMContentLoaded', function() {{
@@ -131,7 +140,7 @@ class ChartRenderer:
                             plugins: {{
                                 title: {{
                                     display: true,
-                                    text: '{metric_info['description']}'
+                                    text: '{chart.description}'
                                 }}
                             }},
                             scales: {{
@@ -139,7 +148,7 @@ class ChartRenderer:
                                     beginAtZero: false,
                                     title: {{
                                         display: true,
-                                        text: '{metric_info['unit']}'
+                                        text: '{chart.unit}'
                                     }}
                                 }},
                                 x: {{
@@ -159,32 +168,21 @@ class ChartRenderer:
         return chart_html
     
     @staticmethod
-    def render_bar_chart(metrics_data: List[Dict], metric_schema: List[Dict], metric_name: str) -> str:
+    def render_bar_chart(chart: Chart) -> str:
         """Render a bar chart for a specific metric"""
-        if not metrics_data:
+        if not chart.values:
             return '<div class="no-data">No data available</div>'
         
-        # Find the metric schema
-        metric_info = next((m for m in metric_schema if m['name'] == metric_name), None)
-        if not metric_info:
-            return f'<div class="error">Metric {metric_name} not found</div>'
-        
-        # Prepare data for chart
-        labels = []
-        values = []
         colors = ['rgba(255, 99, 132, 0.2)', 'rgba(54, 162, 235, 0.2)', 'rgba(255, 205, 86, 0.2)']
         border_colors = ['rgb(255, 99, 132)', 'rgb(54, 162, 235)', 'rgb(255, 205, 86)']
-        
-        for i, run in enumerate(sorted(metrics_data, key=lambda x: x['timestamp'])):
-            labels.append(run['build_id'])
-            values.append(run['metrics'].get(metric_name, 0))
+        values = list(chart.values)
         
         # Create chart container
-        chart_id = f"bar-chart-{metric_name}"
+        chart_id = f"bar-chart-{chart.metric}"
         chart_data = {
-            'labels': labels,
+            'labels': list(chart.labels),
             'datasets': [{
-                'label': metric_info['display_name'],
+                'label': chart.display_name,
                 'data': values,
                 'backgroundColor': colors[:len(values)],
                 'borderColor': border_colors[:len(values)],
@@ -194,7 +192,7 @@ class ChartRenderer:
         
         chart_html = f"""
         <div class="llm-chart-container">
-            <h4>{metric_info['display_name']} ({metric_info['unit']})</h4>
+            <h4>{chart.title}</h4>
             <canvas id="{chart_id}" width="400" height="200"></canvas>
             <script>
                 document.addEventListener('DOMContentLoaded', function() {{
@@ -207,7 +205,7 @@ class ChartRenderer:
                             plugins: {{
                                 title: {{
                                     display: true,
-                                    text: '{metric_info['description']}'
+                                    text: '{chart.description}'
                                 }}
                             }},
                             scales: {{
@@ -215,7 +213,7 @@ class ChartRenderer:
                                     beginAtZero: true,
                                     title: {{
                                         display: true,
-                                        text: '{metric_info['unit']}'
+                                        text: '{chart.unit}'
                                     }}
                                 }},
                                 x: {{
@@ -244,63 +242,44 @@ class LLMTestReporter:
     
     def generate_report_section(self) -> str:
         """Generate the LLM test report section"""
-        tools = self.data_manager.get_tools()
+        model = self.data_manager.model
         
-        if not tools:
+        if not model.tools:
             return '<div class="no-data">No LLM test data available</div>'
         
         sections = []
         
-        for tool_name in tools:
-            tool_data = self.data_manager.get_tool_data(tool_name)
-            if not tool_data:
-                continue
-            
+        for tool in model.tools:
             # Tool header
-            sections.append(f'<h2 class="llm-tool-title">{tool_data["tool"]} - {tool_data["description"]}</h2>')
+            sections.append(f'<h2 class="llm-tool-title">{tool.tool} - {tool.description}</h2>')
             
             # Summary table
             sections.append('<h3>Summary Metrics</h3>')
-            sections.append(self.chart_renderer.render_table(
-                tool_data['runs'], 
-                tool_data['metrics_schema']
-            ))
+            sections.append(self.chart_renderer.render_table(tool))
+            
+            # Extra tables, e.g. slowest tests of the suite profile
+            for table in tool.tables:
+                sections.append(f'<h3>{table.title}</h3>')
+                sections.append(self.chart_renderer.render_extra_table(table))
             
             # Individual metric charts
             sections.append('<h3>Metric Trends</h3>')
             
             # Group charts by type
-            line_charts = []
-            bar_charts = []
-            
-            for metric in tool_data['metrics_schema']:
-                metric_name = metric['name']
-                chart_type = metric.get('default_chart_type')
-                
-                if chart_type == 'line':
-                    line_charts.append(metric_name)
-                elif chart_type == 'bar':
-                    bar_charts.append(metric_name)
+            line_charts = [chart for chart in tool.charts if chart.chart_type == 'line']
+            bar_charts = [chart for chart in tool.charts if chart.chart_type == 'bar']
             
             # Render line charts
             if line_charts:
                 sections.append('<h4>Trend Charts (Line)</h4>')
-                for metric_name in line_charts:
-                    sections.append(self.chart_renderer.render_line_chart(
-                        tool_data['runs'],
-                        tool_data['metrics_schema'],
-                        metric_name
-                    ))
+                for chart in line_charts:
+                    sections.append(self.chart_renderer.render_line_chart(chart))
             
             # Render bar charts
             if bar_charts:
                 sections.append('<h4>Comparison Charts (Bar)</h4>')
-                for metric_name in bar_charts:
-                    sections.append(self.chart_renderer.render_bar_chart(
-                        tool_data['runs'],
-                        tool_data['metrics_schema'],
-                        metric_name
-                    ))
+                for chart in bar_charts:
+                    sections.append(self.chart_renderer.render_bar_chart(chart))
             
             sections.append('<hr>')
         
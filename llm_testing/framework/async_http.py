@@ -0,0 +1,195 @@
+"""
+Minimal asyncio HTTP/1.1 client with a keep-alive connection pool
+Used by the benchmark runners to stream responses (SSE) from
+OpenAI-compatible endpoints without third-party dependencies
+"""
+
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+
+class HTTPError(Exception):
+    """Raised for malformed responses or broken connections"""
+
+
+class Response:
+    """Response whose body is read incrementally from the connection"""
+
+    def __init__(self, client, conn, status, headers):
+        self._client = client
+        self._conn = conn
+        self.status = status
+        self.headers = headers
+        self._remaining = None
+        self._chunked = headers.get('transfer-encoding', '').lower() == 'chunked'
+        self._done = False
+        self._reusable = headers.get('connection', '').lower() != 'close'
+        if not self._chunked:
+            if 'content-length' in headers:
+                self._remaining = int(headers['content-length'])
+            else:
+                # 既无长度也非分块传输时，读到连接关闭为止
+                self._reusable = False
+        if status in (204, 304) or self._remaining == 0:
+            self._finish()
+
+    def _finish(self):
+        if not self._done:
+            self._done = True
+            self._client._release(self._conn, self._reusable)
+
+    async def iter_chunks(self, size=65536):
+        """Yield body bytes as they arrive"""
+        reader = self._conn[0]
+        try:
+            while not self._done:
+                if self._chunked:
+                    line = await reader.readline()
+                    if not line:
+                        raise HTTPError("Connection closed inside chunked body")
+                    length = int(line.split(b';', 1)[0].strip(), 16)
+                    if length == 0:
+                        # 跳过 trailer 直到空行
+                        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                            pass
+                        self._finish()
+                        return
+                    data = await reader.readexactly(length)
+                    await reader.readexactly(2)
+                    yield data
+                elif self._remaining is not None:
+                    data = await reader.read(min(size, self._remaining))
+                    if not data:
+                        raise HTTPError("Connection closed before end of body")
+                    self._remaining -= len(data)
+                    if self._remaining == 0:
+                        self._finish()
+                    yield data
+                else:
+                    data = await reader.read(size)
+                    if not data:
+                        self._finish()
+                        return
+                    yield data
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            self._reusable = False
+            self._finish()
+            raise HTTPError(str(e)) from e
+
+    async def iter_lines(self):
+        """Yield decoded lines (without line terminators), e.g. SSE fields"""
+        buffer = b''
+        async for chunk in self.iter_chunks():
+            buffer += chunk
+            while True:
+                newline = buffer.find(b'\n')
+                if newline < 0:
+                    break
+                line, buffer = buffer[:newline], buffer[newline + 1:]
+                yield line.rstrip(b'\r').decode('utf-8')
+        if buffer:
+            yield buffer.rstrip(b'\r').decode('utf-8')
+
+    async def read(self):
+        return b''.join([chunk async for chunk in self.iter_chunks()])
+
+    async def json(self):
+        return json.loads(await self.read())
+
+    async def close(self):
+        """Release the connection; an unread body makes it non-reusable"""
+        if not self._done:
+            self._reusable = False
+            self._finish()
+
+
+class _RequestContext:
+    def __init__(self, coro):
+        self._coro = coro
+        self._response = None
+
+    async def __aenter__(self):
+        self._response = await self._coro
+        return self._response
+
+    async def __aexit__(self, *exc):
+        await self._response.close()
+
+
+class AsyncHTTPClient:
+    """HTTP/1.1 client bounded to ``limit`` concurrent connections to one origin"""
+
+    def __init__(self, base_url, limit=100, timeout=60.0):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', ''):
+            raise ValueError(f"Only plain http is supported: {base_url}")
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.limit = limit
+        self.connections_opened = 0
+        self._idle = []
+        self._slots = asyncio.Semaphore(limit)
+
+    async def _acquire(self):
+        await self._slots.acquire()
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        try:
+            conn = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        except BaseException:
+            self._slots.release()
+            raise
+        self.connections_opened += 1
+        return conn
+
+    def _release(self, conn, reusable):
+        if reusable:
+            self._idle.append(conn)
+        else:
+            conn[1].close()
+        self._slots.release()
+
+    async def _send(self, method, path, body, headers):
+        conn = await self._acquire()
+        reader, writer = conn
+        try:
+            lines = [f"{method} {self.prefix}{path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+            all_headers = {'Connection': 'keep-alive', 'Content-Length': str(len(body))}
+            all_headers.update(headers or {})
+            lines.extend(f"{name}: {value}" for name, value in all_headers.items())
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.timeout)
+            status_line, *header_lines = head[:-4].decode('latin-1').split('\r\n')
+            status = int(status_line.split(' ', 2)[1])
+            response_headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(':')
+                response_headers[name.strip().lower()] = value.strip()
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            self._release(conn, False)
+            raise HTTPError(f"{method} {path} failed: {e!r}") from e
+        except BaseException:
+            self._release(conn, False)
+            raise
+        return Response(self, conn, status, response_headers)
+
+    def request(self, method, path, json_body=None, headers=None):
+        """Send a request; use as ``async with client.request(...) as response``"""
+        body = b''
+        headers = dict(headers or {})
+        if json_body is not None:
+            body = json.dumps(json_body).encode('utf-8')
+            headers.setdefault('Content-Type', 'application/json')
+        return _RequestContext(self._send(method, path, body, headers))
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
@@ -0,0 +1,100 @@
+"""
+Bootstrap confidence intervals for build-vs-build comparisons
+Resamples both sides in batches - one numpy draw per batch when numpy is
+installed, one ``random.choices`` call per batch otherwise - so hundreds of
+runs per side and thousands of resamples still finish quickly.
+"""
+
+import math
+import random
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+DEFAULT_RESAMPLES = 2000
+DEFAULT_CONFIDENCE = 0.95
+
+# 每批重采样的元素数上限，控制内存
+BATCH_ELEMENTS = 1_000_000
+
+
+def _mean(values):
+    return sum(values) / len(values)
+
+
+def _resampled_means_numpy(values, resamples, rng):
+    data = np.asarray(values, dtype=float)
+    n = len(data)
+    batch = max(1, BATCH_ELEMENTS // n)
+    means = np.empty(resamples)
+    for start in range(0, resamples, batch):
+        size = min(batch, resamples - start)
+        means[start:start + size] = data[rng.integers(0, n, size=(size, n))].mean(axis=1)
+    return means
+
+
+def _resampled_means_python(values, resamples, rng):
+    n = len(values)
+    batch = max(1, BATCH_ELEMENTS // n)
+    means = []
+    for start in range(0, resamples, batch):
+        size = min(batch, resamples - start)
+        draws = rng.choices(values, k=size * n)
+        means.extend(sum(draws[i:i + n]) / n for i in range(0, size * n, n))
+    return means
+
+
+def bootstrap_delta(base, head, resamples=DEFAULT_RESAMPLES, confidence=DEFAULT_CONFIDENCE, seed=0):
+    """Confidence interval of ``mean(head) - mean(base)``; returns (low, high)"""
+    alpha = (1 - confidence) / 2
+    if NUMPY_AVAILABLE:
+        rng = np.random.default_rng(seed)
+        deltas = _resampled_means_numpy(head, resamples, rng) - _resampled_means_numpy(base, resamples, rng)
+        low, high = np.quantile(deltas, [alpha, 1 - alpha])
+        return float(low), float(high)
+
+    rng = random.Random(seed)
+    head_means = _resampled_means_python(head, resamples, rng)
+    base_means = _resampled_means_python(base, resamples, rng)
+    deltas = sorted(h - b for h, b in zip(head_means, base_means))
+    return deltas[int(alpha * (resamples - 1))], deltas[int(math.ceil((1 - alpha) * (resamples - 1)))]
+
+
+def compare_samples(base, head, lower_is_better, resamples=DEFAULT_RESAMPLES,
+                    confidence=DEFAULT_CONFIDENCE, seed=0):
+    """Delta between two groups of metric values and whether it is a real change
+
+    ``verdict`` is ``improved``/``regressed`` when the confidence interval
+    excludes zero, ``unchanged`` when it does not and ``insufficient`` when
+    either side has fewer than two values.
+    """
+    base_mean = _mean(base)
+    head_mean = _mean(head)
+    delta = head_mean - base_mean
+    result = {
+        "base_mean": base_mean,
+        "head_mean": head_mean,
+        "base_n": len(base),
+        "head_n": len(head),
+        "delta": delta,
+        "delta_pct": 100.0 * delta / abs(base_mean) if base_mean else None,
+        "ci_low": None,
+        "ci_high": None,
+        "verdict": "insufficient",
+    }
+    if len(base) < 2 or len(head) < 2:
+        return result
+
+    low, high = bootstrap_delta(base, head, resamples, confidence, seed)
+    result["ci_low"], result["ci_high"] = low, high
+    if low > 0 or high < 0:
+        better = (delta < 0) if lower_is_better else (delta > 0)
+        result["verdict"] = "improved" if better else "regressed"
+    else:
+        result["verdict"] = "unchanged"
+    return result
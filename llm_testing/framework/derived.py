@@ -0,0 +1,205 @@
+"""
+Derived metrics declared in metrics_schema
+A schema entry with a ``derived`` expression is computed from other metrics
+and env fields instead of being stored, e.g.
+``{"name": "ms_per_token", "derived": "latency_ms / env.max_tokens", ...}``.
+The expression is parsed with ``ast`` against a small whitelist - numbers,
+metric names, ``env.<field>``, ``metrics["..."]`` / ``env["..."]`` for keys
+that are not identifiers, arithmetic and abs/min/max/sqrt/log - and compiled
+once into a function over whole columns: one numpy array expression when
+numpy is installed, otherwise a single loop over the runs. A run missing an
+input, or whose result is not a finite number (division by zero, log of a
+negative), gets no value, just like a run that did not store a metric.
+"""
+
+import ast
+import math
+from functools import lru_cache, reduce
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+UNARY_OPERATORS = (ast.UAdd, ast.USub)
+INPUT_SOURCES = ("metrics", "env")
+
+PYTHON_FUNCTIONS = {"abs": abs, "min": min, "max": max, "sqrt": math.sqrt, "log": math.log}
+if NUMPY_AVAILABLE:
+    NUMPY_FUNCTIONS = {
+        "abs": np.abs,
+        "min": lambda *args: reduce(np.minimum, args),
+        "max": lambda *args: reduce(np.maximum, args),
+        "sqrt": np.sqrt,
+        "log": np.log,
+    }
+
+# 逐行求值时出现这些异常表示该运行没有结果
+EVALUATION_ERRORS = (TypeError, ValueError, ZeroDivisionError, OverflowError)
+
+
+class _Compiler(ast.NodeTransformer):
+    """Check every node against the whitelist and rename inputs to column variables"""
+
+    def __init__(self):
+        self.inputs = []
+
+    def column(self, source, key):
+        if (source, key) not in self.inputs:
+            self.inputs.append((source, key))
+        return ast.Name(id=f"col_{self.inputs.index((source, key))}", ctx=ast.Load())
+
+    def generic_visit(self, node):
+        raise ValueError(f"'{type(node).__name__}' is not allowed")
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"constant {node.value!r} is not a number")
+        # 全部按浮点计算，避免整数乘方的超大结果
+        return ast.Constant(value=float(node.value))
+
+    def visit_Name(self, node):
+        return self.column("metrics", node.id)
+
+    def visit_Attribute(self, node):
+        if not (isinstance(node.value, ast.Name) and node.value.id == "env"):
+            raise ValueError("only env.<field> attributes are allowed")
+        return self.column("env", node.attr)
+
+    def visit_Subscript(self, node):
+        key = node.slice
+        if not (isinstance(node.value, ast.Name) and node.value.id in INPUT_SOURCES
+                and isinstance(key, ast.Constant) and isinstance(key.value, str)):
+            raise ValueError('only metrics["name"] and env["field"] subscripts are allowed')
+        return self.column(node.value.id, key.value)
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, BINARY_OPERATORS):
+            raise ValueError(f"operator '{type(node.op).__name__}' is not allowed")
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        return node
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, UNARY_OPERATORS):
+            raise ValueError(f"operator '{type(node.op).__name__}' is not allowed")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_Call(self, node):
+        if not (isinstance(node.func, ast.Name) and node.func.id in PYTHON_FUNCTIONS) or node.keywords:
+            raise ValueError(f"only {', '.join(PYTHON_FUNCTIONS)} can be called")
+        if not node.args:
+            raise ValueError(f"{node.func.id}() needs an argument")
+        node.func = ast.Name(id=f"fn_{node.func.id}", ctx=ast.Load())
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+
+class DerivedExpression:
+    """A compiled ``derived`` expression and the (source, key) columns it reads"""
+
+    __slots__ = ("expression", "inputs", "_function")
+
+    def __init__(self, expression, inputs, function):
+        self.expression = expression
+        self.inputs = inputs
+        self._function = function
+
+    @property
+    def metric_inputs(self):
+        return tuple(key for source, key in self.inputs if source == "metrics")
+
+    def evaluate(self, columns):
+        """Values for every row given one column (list of floats or None) per input"""
+        return self._function(columns)
+
+
+def _python_function(body, count):
+    names = "".join(f"col_{i}, " for i in range(count))
+    functions = {f"fn_{name}": function for name, function in PYTHON_FUNCTIONS.items()}
+    source = (
+        "def evaluate(columns):\n"
+        "    values = []\n"
+        f"    for ({names}) in zip(*columns):\n"
+        "        try:\n"
+        f"            value = {body}\n"
+        "        except EVALUATION_ERRORS:\n"
+        "            value = None\n"
+        "        values.append(value if isinstance(value, float) and math.isfinite(value) else None)\n"
+        "    return values\n"
+    )
+    namespace = {"__builtins__": {"zip": zip, "isinstance": isinstance, "float": float},
+                 "EVALUATION_ERRORS": EVALUATION_ERRORS, "math": math, **functions}
+    exec(compile(source, "<derived>", "exec"), namespace)
+    return namespace["evaluate"]
+
+
+def _numpy_function(body, count):
+    code = compile(body, "<derived>", "eval")
+    functions = {f"fn_{name}": function for name, function in NUMPY_FUNCTIONS.items()}
+
+    def evaluate(columns):
+        size = len(columns[0])
+        arrays = {f"col_{i}": np.array([np.nan if value is None else value for value in column], dtype=float)
+                  for i, column in enumerate(columns)}
+        with np.errstate(all='ignore'):
+            result = np.broadcast_to(np.asarray(eval(code, {"__builtins__": {}, **functions}, arrays), dtype=float),
+                                     (size,))
+        return [float(value) if math.isfinite(value) else None for value in result.tolist()]
+
+    return evaluate
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression):
+    """Parse and compile a ``derived`` expression; raises ValueError if it is not allowed"""
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"bad derived expression {expression!r}: {e.msg}")
+    compiler = _Compiler()
+    try:
+        tree = ast.fix_missing_locations(compiler.visit(tree))
+    except ValueError as e:
+        raise ValueError(f"bad derived expression {expression!r}: {e}")
+    if not compiler.inputs:
+        raise ValueError(f"derived expression {expression!r} reads no metric or env field")
+
+    body = ast.unparse(tree.body)
+    build = _numpy_function if NUMPY_AVAILABLE else _python_function
+    return DerivedExpression(expression, tuple(compiler.inputs), build(body, len(compiler.inputs)))
+
+
+def derivation_order(derived):
+    """Names of ``{name: DerivedExpression}`` ordered so every input is derived first
+
+    Returns (ordered names, names on a dependency cycle).
+    """
+    ordered = []
+    state = {}
+
+    def visit(name):
+        if state.get(name) == "done":
+            return True
+        if state.get(name) in ("visiting", "cycle"):
+            return False
+        state[name] = "visiting"
+        ok = all(visit(key) for key in derived[name].metric_inputs if key in derived)
+        state[name] = "done" if ok else "cycle"
+        if ok:
+            ordered.append(name)
+        return ok
+
+    for name in derived:
+        if name not in state:
+            visit(name)
+    return ordered, [name for name in derived if state[name] != "done"]
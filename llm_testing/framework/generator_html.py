@@ -8,9 +8,27 @@ import os
 from pathlib import Path
 from datetime import datetime
 
+try:
+    from .bootstrap import DEFAULT_RESAMPLES, compare_samples
+    from .records import load_tools
+    from .report_model import ReportModel, build_report_model
+except ImportError:
+    # 以脚本方式直接运行本文件时
+    from bootstrap import DEFAULT_RESAMPLES, compare_samples
+    from records import load_tools
+    from report_model import ReportModel, build_report_model
+
+
+VERDICT_STYLES = {
+    "improved": ("显著改善", "#059669"),
+    "regressed": ("显著退化", "#dc2626"),
+    "unchanged": ("无显著差异", "#6b7280"),
+    "insufficient": ("样本不足", "#9ca3af"),
+}
+
 
 class LLMReportGenerator:
-    def __init__(self, data_dir=None):
+    def __init__(self, data_dir=None, profiler=None, model=None):
         if data_dir is None:
             # 默认数据目录路径
             self.data_dir = Path(__file__).parent.parent / "data"
@@ -23,30 +41,67 @@ class LLMReportGenerator:
                 data_dir = Path.cwd() / data_dir
             self.data_dir = data_dir
         self.test_data = {}
-        self.load_all_data()
+        # 传入已保存的模型时只负责渲染，不再读取数据目录
+        self._model = model
+        if profiler is not None:
+            # 在加载数据前包装各阶段方法，以便计时覆盖 load_all_data
+            profiler.instrument(self)
+        if model is None:
+            self.load_all_data()
         print(f"Data directory set to: {self.data_dir}")
         print(f"Data directory exists: {self.data_dir.exists()}")
     
+    @classmethod
+    def from_model_file(cls, model_file=None, profiler=None):
+        """Render from a report model saved by an earlier step"""
+        return cls(profiler=profiler, model=ReportModel.load(model_file))
+    
     def load_all_data(self):
         """Load all JSON files from the data directory"""
-        if not self.data_dir.exists():
-            print(f"Warning: Data directory {self.data_dir} not found")
-            return
-        
-        for json_file in self.data_dir.glob("*.json"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    tool_name = data.get('tool', json_file.stem)
-                    self.test_data[tool_name] = data
-                    print(f"Loaded data for {tool_name}")
-            except Exception as e:
-                print(f"Warning: Could not load {json_file}: {e}")
+        self.test_data = load_tools(self.data_dir)
+        self._model = None
+        for tool_name in self.test_data:
+            print(f"Loaded data for {tool_name}")
+    
+    @property
+    def model(self):
+        """Report model computed once from the loaded data"""
+        if self._model is None:
+            self._model = self.build_model()
+        return self._model
+    
+    def build_model(self):
+        """Sort series, format cells and lay out charts for every tool"""
+        return build_report_model(self.test_data)
+    
+    def save_model(self, model_file=None):
+        """Write the report model so other outputs can render without recomputing"""
+        return self.model.save(model_file)
     
     def generate_html_report(self, output_file="llm_test_report_demo.html"):
         """Generate a complete HTML report with modern design"""
         
-        html_content = f"""<!DOCTYPE html>
+        html_content = self.render_html()
+        
+        # 确保输出目录存在
+        output_path = Path(output_file)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+
+        # 复制CSS和JS文件到reports目录
+        self.copy_static_files(output_path.parent)
+
+        print(f"HTML report generated: {output_file}")
+        return output_file
+    
+    def render_html(self, tool_cards=None, extra_html=""):
+        """Full report page; the live server passes its own card markup and script"""
+        if tool_cards is None:
+            tool_cards = self.generate_tool_cards()
+        
+        return f"""<!DOCTYPE html>
 <html lang="zh-CN" class="scroll-smooth">
 <head>
     <meta charset="UTF-8">
@@ -73,7 +128,7 @@ class LLMReportGenerator:
     <main class="container py-8">
         <!-- Tool List -->
         <div class="tool-list">
-            {self.generate_tool_cards()}
+            {tool_cards}
         </div>
     </main>
 
@@ -82,7 +137,7 @@ class LLMReportGenerator:
         <div class="container">
             <div class="footer-content">
                 <p class="footer-text">
-                    生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+                    生成时间: {self.model.generated_at}
                 </p>
                 <p class="footer-text mt-2">
                     © 2025 LLM测试框架
@@ -111,20 +166,114 @@ class LLMReportGenerator:
             margin-bottom: 0.5rem;
         }}
     </style>
+{extra_html}</body>
+</html>"""
+
+    def compare_builds(self, base_builds, head_builds, resamples=DEFAULT_RESAMPLES, seed=0):
+        """Per-metric deltas between two groups of build ids, for every tool that has both"""
+        base_builds, head_builds = set(base_builds), set(head_builds)
+        diffs = {}
+        for tool_name, tool in self.test_data.items():
+            base_runs = [run.metrics for run in tool.runs if run.build_id in base_builds]
+            head_runs = [run.metrics for run in tool.runs if run.build_id in head_builds]
+            if not base_runs or not head_runs:
+                continue
+            rows = []
+            for metric in tool.metrics_schema:
+                base = [metrics[metric.name] for metrics in base_runs if metric.name in metrics]
+                head = [metrics[metric.name] for metrics in head_runs if metric.name in metrics]
+                if not base or not head:
+                    continue
+                result = compare_samples(base, head, metric.lower_is_better, resamples, seed=seed)
+                result['metric'] = metric
+                rows.append(result)
+            diffs[tool_name] = rows
+        return diffs
+
+    def generate_diff_table(self, rows):
+        """Generate the HTML table of one tool's build-vs-build deltas"""
+        body = []
+        for row in rows:
+            metric = row['metric']
+            fmt = metric.format
+            label, color = VERDICT_STYLES[row['verdict']]
+            delta_pct = f"{row['delta_pct']:+.1f}%" if row['delta_pct'] is not None else '-'
+            if row['ci_low'] is not None:
+                ci = f"[{fmt.format(row['ci_low'])}, {fmt.format(row['ci_high'])}]"
+            else:
+                ci = '-'
+            body.append(
+                f'<tr><td class="table-header">{metric.display_name} ({metric.unit})</td>'
+                f'<td>{fmt.format(row["base_mean"])} <span class="table-date">n={row["base_n"]}</span></td>'
+                f'<td>{fmt.format(row["head_mean"])} <span class="table-date">n={row["head_n"]}</span></td>'
+                f'<td>{"+" if row["delta"] >= 0 else ""}{fmt.format(row["delta"])} ({delta_pct})</td>'
+                f'<td>{ci}</td>'
+                f'<td style="color: {color}; font-weight: 500;">{label}</td></tr>'
+            )
+        headers = ['指标', '基线均值', '对比均值', '差值', '95% 置信区间', '结论']
+        return f"""
+        <div class="table-container">
+            <table class="table">
+                <thead><tr>{"".join(f'<th>{header}</th>' for header in headers)}</tr></thead>
+                <tbody>{"".join(body)}</tbody>
+            </table>
+        </div>
+        """
+
+    def generate_diff_report(self, base_builds, head_builds, output_file="llm_diff_report.html",
+                             resamples=DEFAULT_RESAMPLES):
+        """Generate a compact page comparing two builds (or two groups of builds)"""
+        diffs = self.compare_builds(base_builds, head_builds, resamples)
+        if diffs:
+            cards = '\n'.join(f"""
+            <div class="card">
+                <div class="card-content">
+                    <div class="header-content"><h2>{self.test_data[tool_name].tool}</h2></div>
+                    {self.generate_diff_table(rows)}
+                </div>
+            </div>""" for tool_name, rows in diffs.items())
+        else:
+            cards = '<div class="card"><div class="card-content"><p class="text-center">所选构建没有可对比的数据</p></div></div>'
+
+        html_content = f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>LLM构建对比报告</title>
+    <link rel="stylesheet" href="./llm_report_styles.css">
+</head>
+<body>
+    <header>
+        <div class="container">
+            <div class="footer-content">
+                <h1>构建对比: {', '.join(sorted(base_builds))} → {', '.join(sorted(head_builds))}</h1>
+            </div>
+        </div>
+    </header>
+    <main class="container py-8">
+        <div class="tool-list">
+            {cards}
+        </div>
+    </main>
+    <footer>
+        <div class="container">
+            <div class="footer-content">
+                <p class="footer-text">置信区间由 {resamples} 次 bootstrap 重采样得到；区间不含 0 时判定为显著变化</p>
+                <p class="footer-text mt-2">生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+            </div>
+        </div>
+    </footer>
 </body>
 </html>"""
-        
-        # 确保输出目录存在
+
         output_path = Path(output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
-
-        # 复制CSS和JS文件到reports目录
         self.copy_static_files(output_path.parent)
 
-        print(f"HTML report generated: {output_file}")
+        print(f"Diff report generated: {output_file}")
         return output_file
 
     def copy_static_files(self, output_dir):
@@ -160,24 +309,23 @@ class LLMReportGenerator:
     
     def generate_tool_cards(self):
         """Generate HTML cards for each tool"""
-        if not self.test_data:
+        if not self.model.tools:
             return '<div class="w-full"><div class="bg-white rounded-xl shadow-sm p-8 text-center"><p class="text-gray-500">暂无LLM测试数据，请确保JSON文件位于llm_test_data目录中。</p></div></div>'
         
         cards = []
-        for i, (tool_name, tool_data) in enumerate(self.test_data.items()):
-            card = self.generate_tool_card(tool_name, tool_data, i)
+        for i, tool in enumerate(self.model.tools):
+            card = self.generate_tool_card(tool, i)
             cards.append(card)
         
         return '\n'.join(cards)
     
-    def generate_tool_card(self, tool_name, tool_data, index):
+    def generate_tool_card(self, tool, index):
         """Generate HTML for a single tool card"""
-        tool_id = tool_name.lower().replace(" ", "-")
         return f"""
             <div class="card animate-fade-in">
                 <div class="card-content">
                     <div class="header-content">
-                        <h2>{tool_data['tool']}</h2>
+                        <h2>{tool.tool}</h2>
                         <div class="icon-container">
                             <svg viewBox="0 0 1024 1024" xmlns="http://www.w3.org/2000/svg">
                                 <path d="M1024.25175 0l-209.92 23.04L883.45175 92.16 655.61175 370.688 419.06775 152.064c-15.872-14.848-40.96-14.848-57.344-0.512L14.07575 465.408C-3.33225 481.28-4.86825 508.416 11.00375 525.824c8.192 9.216 19.968 13.824 31.744 13.824 10.24 0 20.48-3.584 28.672-10.752l318.464-287.744 241.152 222.72c8.704 8.192 20.48 11.776 31.744 11.264 11.776-1.024 22.528-6.656 30.208-15.36l250.88-306.688 57.344 57.344L1024.25175 0z m0 0M133.37175 1024H30.97175c-16.896 0-30.72-13.824-30.72-30.72v-348.16c0-16.896 13.824-30.72 30.72-30.72h102.4c16.896 0 30.72 13.824 30.72 30.72v348.16c0 16.896-13.824 30.72-30.72 30.72z" />
@@ -188,13 +336,14 @@ class LLMReportGenerator:
 
                     <!-- Metrics Table -->
                     <div class="mb-6">
-                        {self.generate_metrics_table(tool_data['runs'], tool_data['metrics_schema'])}
+                        {self.generate_metrics_table(tool)}
                     </div>
+                    {self.generate_extra_tables(tool)}
 
                     <!-- Charts Section Toggle -->
                     <div class="mt-6">
-                        <input type="checkbox" id="toggle-{tool_id}" class="toggle-radio">
-                        <label for="toggle-{tool_id}" class="btn">
+                        <input type="checkbox" id="toggle-{tool.tool_id}" class="toggle-radio">
+                        <label for="toggle-{tool.tool_id}" class="btn">
                             <span class="font-medium">📈 关键指标趋势</span>
                             <svg class="chevron-icon" viewBox="0 0 1024 1024" xmlns="http://www.w3.org/2000/svg">
                                 <path d="M722.773333 381.44a64 64 0 0 1 90.453334 90.453333l-252.970667 253.013334a68.266667 68.266667 0 0 1-96.512 0l-253.013333-253.013334a64 64 0 0 1 90.538666-90.453333L512 592.128l210.773333-210.773333z" />
@@ -202,7 +351,7 @@ class LLMReportGenerator:
                         </label>
                         <div class="toggle-panel">
                             <div class="chart-list">
-                                {self.generate_charts(tool_data['runs'], tool_data['metrics_schema'])}
+                                {self.generate_charts(tool)}
                             </div>
                         </div>
                     </div>
@@ -210,37 +359,45 @@ class LLMReportGenerator:
             </div>
         """
     
-    def generate_metrics_table(self, runs, metrics_schema):
+    def generate_metrics_table(self, tool):
         """Generate HTML table for metrics"""
-        if not runs:
+        if not tool.rows:
             return '<div class="text-center py-4 text-gray-500 dark:text-neutral-400">暂无运行数据</div>'
         
         # Table headers - show all metrics for this tool
-        headers = ['构建ID', '日期']
-        for metric in metrics_schema:
-            headers.append(f"{metric['display_name']} ({metric['unit']})")
+        headers = ['构建ID', '日期'] + [column.header for column in tool.columns]
         
         # Table rows
         rows = []
-        for run in sorted(runs, key=lambda x: x['timestamp']):
+        for row in tool.rows:
             row_cells = [
-                f'<td class="table-header">{run["build_id"]}</td>',
-                f'<td class="table-date">{run["timestamp"][:10]}</td>'
+                f'<td class="table-header">{row.build_id}</td>',
+                f'<td class="table-date">{row.date}</td>'
             ]
             
             # Show all metrics for this run
-            for metric in metrics_schema:
-                metric_name = metric['name']
-                value = run['metrics'].get(metric_name, 'N/A')
-                if value != 'N/A':
-                    formatted_value = metric['format'].format(value)
+            for cell in row.cells:
+                if cell is not None:
                     # No color coding, just display the value
-                    row_cells.append(f'<td>{formatted_value}</td>')
+                    row_cells.append(f'<td>{cell}</td>')
                 else:
                     row_cells.append('<td style="color: #6b7280;">N/A</td>')
             
             rows.append(f'<tr>{"".join(row_cells)}</tr>')
         
+        # 合并各次运行的延迟 sketch，给出全部运行上的真实分位数
+        if tool.merged:
+            row_cells = [
+                '<td class="table-header">合并</td>',
+                f'<td class="table-date">{tool.merged.run_count} 次运行</td>'
+            ]
+            for cell in tool.merged.cells:
+                if cell is not None:
+                    row_cells.append(f'<td>{cell}</td>')
+                else:
+                    row_cells.append('<td style="color: #6b7280;">-</td>')
+            rows.append(f'<tr class="merged-row">{"".join(row_cells)}</tr>')
+        
         return f"""
         <div class="table-container">
             <table class="table">
@@ -256,88 +413,70 @@ class LLMReportGenerator:
         </div>
         """
     
-    def generate_charts(self, runs, metrics_schema):
+    def generate_extra_tables(self, tool):
+        """Generate the tool's extra tables, e.g. slowest tests of the suite profile"""
+        sections = []
+        for table in tool.tables:
+            rows = ''.join(
+                f'<tr><td class="table-header">{row[0]}</td>{"".join(f"<td>{cell}</td>" for cell in row[1:])}</tr>'
+                for row in table.rows
+            )
+            sections.append(f"""
+                    <div class="mb-6">
+                        <h3>{table.title}</h3>
+                        <div class="table-container">
+                            <table class="table">
+                                <thead>
+                                    <tr>
+                                        {"".join(f'<th>{header}</th>' for header in table.headers)}
+                                    </tr>
+                                </thead>
+                                <tbody>
+                                    {rows}
+                                </tbody>
+                            </table>
+                        </div>
+                    </div>
+            """)
+        return ''.join(sections)
+    
+    def generate_charts(self, tool):
         """Generate chart containers for key metrics"""
-        if not runs:
+        if not tool.rows:
             return '<div class="text-center py-4 text-gray-500 dark:text-neutral-400">暂无图表数据</div>'
         
-        charts_html = []
-        
-        # Select key metrics for charts
-        key_metrics = []
-        priority_metrics = ['TTFT', 'Throughput', 'accuracy', 'f1_score']
-        
-        # Add priority metrics first
-        for metric_name in priority_metrics:
-            for metric in metrics_schema:
-                if metric['name'] == metric_name and len(key_metrics) < 2:
-                    key_metrics.append(metric)
-        
-        # Fill with other metrics if needed
-        for metric in metrics_schema:
-            if len(key_metrics) >= 2:
-                break
-            if not any(m['name'] == metric['name'] for m in key_metrics):
-                key_metrics.append(metric)
-        
-        # Generate charts for selected metrics
-        for metric in key_metrics:
-            chart_type = metric.get('default_chart_type')
-            if chart_type in ['line', 'bar']:
-                chart_html = self.generate_chart_container(runs, metric, chart_type)
-                charts_html.append(chart_html)
+        charts_html = [self.generate_chart_container(tool.chart(name)) for name in tool.key_charts]
         
         return '\n'.join(charts_html) if charts_html else '<div class="text-center py-4 text-gray-500 dark:text-neutral-400">暂无可用指标</div>'
     
-    def generate_chart_container(self, runs, metric, chart_type):
+    def generate_chart_container(self, chart):
         """Generate chart container HTML"""
-        chart_id = f"chart-{metric['name']}-{chart_type}"
-
-        if not runs:
+        if not chart.values:
             return f"""
             <div class="chart-container">
                 <div class="chart-header">
-                    <h4 class="chart-title">{metric['display_name']} ({metric['unit']})</h4>
-                    <span class="chart-type">{chart_type == 'line' and '折线图' or '柱状图'}</span>
+                    <h4 class="chart-title">{chart.title}</h4>
+                    <span class="chart-type">{chart.chart_type == 'line' and '折线图' or '柱状图'}</span>
                 </div>
                 <div class="chart-placeholder">
                     无数据
                 </div>
-                <p class="chart-description">{metric['description']}</p>
+                <p class="chart-description">{chart.description}</p>
             </div>
             """
 
-        # 准备数据
-        labels = []
-        values = []
-        for run in sorted(runs, key=lambda x: x['timestamp']):
-            labels.append(run['build_id'])
-            value = run['metrics'].get(metric['name'], 0)
-            values.append(value)
-
-        if chart_type == 'bar':
-            return self.generate_css_bar_chart(metric, labels, values)
+        if chart.chart_type == 'bar':
+            return self.generate_css_bar_chart(chart)
         else:  # line chart
-            return self.generate_css_line_chart(metric, labels, values)
+            return self.generate_css_line_chart(chart)
     
-    def generate_css_bar_chart(self, metric, labels, values):
+    def generate_css_bar_chart(self, chart):
         """Generate CSS bar chart HTML"""
-        if not values:
+        if not chart.values:
             return ""
 
-        # 计算最大值用于缩放
-        max_value = max(values) if values else 1
-        min_value = min(values) if values else 0
-        range_value = max_value - min_value if max_value != min_value else 1
-
         bars_html = []
-        for i, (label, value) in enumerate(zip(labels, values)):
-            # 计算高度百分比 (最小10%以确保可见性)
-            height_percent = max(10, ((value - min_value) / range_value) * 90 + 10)
-
-            # 格式化显示值
-            formatted_value = metric['format'].format(value)
-
+        for label, formatted_value, height_percent in zip(chart.labels, chart.formatted, chart.heights):
             bars_html.append(f"""
             <div class="bar" style="height: {height_percent}%">
                 <div class="bar-value">{formatted_value}</div>
@@ -348,7 +487,7 @@ class LLMReportGenerator:
         return f"""
         <div class="chart-container">
             <div class="chart-header">
-                <h4 class="chart-title">{metric['display_name']} ({metric['unit']})</h4>
+                <h4 class="chart-title">{chart.title}</h4>
                 <span class="chart-type">柱状图</span>
             </div>
             <div class="css-chart">
@@ -356,33 +495,17 @@ class LLMReportGenerator:
                     {''.join(bars_html)}
                 </div>
             </div>
-            <p class="chart-description">{metric['description']}</p>
+            <p class="chart-description">{chart.description}</p>
         </div>
         """
 
-    def generate_css_line_chart(self, metric, labels, values):
+    def generate_css_line_chart(self, chart):
         """Generate CSS line chart HTML using SVG"""
-        if not values:
+        if not chart.values:
             return ""
 
-        # 计算最大最小值用于缩放
-        max_value = max(values) if values else 1
-        min_value = min(values) if values else 0
-        range_value = max_value - min_value if max_value != min_value else 1
-
-        # 生成SVG点和线
         points_html = []
-        points_data = []
-
-        for i, (label, value) in enumerate(zip(labels, values)):
-            # 计算位置
-            x_percent = (i / (len(labels) - 1)) * 100 if len(labels) > 1 else 50
-            y_percent = 100 - (((value - min_value) / range_value) * 90 + 5)  # 留5%边距
-
-            # 格式化显示值
-            formatted_value = metric['format'].format(value)
-
-            points_data.append(f"{x_percent},{y_percent}")
+        for label, formatted_value, x_percent, y_percent in zip(chart.labels, chart.formatted, chart.x, chart.y):
             points_html.append(f"""
             <div class="data-point" style="left: {x_percent}%; top: {y_percent}%">
                 <div class="data-value">{formatted_value}</div>
@@ -390,13 +513,10 @@ class LLMReportGenerator:
             </div>
             """)
 
-        # 生成SVG polyline
-        polyline_points = " " + " ".join(points_data) + " "
-
         return f"""
         <div class="chart-container">
             <div class="chart-header">
-                <h4 class="chart-title">{metric['display_name']} ({metric['unit']})</h4>
+                <h4 class="chart-title">{chart.title}</h4>
                 <span class="chart-type">折线图</span>
             </div>
             <div class="css-chart">
@@ -404,7 +524,7 @@ class LLMReportGenerator:
                     <div class="chart-grid"></div>
                     <svg class="line-chart-svg" viewBox="0 0 100 100" preserveAspectRatio="none">
                         <polyline
-                            points="{polyline_points}"
+                            points="{chart.polyline}"
                             fill="none"
                             stroke="#2dae7d"
                             stroke-width="2"
@@ -417,7 +537,7 @@ class LLMReportGenerator:
                     </div>
                 </div>
             </div>
-            <p class="chart-description">{metric['description']}</p>
+            <p class="chart-description">{chart.description}</p>
         </div>
         """
 
@@ -425,27 +545,21 @@ class LLMReportGenerator:
         """No JavaScript needed for CSS-only version"""
         return ""
     
-    def generate_chart_script(self, runs, metric, chart_type):
+    def generate_chart_script(self, chart):
         """Generate JavaScript for a specific chart"""
-        chart_id = f"chart-{metric['name']}-{chart_type}"
-        
-        # Prepare data
-        labels = []
-        values = []
-        
-        for run in sorted(runs, key=lambda x: x['timestamp']):
-            labels.append(run['build_id'])
-            values.append(run['metrics'].get(metric['name'], 0))
+        chart_id = f"chart-{chart.metric}-{chart.chart_type}"
+        labels = list(chart.labels)
+        values = list(chart.values)
         
         # Chart configuration
-        if chart_type == 'line':
+        if chart.chart_type == 'line':
             config = f"""
                 new Chart(document.getElementById('{chart_id}'), {{
                     type: 'line',
                     data: {{
                         labels: {json.dumps(labels)},
                         datasets: [{{
-                            label: '{metric['display_name']}',
+                            label: '{chart.display_name}',
                             data: {json.dumps(values)},
                             borderColor: '#2dae7d',
                             backgroundColor: 'rgba(45, 174, 125, 0.1)',
@@ -474,7 +588,7 @@ class LLMReportGenerator:
                         }},
                         scales: {{
                             y: {{
-                                beginAtZero: {'true' if metric.get('lower_is_better', False) else 'false'},
+                                beginAtZero: {'true' if chart.lower_is_better else 'false'},
                                 grid: {{
                                     color: 'rgba(0, 0, 0, 0.05)'
                                 }},
@@ -511,7 +625,7 @@ class LLMReportGenerator:
                     data: {{
                         labels: {json.dumps(labels)},
                         datasets: [{{
-                            label: '{metric['display_name']}',
+                            label: '{chart.display_name}',
                             data: {json.dumps(values)},
                             backgroundColor: 'rgba(45, 174, 125, 0.7)',
                             borderColor: '#2dae7d',
@@ -538,7 +652,7 @@ class LLMReportGenerator:
                         }},
                         scales: {{
                             y: {{
-                                beginAtZero: {'true' if metric.get('lower_is_better', False) else 'false'},
+                                beginAtZero: {'true' if chart.lower_is_better else 'false'},
                                 grid: {{
                                     color: 'rgba(0, 0, 0, 0.05)'
                                 }},
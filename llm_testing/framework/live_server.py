@@ -0,0 +1,381 @@
+"""
+Live LLM report server
+Keeps the report model in memory, watches the data directory (inotify on
+Linux, stat polling elsewhere) and re-ingests only the JSON files whose
+mtime or size changed. Browsers connected to ``/events`` receive the
+rebuilt tool cards as Server-Sent Events and swap them in place, so a new
+run shows up without regenerating or reopening the report.
+"""
+
+import copy
+import json
+import os
+import queue
+import select
+import struct
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    from .generator_html import LLMReportGenerator
+    from .records import load_tool_file
+    from .report_model import ReportModel, build_tool_report
+except ImportError:
+    from generator_html import LLMReportGenerator
+    from records import load_tool_file
+    from report_model import ReportModel, build_tool_report
+
+try:
+    import ctypes
+    import ctypes.util
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    _libc.inotify_init1
+    INOTIFY_AVAILABLE = True
+except (ImportError, OSError, AttributeError):
+    _libc = None
+    INOTIFY_AVAILABLE = False
+
+
+DEFAULT_PORT = 8765
+POLL_INTERVAL = 1.0
+# 一次写入常伴随多个事件，稍等片刻合并处理
+DEBOUNCE_SECONDS = 0.2
+KEEPALIVE_SECONDS = 15
+CLIENT_QUEUE_SIZE = 100
+
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+# 只关心写完、移入移出与删除，避免读到写了一半的文件
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+STATIC_FILES = ("llm_report_styles.css", "animate.css")
+
+LIVE_SCRIPT = """
+    <script>
+        // 实时模式：通过 SSE 接收更新后的工具卡片并原地替换
+        (function () {
+            const list = document.querySelector('.tool-list');
+            const source = new EventSource('/events');
+            let opened = false;
+            source.onopen = function () {
+                // 断线重连期间可能错过更新，重新加载完整页面
+                if (opened) location.reload();
+                opened = true;
+            };
+            source.addEventListener('tool', function (event) {
+                const data = JSON.parse(event.data);
+                let card = document.getElementById('card-' + data.tool_id);
+                if (!card) {
+                    card = document.createElement('div');
+                    card.id = 'card-' + data.tool_id;
+                    list.appendChild(card);
+                }
+                card.innerHTML = data.html;
+            });
+            source.addEventListener('remove', function (event) {
+                const card = document.getElementById('card-' + JSON.parse(event.data).tool_id);
+                if (card) card.remove();
+            });
+            source.addEventListener('generated', function (event) {
+                const footer = document.querySelector('footer .footer-text');
+                if (footer) footer.textContent = '生成时间: ' + JSON.parse(event.data).generated_at;
+            });
+        })();
+    </script>
+"""
+
+
+class LiveReport:
+    """Report model kept in memory and updated one data file at a time"""
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        self.renderer = LLMReportGenerator(self.data_dir, model=ReportModel("", ()))
+        # 文件名 -> (mtime_ns, size) 签名与对应的工具报告
+        self.signatures = {}
+        self.tools = {}
+        self.generated_at = ""
+        self.lock = threading.Lock()
+
+    def read_tool(self, path):
+        tool = load_tool_file(path)
+        return build_tool_report(tool.name, tool)
+
+    def refresh(self, names=None):
+        """Re-ingest changed files; ``names`` limits the check to those files
+
+        Returns a list of ("tool", ToolReport) / ("remove", tool_id) changes.
+        """
+        if names is None:
+            names = {path.name for path in self.data_dir.glob("*.json")} | set(self.signatures)
+        changes = []
+        with self.lock:
+            for name in sorted(names):
+                if not name.endswith('.json'):
+                    continue
+                path = self.data_dir / name
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    if name in self.signatures:
+                        del self.signatures[name]
+                        changes.append(("remove", self.tools.pop(name).tool_id))
+                    continue
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if self.signatures.get(name) == signature:
+                    continue
+                try:
+                    tool = self.read_tool(path)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    # 写入一半的文件：保留旧卡片，等下一次事件
+                    print(f"Warning: Could not load {path}: {e}")
+                    continue
+                previous = self.tools.get(name)
+                if previous is not None and previous.tool_id != tool.tool_id:
+                    changes.append(("remove", previous.tool_id))
+                self.signatures[name] = signature
+                self.tools[name] = tool
+                changes.append(("tool", tool))
+            if changes:
+                self.generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return changes
+
+    @property
+    def model(self):
+        with self.lock:
+            return ReportModel(self.generated_at, tuple(self.tools[name] for name in sorted(self.tools)))
+
+    def render_card(self, tool, index=0):
+        return self.renderer.generate_tool_card(tool, index)
+
+    def render_page(self):
+        """Render the full page from a snapshot of the model
+
+        Request threads render concurrently with each other and with the
+        watcher's card renders, so each call works on its own shallow copy
+        of the renderer instead of swapping the shared one's model.
+        """
+        model = self.model
+        renderer = copy.copy(self.renderer)
+        renderer._model = model
+        if not model.tools:
+            cards = renderer.generate_tool_cards()
+        else:
+            cards = '\n'.join(f'<div id="card-{tool.tool_id}">{renderer.generate_tool_card(tool, index)}</div>'
+                              for index, tool in enumerate(model.tools))
+        return renderer.render_html(cards, LIVE_SCRIPT)
+
+
+class InotifyWatcher:
+    """Changed file names in one directory, read from inotify"""
+
+    def __init__(self, directory):
+        self.fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if _libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """Names changed within ``timeout`` seconds; None means rescan everything"""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        names = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                buffer = b''
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                names.add(buffer[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace'))
+                offset += length
+            if not select.select([self.fd], [], [], DEBOUNCE_SECONDS)[0]:
+                return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback without inotify: every wait asks for a signature rescan"""
+
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.interval = interval
+
+    def wait(self, timeout):
+        threading.Event().wait(min(timeout, self.interval))
+        return None
+
+    def close(self):
+        pass
+
+
+def create_watcher(directory, use_inotify=True, poll_interval=POLL_INTERVAL):
+    if use_inotify and INOTIFY_AVAILABLE:
+        try:
+            return InotifyWatcher(directory)
+        except OSError as e:
+            print(f"Warning: inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(directory, poll_interval)
+
+
+def close_client(client):
+    """Drop a client's pending events and tell its stream to end"""
+    while True:
+        try:
+            client.get_nowait()
+        except queue.Empty:
+            break
+    client.put_nowait(None)
+
+
+class LiveReportServer(ThreadingHTTPServer):
+    """HTTP server for the live page, its static files and the SSE stream"""
+
+    daemon_threads = True
+
+    def __init__(self, address, live_report, static_dir=None):
+        super().__init__(address, LiveReportHandler)
+        self.live_report = live_report
+        self.static_dir = Path(static_dir or Path(__file__).parent.parent / "reports")
+        self.clients = set()
+        self.clients_lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def subscribe(self):
+        client = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        with self.clients_lock:
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.clients_lock:
+            self.clients.discard(client)
+
+    def broadcast(self, event, payload):
+        message = f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8')
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                # 跟不上的客户端断开，浏览器重连后会重新加载完整页面
+                self.unsubscribe(client)
+                close_client(client)
+
+    def publish(self, changes):
+        model = self.live_report.model
+        indexes = {tool.tool_id: index for index, tool in enumerate(model.tools)}
+        for kind, value in changes:
+            if kind == "remove":
+                self.broadcast("remove", {"tool_id": value})
+            else:
+                self.broadcast("tool", {"tool_id": value.tool_id,
+                                        "html": self.live_report.render_card(value, indexes.get(value.tool_id, 0))})
+        self.broadcast("generated", {"generated_at": model.generated_at})
+
+    def watch(self, watcher):
+        """Watcher loop: re-ingest changed files and push their cards"""
+        try:
+            while not self.stopped.is_set():
+                names = watcher.wait(KEEPALIVE_SECONDS)
+                if names == set():
+                    continue
+                changes = self.live_report.refresh(names)
+                if changes:
+                    print(f"Updated {len(changes)} tool card(s)")
+                    self.publish(changes)
+        finally:
+            watcher.close()
+
+    def shutdown(self):
+        self.stopped.set()
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            close_client(client)
+        super().shutdown()
+
+
+class LiveReportHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path in ('/', '/index.html'):
+            self.send_body(self.server.live_report.render_page().encode('utf-8'), 'text/html; charset=utf-8')
+        elif path == '/events':
+            self.stream_events()
+        elif path == '/model.json':
+            body = json.dumps(self.server.live_report.model.to_dict(), ensure_ascii=False).encode('utf-8')
+            self.send_body(body, 'application/json')
+        elif path.lstrip('/') in STATIC_FILES:
+            static_file = self.server.static_dir / path.lstrip('/')
+            if static_file.exists():
+                self.send_body(static_file.read_bytes(), 'text/css; charset=utf-8')
+            else:
+                self.send_body(b'not found', 'text/plain', 404)
+        else:
+            self.send_body(b'not found', 'text/plain', 404)
+
+    def stream_events(self):
+        client = self.server.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'keep-alive')
+            self.end_headers()
+            self.wfile.write(b': connected\n\n')
+            self.wfile.flush()
+            while True:
+                try:
+                    message = client.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    message = b': keepalive\n\n'
+                if message is None:
+                    break
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.server.unsubscribe(client)
+
+
+def start_live_server(data_dir, host="127.0.0.1", port=DEFAULT_PORT, use_inotify=True,
+                      poll_interval=POLL_INTERVAL):
+    """Load the data once and start serving and watching in background threads"""
+    live_report = LiveReport(data_dir)
+    live_report.refresh()
+    server = LiveReportServer((host, port), live_report)
+    watcher = create_watcher(live_report.data_dir, use_inotify, poll_interval)
+    threading.Thread(target=server.watch, args=(watcher,), daemon=True, name='live-report-watch').start()
+    threading.Thread(target=server.serve_forever, daemon=True, name='live-report-http').start()
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else f"polling every {poll_interval}s"
+    print(f"Live report at http://{host}:{server.server_port}/ (watching {live_report.data_dir}, {mode})")
+    return server
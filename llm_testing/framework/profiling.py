@@ -0,0 +1,157 @@
+"""
+Opt-in profiling for the LLM report generator
+Phase timers, cProfile stats and tracemalloc top allocations, written as a
+machine-readable timing file next to the generated report. cProfile and
+memory are each measured in a separate pass (as benchmark_report.measure
+does) so neither the profiler nor tracemalloc inflates the phase timings.
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+
+PROFILE_ENV_VAR = "LLM_REPORT_PROFILE"
+
+# LLMReportGenerator 中按阶段计时的方法
+PROFILED_METHODS = [
+    "load_all_data",
+    "build_model",
+    "generate_tool_cards",
+    "generate_metrics_table",
+    "generate_charts",
+    "copy_static_files",
+    "generate_html_report",
+]
+
+
+def profiling_enabled():
+    """Whether profiling was requested through the environment"""
+    return os.environ.get(PROFILE_ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+
+
+class ReportProfiler:
+    """Collects phase timings, plus separate cProfile and tracemalloc passes"""
+
+    def __init__(self, top_functions=30, top_allocations=20):
+        self.top_functions = top_functions
+        self.top_allocations = top_allocations
+        self.phases = {}
+        self.profile = None
+        self.started_at = None
+        self.total_seconds = None
+        self.allocations = []
+        self.peak_bytes = None
+        self._instrumented = []
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    def stop(self):
+        """Stop the timed run and restore the instrumented methods"""
+        self.total_seconds = time.perf_counter() - self.started_at
+        self.restore()
+
+    def measure_functions(self, func):
+        """Run ``func`` again under cProfile and keep its per-function stats"""
+        profile = cProfile.Profile()
+        with contextlib.redirect_stdout(io.StringIO()):
+            profile.enable()
+            try:
+                func()
+            finally:
+                profile.disable()
+        self.profile = profile
+
+    def measure_memory(self, func):
+        """Run ``func`` again under tracemalloc and keep its peak and top allocations"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            try:
+                baseline = tracemalloc.get_traced_memory()[0]
+                func()
+                snapshot = tracemalloc.take_snapshot()
+                self.peak_bytes = tracemalloc.get_traced_memory()[1] - baseline
+            finally:
+                tracemalloc.stop()
+        self.allocations = [
+            {"location": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:self.top_allocations]
+        ]
+
+    @contextmanager
+    def phase(self, name):
+        """Accumulate wall time and call count for a named block"""
+        entry = self.phases.setdefault(name, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry["seconds"] += time.perf_counter() - start
+
+    def wrap(self, name, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def instrument(self, generator, methods=PROFILED_METHODS):
+        """Wrap the given methods of a generator instance in phase timers"""
+        for name in methods:
+            setattr(generator, name, self.wrap(name, getattr(generator, name)))
+            self._instrumented.append((generator, name))
+        return generator
+
+    def restore(self):
+        """Remove the phase timers so the generators call their own methods again"""
+        for generator, name in self._instrumented:
+            # 包装器是实例属性，删除后即恢复类上的原方法
+            vars(generator).pop(name, None)
+        self._instrumented = []
+
+    def top_functions_stats(self):
+        if self.profile is None:
+            return []
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        functions = []
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            functions.append({
+                "function": f"{Path(filename).name}:{line}({func})",
+                "calls": nc,
+                "total_seconds": round(tt, 6),
+                "cumulative_seconds": round(ct, 6),
+            })
+        functions.sort(key=lambda f: f["cumulative_seconds"], reverse=True)
+        return functions[:self.top_functions]
+
+    def to_dict(self):
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "total_seconds": round(self.total_seconds or 0.0, 6),
+            "peak_memory_bytes": self.peak_bytes,
+            "phases": {name: {"calls": v["calls"], "seconds": round(v["seconds"], 6)}
+                       for name, v in self.phases.items()},
+            "top_functions": self.top_functions_stats(),
+            "top_allocations": self.allocations,
+        }
+
+    def write(self, report_file):
+        """Write <report>.timings.json, and <report>.prof after a cProfile pass, next to the report"""
+        report_path = Path(report_file)
+        timings_file = report_path.with_name(report_path.stem + ".timings.json")
+        with open(timings_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        if self.profile is not None:
+            self.profile.dump_stats(str(report_path.with_name(report_path.stem + ".prof")))
+        return timings_file
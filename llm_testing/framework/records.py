@@ -0,0 +1,308 @@
+"""
+Typed records for LLM test data files
+Every loader (standalone generator, pytest-html plugin, live server, PDF
+export) reads tool files through ``load_tools``. Each file is validated once
+at ingest: malformed schema entries and runs are dropped with a warning,
+and the rest become compact ``__slots__`` records. Build ids, env keys and
+values are interned and identical env objects shared, because they repeat
+across thousands of runs. Report building and rendering then use attribute
+access and never meet a run without a timestamp or a metric that is not a
+number. Derived metrics (``derived`` in a schema entry) are computed here too,
+so every consumer sees them as ordinary run metrics.
+"""
+
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from .derived import compile_expression, derivation_order
+    from .sketch import validate_sketches
+except ImportError:
+    from derived import compile_expression, derivation_order
+    from sketch import validate_sketches
+
+
+def intern_text(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class MetricSchema:
+    """One ``metrics_schema`` entry"""
+
+    __slots__ = ("name", "display_name", "unit", "description", "lower_is_better", "format",
+                 "chart_type", "sketch", "statistic", "derived")
+
+    def __init__(self, name, display_name=None, unit='', description='', lower_is_better=False,
+                 format='{}', chart_type=None, sketch=None, statistic=None, derived=None):
+        self.name = name
+        self.display_name = display_name or name
+        self.unit = unit
+        self.description = description
+        self.lower_is_better = lower_is_better
+        self.format = format
+        self.chart_type = chart_type
+        self.sketch = sketch
+        self.statistic = statistic
+        # 编译后的 DerivedExpression；存储型指标为 None
+        self.derived = derived
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict) or not isinstance(data.get('name'), str):
+            raise ValueError("metric needs a string 'name'")
+        if not isinstance(data.get('derived', ''), str):
+            raise ValueError(f"'derived' of metric '{data['name']}' must be a string expression")
+        metric = cls(
+            name=sys.intern(data['name']),
+            display_name=data.get('display_name', data['name']),
+            unit=data.get('unit', ''),
+            description=data.get('description', ''),
+            lower_is_better=bool(data.get('lower_is_better', False)),
+            format=data.get('format', '{}'),
+            chart_type=data.get('default_chart_type'),
+            sketch=data.get('sketch'),
+            statistic=data.get('statistic'),
+            derived=compile_expression(data['derived']) if data.get('derived') is not None else None,
+        )
+        try:
+            metric.format.format(0.0)
+        except (AttributeError, IndexError, KeyError, ValueError) as e:
+            raise ValueError(f"bad format {metric.format!r} for metric '{metric.name}': {e}")
+        return metric
+
+    def to_dict(self):
+        data = {
+            "name": self.name,
+            "display_name": self.display_name,
+            "unit": self.unit,
+            "description": self.description,
+            "lower_is_better": self.lower_is_better,
+            "format": self.format,
+            "default_chart_type": self.chart_type,
+        }
+        if self.sketch:
+            data.update(sketch=self.sketch, statistic=self.statistic)
+        if self.derived:
+            data["derived"] = self.derived.expression
+        return data
+
+
+class Run:
+    """One run; ``metrics`` holds only numeric values
+
+    ``derived`` names the metrics computed at load rather than stored; they
+    are left out of :meth:`to_dict` so saving a run never turns them into
+    stored values.
+    """
+
+    __slots__ = ("build_id", "timestamp", "env", "environment", "metrics", "sketches", "tests", "derived")
+
+    def __init__(self, build_id, timestamp, env, metrics, sketches=None, tests=None):
+        self.build_id = build_id
+        self.timestamp = timestamp
+        self.env = env
+        self.environment = env.get('description', 'N/A')
+        self.metrics = metrics
+        self.sketches = sketches
+        self.tests = tests
+        self.derived = ()
+
+    @classmethod
+    def from_dict(cls, data, envs=None):
+        """Validate one run; ``envs`` shares identical env objects across the runs of a file"""
+        if not isinstance(data, dict):
+            raise ValueError("expected an object")
+        build_id = data.get('build_id')
+        timestamp = data.get('timestamp')
+        if build_id is None:
+            raise ValueError("missing 'build_id'")
+        if not isinstance(timestamp, str):
+            raise ValueError("missing 'timestamp'")
+        try:
+            datetime.strptime(timestamp[:19], '%Y-%m-%dT%H:%M:%S')
+        except ValueError:
+            raise ValueError(f"bad timestamp {timestamp!r}")
+        env = data.get('env') or {}
+        metrics = data.get('metrics') or {}
+        tests = data.get('tests') or None
+        if not isinstance(env, dict) or not isinstance(metrics, dict) or not isinstance(tests, (dict, type(None))):
+            raise ValueError("'env', 'metrics' and 'tests' must be objects")
+        env = {sys.intern(key): intern_text(value) for key, value in env.items()}
+        if envs is not None:
+            try:
+                env = envs.setdefault(tuple(env.items()), env)
+            except TypeError:
+                # 含列表等不可哈希值的环境不参与共享
+                pass
+        return cls(
+            build_id=sys.intern(str(build_id)),
+            timestamp=timestamp,
+            env=env,
+            # 非数值的指标在此丢弃，渲染时无需再判断
+            metrics={sys.intern(name): value for name, value in metrics.items() if is_number(value)},
+            sketches=data.get('sketches') or None,
+            tests=tests,
+        )
+
+    def to_dict(self):
+        metrics = self.metrics
+        if self.derived:
+            metrics = {name: value for name, value in metrics.items() if name not in self.derived}
+        data = {"build_id": self.build_id, "timestamp": self.timestamp, "env": self.env, "metrics": metrics}
+        if self.sketches:
+            data["sketches"] = self.sketches
+        if self.tests:
+            data["tests"] = self.tests
+        return data
+
+
+class Tool:
+    """One tool data file: schema, runs in timestamp order and stored rollups"""
+
+    __slots__ = ("name", "tool", "description", "metrics_schema", "runs", "rollups")
+
+    def __init__(self, name, tool, description, metrics_schema, runs, rollups=None):
+        self.name = name
+        self.tool = tool
+        self.description = description
+        self.metrics_schema = metrics_schema
+        self.runs = runs
+        self.rollups = rollups or {}
+
+    def metric(self, name):
+        return next((metric for metric in self.metrics_schema if metric.name == name), None)
+
+    def to_dict(self):
+        data = {
+            "tool": self.tool,
+            "description": self.description,
+            "metrics_schema": [metric.to_dict() for metric in self.metrics_schema],
+            "runs": [run.to_dict() for run in self.runs],
+        }
+        if self.rollups:
+            derived = {metric.name for metric in self.metrics_schema if metric.derived}
+            data["rollups"] = {
+                period: [{**rollup, "metrics": {name: summary for name, summary in rollup["metrics"].items()
+                                                if name not in derived}} for rollup in entries]
+                for period, entries in self.rollups.items()
+            }
+        return data
+
+
+def evaluate_derived(derived, names, metric_maps, env_maps):
+    """Evaluate the derived metrics ``names`` in order, writing their values into ``metric_maps``"""
+    for name in names:
+        expression = derived[name]
+        columns = []
+        for source, key in expression.inputs:
+            maps = metric_maps if source == "metrics" else env_maps
+            columns.append([float(value) if is_number(value) else None for value in (m.get(key) for m in maps)])
+        for metrics, value in zip(metric_maps, expression.evaluate(columns)):
+            if value is None:
+                metrics.pop(name, None)
+            else:
+                metrics[name] = value
+
+
+def derive_metrics(metrics_schema, runs, rollups=None, source=""):
+    """Compute every derived metric over all runs, one column pass per expression
+
+    Values go into ``run.metrics`` and their names into ``run.derived``, so
+    ``to_dict`` can leave them out. Rollups keep no env fields, so their
+    derived value is evaluated on metric means and stored as a
+    ``{"count", "mean"}`` summary in copies of the rollups. Returns the schema
+    without derived metrics caught in a dependency cycle, and the rollups.
+    """
+    derived = {metric.name: metric.derived for metric in metrics_schema if metric.derived}
+    if not derived:
+        return metrics_schema, rollups
+    ordered, cyclic = derivation_order(derived)
+    for name in cyclic:
+        print(f"Warning: skipping derived metric '{name}' of {source}: dependency cycle")
+
+    evaluate_derived(derived, ordered, [run.metrics for run in runs], [run.env for run in runs])
+    names = frozenset(ordered)
+    for run in runs:
+        run.derived = names
+    if rollups:
+        entries = [rollup for period in rollups.values() for rollup in period]
+        means = [{name: summary['mean'] for name, summary in rollup['metrics'].items()} for rollup in entries]
+        evaluate_derived(derived, ordered, means, [{}] * len(entries))
+        copies = {}
+        for rollup, mean_map in zip(entries, means):
+            metrics = {name: summary for name, summary in rollup['metrics'].items() if name not in derived}
+            metrics.update((name, {"count": rollup['count'], "mean": mean_map[name]})
+                           for name in ordered if name in mean_map)
+            copies[id(rollup)] = {**rollup, "metrics": metrics}
+        rollups = {period: [copies[id(rollup)] for rollup in period_entries]
+                   for period, period_entries in rollups.items()}
+    return tuple(metric for metric in metrics_schema if metric.name not in cyclic), rollups
+
+
+def load_tool(data, source=""):
+    """Validate one loaded tool file and build its records
+
+    Bad schema entries and runs are skipped with one warning each; a file
+    that is not a tool object raises ValueError.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('runs', []), list):
+        raise ValueError("expected an object with a 'runs' list")
+    if not isinstance(data.get('metrics_schema', []), list):
+        raise ValueError("expected 'metrics_schema' to be a list")
+    validate_sketches(data, source)
+
+    metrics_schema = []
+    for index, entry in enumerate(data.get('metrics_schema', [])):
+        try:
+            metrics_schema.append(MetricSchema.from_dict(entry))
+        except ValueError as e:
+            print(f"Warning: skipping metric {index} of {source}: {e}")
+
+    runs = []
+    envs = {}
+    for index, entry in enumerate(data.get('runs', [])):
+        try:
+            runs.append(Run.from_dict(entry, envs))
+        except ValueError as e:
+            print(f"Warning: skipping run {index} of {source}: {e}")
+    runs.sort(key=lambda run: run.timestamp)
+    metrics_schema, rollups = derive_metrics(tuple(metrics_schema), runs, data.get('rollups'), source)
+
+    name = data.get('tool') or Path(source).stem
+    return Tool(
+        name=name,
+        tool=name,
+        description=data.get('description', ''),
+        metrics_schema=metrics_schema,
+        runs=tuple(runs),
+        rollups=rollups,
+    )
+
+
+def load_tool_file(path):
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return load_tool(json.load(f), path.name)
+
+
+def load_tools(data_dir):
+    """Records of every tool JSON file in ``data_dir``; returns {tool name: Tool}"""
+    tools = {}
+    data_dir = Path(data_dir)
+    if not data_dir.exists():
+        print(f"Warning: Data directory {data_dir} not found")
+        return tools
+
+    for json_file in data_dir.glob("*.json"):
+        try:
+            tool = load_tool_file(json_file)
+            tools[tool.name] = tool
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load {json_file}: {e}")
+    return tools
@@ -0,0 +1,319 @@
+"""
+Computed LLM report model
+One pass over the data directory produces an immutable model - sorted
+series, formatted table cells and chart geometry - that the standalone HTML
+generator, the pytest-html plugin and the PDF export only render. The model
+can be saved to disk so a CI build computes it once and every later output
+step just loads it.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+try:
+    from .records import Tool, load_tool
+    from .retention import chart_points, rollup_entries, rollup_label
+    from .sketch import aggregate_sketch_maps
+    from .suite_profile import slowest_regressions, slowest_tests
+except ImportError:
+    # 以脚本方式直接运行 generator_html.py 时
+    from records import Tool, load_tool
+    from retention import chart_points, rollup_entries, rollup_label
+    from sketch import aggregate_sketch_maps
+    from suite_profile import slowest_regressions, slowest_tests
+
+
+MODEL_ENV_VAR = "LLM_REPORT_MODEL"
+DEFAULT_MODEL_FILE = Path(__file__).parent.parent / "reports" / "llm_report_model.json"
+
+CHART_TYPES = ("line", "bar")
+
+# 独立报告中每个工具卡片优先展示的指标
+PRIORITY_METRICS = ("TTFT", "Throughput", "accuracy", "f1_score")
+KEY_CHARTS_PER_TOOL = 2
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    display_name: str
+    unit: str
+    description: str
+    lower_is_better: bool
+    format: str
+    chart_type: Optional[str]
+    # 派生指标的表达式；其值在加载时计算，并非数据文件中存储的值
+    derived: Optional[str] = None
+
+    @property
+    def header(self):
+        return f"{self.display_name} ({self.unit})"
+
+
+@dataclass(frozen=True)
+class Row:
+    build_id: str
+    timestamp: str
+    date: str
+    environment: str
+    cells: Tuple[Optional[str], ...]
+
+
+@dataclass(frozen=True)
+class MergedRow:
+    """Percentiles merged from the run sketches; ``None`` cells are not aggregatable"""
+    run_count: int
+    cells: Tuple[Optional[str], ...]
+
+
+@dataclass(frozen=True)
+class Chart:
+    metric: str
+    display_name: str
+    unit: str
+    chart_type: str
+    description: str
+    lower_is_better: bool
+    labels: Tuple[str, ...]
+    values: Tuple[float, ...]
+    formatted: Tuple[str, ...]
+    # 几何信息均为百分比：折线图点坐标 (x, y)，柱状图柱高
+    x: Tuple[float, ...]
+    y: Tuple[float, ...]
+    heights: Tuple[float, ...]
+
+    @property
+    def title(self):
+        return f"{self.display_name} ({self.unit})"
+
+    @property
+    def polyline(self):
+        return " " + " ".join(f"{x},{y}" for x, y in zip(self.x, self.y)) + " "
+
+
+@dataclass(frozen=True)
+class Table:
+    """Extra pre-formatted table shown under a tool's metrics table"""
+    title: str
+    headers: Tuple[str, ...]
+    rows: Tuple[Tuple[str, ...], ...]
+
+
+@dataclass(frozen=True)
+class ToolReport:
+    name: str
+    tool: str
+    description: str
+    tool_id: str
+    columns: Tuple[Column, ...]
+    rows: Tuple[Row, ...]
+    merged: Optional[MergedRow]
+    charts: Tuple[Chart, ...]
+    key_charts: Tuple[str, ...]
+    tables: Tuple[Table, ...] = ()
+
+    def chart(self, metric_name):
+        return next((chart for chart in self.charts if chart.metric == metric_name), None)
+
+
+@dataclass(frozen=True)
+class ReportModel:
+    generated_at: str
+    tools: Tuple[ToolReport, ...]
+
+    def tool(self, name):
+        return next((tool for tool in self.tools if tool.name == name), None)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        tools = []
+        for tool in data["tools"]:
+            merged = tool["merged"]
+            tools.append(ToolReport(
+                name=tool["name"],
+                tool=tool["tool"],
+                description=tool["description"],
+                tool_id=tool["tool_id"],
+                columns=tuple(Column(**column) for column in tool["columns"]),
+                rows=tuple(Row(**{**row, "cells": tuple(row["cells"])}) for row in tool["rows"]),
+                merged=MergedRow(merged["run_count"], tuple(merged["cells"])) if merged else None,
+                charts=tuple(Chart(**{key: tuple(value) if isinstance(value, list) else value
+                                      for key, value in chart.items()}) for chart in tool["charts"]),
+                key_charts=tuple(tool["key_charts"]),
+                tables=tuple(Table(table["title"], tuple(table["headers"]),
+                                   tuple(tuple(row) for row in table["rows"]))
+                             for table in tool.get("tables", [])),
+            ))
+        return cls(data["generated_at"], tuple(tools))
+
+    def save(self, path=None):
+        path = Path(path or default_model_path())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or default_model_path(), 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def default_model_path():
+    return Path(os.environ.get(MODEL_ENV_VAR) or DEFAULT_MODEL_FILE)
+
+
+def build_column(metric):
+    return Column(
+        name=metric.name,
+        display_name=metric.display_name,
+        unit=metric.unit,
+        description=metric.description,
+        lower_is_better=metric.lower_is_better,
+        format=metric.format,
+        chart_type=metric.chart_type,
+        derived=metric.derived.expression if metric.derived else None,
+    )
+
+
+def build_chart(column, points):
+    """Series and geometry of one metric over (label, timestamp, metrics) points in time order"""
+    name = column.name
+    labels = tuple(label for label, _, _ in points)
+    values = tuple(metrics.get(name, 0) for _, _, metrics in points)
+    max_value = max(values)
+    min_value = min(values)
+    range_value = max_value - min_value if max_value != min_value else 1
+    count = len(values)
+    return Chart(
+        metric=column.name,
+        display_name=column.display_name,
+        unit=column.unit,
+        chart_type=column.chart_type,
+        description=column.description,
+        lower_is_better=column.lower_is_better,
+        labels=labels,
+        values=values,
+        formatted=tuple(column.format.format(value) for value in values),
+        x=tuple((i / (count - 1)) * 100 if count > 1 else 50 for i in range(count)),
+        # 上下各留 5% 边距
+        y=tuple(100 - (((value - min_value) / range_value) * 90 + 5) for value in values),
+        # 柱高最小 10% 以确保可见
+        heights=tuple(max(10, ((value - min_value) / range_value) * 90 + 10) for value in values),
+    )
+
+
+def select_key_charts(columns):
+    """Up to two charted metrics for a tool card, priority metrics first"""
+    selected = []
+    for name in PRIORITY_METRICS:
+        for column in columns:
+            if column.name == name and len(selected) < KEY_CHARTS_PER_TOOL:
+                selected.append(column)
+    for column in columns:
+        if len(selected) >= KEY_CHARTS_PER_TOOL:
+            break
+        if column not in selected:
+            selected.append(column)
+    return tuple(column.name for column in selected if column.chart_type in CHART_TYPES)
+
+
+def build_test_tables(runs):
+    """Slowest-test and slowest-regression tables for runs carrying per-test profiles"""
+    if not runs or runs[-1].tests is None:
+        return ()
+    history = [run.tests for run in runs]
+    tables = [Table(
+        title=f"Slowest Tests ({runs[-1].build_id})",
+        headers=("Test", "Wall (s)", "CPU (s)", "RSS Delta (MB)"),
+        rows=tuple((nodeid, f"{wall:.3f}", f"{cpu:.3f}", f"{rss / 1024:.1f}")
+                   for nodeid, wall, cpu, rss in slowest_tests(history)),
+    )]
+    regressions = slowest_regressions(history)
+    if regressions:
+        tables.append(Table(
+            title="Slowest Regressions",
+            headers=("Test", "Baseline (s)", "Latest (s)", "Change"),
+            rows=tuple((nodeid, f"{baseline:.3f}", f"{latest:.3f}", f"x{ratio:.2f}")
+                       for nodeid, baseline, latest, ratio in regressions),
+        ))
+    return tuple(tables)
+
+
+def build_tool_report(name, tool):
+    """Report of one tool from its records; a raw tool dict is validated into records first"""
+    if not isinstance(tool, Tool):
+        tool = load_tool(tool, name)
+    columns = tuple(build_column(metric) for metric in tool.metrics_schema)
+    formats = tuple((column.name, column.format) for column in columns)
+    runs = tool.runs
+    rollups = rollup_entries(tool.rollups)
+
+    rows = []
+    # 已汇总的历史以每个时间桶的均值展示在原始运行之前
+    for rollup in rollups:
+        summaries = rollup['metrics']
+        rows.append(Row(
+            build_id=f"{rollup_label(rollup)} ({rollup['count']} runs)",
+            timestamp=rollup['last_timestamp'],
+            date=rollup['start'],
+            environment=rollup['group'],
+            cells=tuple(fmt.format(summaries[metric]['mean']) if metric in summaries else None
+                        for metric, fmt in formats),
+        ))
+    for run in runs:
+        metrics = run.metrics
+        rows.append(Row(
+            build_id=run.build_id,
+            timestamp=run.timestamp,
+            date=run.timestamp[:10],
+            environment=run.environment,
+            cells=tuple(fmt.format(metrics[metric]) if metric in metrics else None for metric, fmt in formats),
+        ))
+
+    merged = None
+    run_count = len(runs) + sum(rollup['count'] for rollup in rollups)
+    sketch_metrics = [(metric.name, metric.sketch, metric.statistic)
+                      for metric in tool.metrics_schema if metric.sketch and metric.statistic]
+    aggregated = {}
+    if run_count > 1 and sketch_metrics:
+        sketch_maps = [rollup.get('sketches') for rollup in rollups] + [run.sketches for run in runs]
+        aggregated = aggregate_sketch_maps(sketch_maps, sketch_metrics)
+    if aggregated:
+        merged = MergedRow(run_count, tuple(
+            column.format.format(aggregated[column.name]) if column.name in aggregated else None
+            for column in columns
+        ))
+
+    # 历史较长时改用按天/按周的汇总点绘图，图表大小不随运行次数增长
+    points = chart_points(runs, rollups)
+    charts = tuple(build_chart(column, points) for column in columns if points and column.chart_type in CHART_TYPES)
+    return ToolReport(
+        name=name,
+        tool=tool.tool,
+        description=tool.description,
+        tool_id=name.lower().replace(" ", "-"),
+        columns=columns,
+        rows=tuple(rows),
+        merged=merged,
+        charts=charts,
+        key_charts=select_key_charts(columns),
+        tables=build_test_tables(runs),
+    )
+
+
+def build_report_model(tools):
+    """Compute the whole report model from loaded tool records"""
+    return ReportModel(
+        generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        tools=tuple(build_tool_report(name, tool) for name, tool in tools.items()),
+    )
@@ -0,0 +1,275 @@
+"""
+Retention and time-bucketed rollups for tool data files
+Runs newer than ``raw_days`` stay as they are; older runs are folded into
+daily rollups per environment group, and daily rollups older than
+``daily_days`` into weekly ones. A rollup keeps count, mean, min, max and
+percentiles of every metric plus a mergeable sketch of the metric values,
+so later folds (day -> week, or more runs into the same day) stay exact up
+to the sketch's relative error. Run latency sketches are merged as well,
+which keeps the report's merged percentiles working over rolled-up history.
+Rollups live next to the runs: ``data["rollups"] = {"daily": [...], "weekly": [...]}``.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+try:
+    from .records import Run, is_number
+    from .sketch import LatencySketch, merge_run_sketches
+except ImportError:
+    from records import Run, is_number
+    from sketch import LatencySketch, merge_run_sketches
+
+
+PERIODS = ("daily", "weekly")
+ROLLUP_PERCENTILES = ("p50", "p90", "p99")
+
+# 报告中每条曲线最多的点数；超出时按天、再按周聚合后绘制
+MAX_CHART_POINTS = 60
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    raw_days: int = 30
+    daily_days: int = 180
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(int(data.get("raw_days", cls.raw_days)), int(data.get("daily_days", cls.daily_days)))
+
+
+def period_start(timestamp, period):
+    """First day of the day or ISO week (Monday) holding ``timestamp``"""
+    day = datetime.strptime(timestamp[:10], '%Y-%m-%d')
+    if period == "weekly":
+        day -= timedelta(days=day.weekday())
+    return day.strftime('%Y-%m-%d')
+
+
+def run_group(run):
+    return (run.get('env') or {}).get('description', 'N/A')
+
+
+def is_valid_run(run):
+    """Whether the loader would accept ``run``; others are left as they are, never folded"""
+    try:
+        Run.from_dict(run)
+    except ValueError:
+        return False
+    return True
+
+
+def period_label(period, start):
+    if period == "weekly":
+        year, week, _ = datetime.strptime(start, '%Y-%m-%d').isocalendar()
+        return f"{year}-W{week:02d}"
+    return start
+
+
+def rollup_label(rollup):
+    return period_label(rollup["period"], rollup["start"])
+
+
+def entry_key(entry, period):
+    """(period start, environment group) of a run or a finer rollup"""
+    timestamp = entry.get("first_timestamp") or entry["timestamp"]
+    return period_start(timestamp, period), entry.get("group") or run_group(entry)
+
+
+def metric_summary(sketch, total, count, minimum, maximum):
+    summary = {"count": count, "mean": total / count, "min": minimum, "max": maximum}
+    if sketch is not None:
+        for name in ROLLUP_PERCENTILES:
+            summary[name] = sketch.statistic(name)
+        summary["sketch"] = sketch.to_dict()
+    return summary
+
+
+def merge_metric(summary, other):
+    """Merge two metric summaries; percentiles survive only if both have sketches"""
+    if summary is None:
+        return other
+    sketch = None
+    if "sketch" in summary and "sketch" in other:
+        sketch = LatencySketch.from_dict(summary["sketch"]).merge(LatencySketch.from_dict(other["sketch"]))
+    count = summary["count"] + other["count"]
+    total = summary["mean"] * summary["count"] + other["mean"] * other["count"]
+    return metric_summary(sketch, total, count, min(summary["min"], other["min"]), max(summary["max"], other["max"]))
+
+
+def rollup_runs(runs, period, start, group):
+    """One rollup summarizing ``runs``"""
+    runs = sorted(runs, key=lambda run: run["timestamp"])
+    values = {}
+    for run in runs:
+        for name, value in run.get("metrics", {}).items():
+            if is_number(value):
+                values.setdefault(name, []).append(value)
+
+    metrics = {}
+    for name, series in values.items():
+        # 草图只接受非负值；含负值的指标只保留均值与极值
+        sketch = LatencySketch().update(series) if min(series) >= 0 else None
+        metrics[name] = metric_summary(sketch, sum(series), len(series), min(series), max(series))
+
+    rollup = {
+        "period": period,
+        "start": start,
+        "group": group,
+        "count": len(runs),
+        "first_timestamp": runs[0]["timestamp"],
+        "last_timestamp": runs[-1]["timestamp"],
+        "first_build": runs[0]["build_id"],
+        "last_build": runs[-1]["build_id"],
+        "metrics": metrics,
+    }
+    # 仅当每次运行都带有同名延迟草图时才能合并
+    common = set.intersection(*(set(run.get("sketches") or ()) for run in runs))
+    if common:
+        rollup["sketches"] = {name: merge_run_sketches(runs, name).to_dict() for name in sorted(common)}
+    return rollup
+
+
+def merge_rollups(rollup, other):
+    """Merge rollup ``other`` into ``rollup`` (same bucket or a coarser one)"""
+    rollup["count"] += other["count"]
+    if other["first_timestamp"] < rollup["first_timestamp"]:
+        rollup["first_timestamp"], rollup["first_build"] = other["first_timestamp"], other["first_build"]
+    if other["last_timestamp"] >= rollup["last_timestamp"]:
+        rollup["last_timestamp"], rollup["last_build"] = other["last_timestamp"], other["last_build"]
+    metrics = dict(rollup["metrics"])
+    for name, summary in other["metrics"].items():
+        metrics[name] = merge_metric(metrics.get(name), summary)
+    rollup["metrics"] = metrics
+
+    sketches = rollup.get("sketches") or {}
+    kept = {name: LatencySketch.from_dict(data).merge(LatencySketch.from_dict(other["sketches"][name])).to_dict()
+            for name, data in sketches.items() if name in (other.get("sketches") or {})}
+    if kept:
+        rollup["sketches"] = kept
+    else:
+        rollup.pop("sketches", None)
+    return rollup
+
+
+def fold(entries, period, rollups=()):
+    """Fold runs or finer rollups into the ``period`` rollups keyed by (start, group)"""
+    by_key = {(rollup["start"], rollup["group"]): rollup for rollup in rollups}
+    groups = {}
+    for entry in entries:
+        groups.setdefault(entry_key(entry, period), []).append(entry)
+
+    for key, members in groups.items():
+        if "period" in members[0]:
+            members = sorted(members, key=lambda rollup: rollup["first_timestamp"])
+            folded = {**members[0], "period": period, "start": key[0]}
+            for member in members[1:]:
+                merge_rollups(folded, member)
+        else:
+            folded = rollup_runs(members, period, *key)
+        existing = by_key.get(key)
+        by_key[key] = folded if existing is None else merge_rollups(dict(existing), folded)
+    return sorted(by_key.values(), key=lambda rollup: (rollup["start"], rollup["group"]))
+
+
+def apply_retention(data, policy=None, now=None):
+    """Fold expired runs and daily rollups in place; returns (folded runs, folded days)"""
+    policy = policy or RetentionPolicy()
+    now = now or datetime.now(timezone.utc)
+    # 按天切分原始运行、按周一切分日汇总，同一天或同一周不会被拆到两处
+    raw_cutoff = (now - timedelta(days=policy.raw_days)).strftime('%Y-%m-%d')
+    daily_cutoff = period_start((now - timedelta(days=policy.daily_days)).strftime('%Y-%m-%d'), "weekly")
+
+    runs = data.get("runs", [])
+    # 与 records.load_tools 一致：缺少时间戳等无效的运行不参与汇总，原样保留（加载时会被跳过并告警）
+    is_expired = [is_valid_run(run) and run["timestamp"][:10] < raw_cutoff for run in runs]
+    expired = [run for run, old in zip(runs, is_expired) if old]
+    rollups = data.setdefault("rollups", {})
+    if expired:
+        data["runs"] = [run for run, old in zip(runs, is_expired) if not old]
+        rollups["daily"] = fold(expired, "daily", rollups.get("daily", []))
+
+    daily = rollups.get("daily", [])
+    old_days = [rollup for rollup in daily if rollup["start"] < daily_cutoff]
+    if old_days:
+        rollups["daily"] = [rollup for rollup in daily if rollup["start"] >= daily_cutoff]
+        rollups["weekly"] = fold(old_days, "weekly", rollups.get("weekly", []))
+
+    for period in PERIODS:
+        if not rollups.get(period):
+            rollups.pop(period, None)
+    if not rollups:
+        data.pop("rollups", None)
+    return len(expired), len(old_days)
+
+
+def rollup_entries(rollups):
+    """Stored rollups (``{"daily": [...], "weekly": [...]}``), coarsest first, ordered by time"""
+    rollups = rollups or {}
+    return [rollup for period in reversed(PERIODS) for rollup in rollups.get(period, [])]
+
+
+def bucket_points(rollups, runs, period):
+    """(label, timestamp, metric means) per period over rollups and run records
+
+    A chart is a single series, so environment groups share a point; only
+    count-weighted means are needed, so no sketches are built here.
+    """
+    buckets = {}
+
+    def add(start, timestamp, items):
+        bucket = buckets.get(start)
+        if bucket is None:
+            bucket = buckets[start] = [timestamp, {}, {}]
+        bucket[0] = max(bucket[0], timestamp)
+        totals, counts = bucket[1], bucket[2]
+        for name, mean, count in items:
+            totals[name] = totals.get(name, 0.0) + mean * count
+            counts[name] = counts.get(name, 0) + count
+
+    for rollup in rollups:
+        add(period_start(rollup["first_timestamp"], period), rollup["last_timestamp"],
+            ((name, summary["mean"], summary["count"]) for name, summary in rollup["metrics"].items()))
+    for run in runs:
+        add(period_start(run.timestamp, period), run.timestamp,
+            ((name, value, 1) for name, value in run.metrics.items()))
+
+    return [(period_label(period, start), timestamp, {name: total / counts[name] for name, total in totals.items()})
+            for start, (timestamp, totals, counts) in buckets.items()]
+
+
+def chart_points(runs, rollups, max_points=MAX_CHART_POINTS):
+    """Points to chart: one per stored rollup period, then one per run record
+
+    When that exceeds ``max_points``, daily rollups and raw runs are bucketed
+    by day, and if that is still too many, everything by week, so the chart
+    size no longer grows with the history.
+    """
+    weekly = [rollup for rollup in rollups if rollup["period"] == "weekly"]
+    daily = [rollup for rollup in rollups if rollup["period"] == "daily"]
+    points = bucket_points(weekly, (), "weekly")
+    recent = bucket_points(daily, (), "daily") + [(run.build_id, run.timestamp, run.metrics) for run in runs]
+    if len(points) + len(recent) > max_points:
+        recent = bucket_points(daily, runs, "daily")
+    if len(points) + len(recent) > max_points:
+        points, recent = bucket_points(weekly + daily, runs, "weekly"), []
+    return sorted(points + recent, key=lambda point: point[1])
+
+
+def apply_to_file(path, policy=None, now=None):
+    """Apply retention to one tool data file, rewriting it only when something was folded"""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if policy is None and "retention" in data:
+        policy = RetentionPolicy.from_dict(data["retention"])
+    folded = apply_retention(data, policy, now)
+    if any(folded):
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    return folded
@@ -0,0 +1,77 @@
+"""
+Helpers for producing runs in the LLM test data format
+Shared by the load generator and benchmark runners that append results to
+the JSON files under llm_testing/data
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    from .retention import RetentionPolicy, apply_retention
+except ImportError:
+    from retention import RetentionPolicy, apply_retention
+
+
+def utc_timestamp():
+    """Current time in the timestamp format used by runs"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def default_build_id():
+    """Jenkins build number when available, otherwise a local time-based id"""
+    build_number = os.environ.get('BUILD_NUMBER')
+    if build_number:
+        return f"build-{build_number}"
+    return f"local-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(-(-q * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def build_run(build_id, metrics, env, **extra):
+    """Assemble a run entry"""
+    run = {
+        "build_id": build_id,
+        "timestamp": utc_timestamp(),
+        "env": env,
+        "metrics": {name: round(value, 4) for name, value in metrics.items()},
+    }
+    run.update(extra)
+    return run
+
+
+def append_run(output_file, run, tool, description, metrics_schema):
+    """Append a run to a tool data file, creating the file if needed
+
+    Files with a ``retention`` setting fold their expired runs into rollups
+    on every append, so they stay bounded without a separate cleanup step.
+    """
+    output_path = Path(output_file)
+    if output_path.exists():
+        with open(output_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    else:
+        data = {
+            "tool": tool,
+            "description": description,
+            "metrics_schema": metrics_schema,
+            "runs": []
+        }
+    data.setdefault("runs", []).append(run)
+    if "retention" in data:
+        apply_retention(data, RetentionPolicy.from_dict(data["retention"]))
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    return output_path
@@ -0,0 +1,114 @@
+"""
+Duration-aware test sharding
+A pytest plugin that splits the collected tests into N shards balanced by
+the durations recorded in previous junit.xml files, using greedy
+longest-processing-time bin packing: tests are taken slowest first and
+each goes to the currently lightest shard. Every shard process computes
+the same plan from the same inputs and keeps only its own tests, so the
+suite's wall-clock time approaches that of the slowest shard.
+
+Enable with ``-p llm_testing.framework.sharding --shards 4 --shard-index 0``;
+``scripts/merge_shards.py`` combines the per-shard outputs afterwards.
+"""
+
+import glob
+import heapq
+import re
+from statistics import median
+from xml.etree.ElementTree import ParseError, iterparse
+
+import pytest
+
+
+DEFAULT_DURATIONS = "tests/reports/junit.xml"
+# 没有任何历史耗时时使用的默认值
+UNKNOWN_DURATION = 1.0
+
+
+def junit_key(nodeid):
+    """(classname, name) pytest writes to junit.xml for a node id"""
+    path, bracket, params = nodeid.partition("[")
+    names = path.split("::")
+    names[0] = re.sub(r"\.py$", "", names[0].replace("/", "."))
+    names[-1] += bracket + params
+    return ".".join(names[:-1]), names[-1]
+
+
+def load_durations(patterns):
+    """Mean duration per (classname, name) over every junit file matching ``patterns``"""
+    totals = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            try:
+                for _, elem in iterparse(path, events=("end",)):
+                    if elem.tag == "testcase":
+                        key = (elem.get("classname") or "", elem.get("name") or "")
+                        entry = totals.setdefault(key, [0.0, 0])
+                        entry[0] += float(elem.get("time") or 0)
+                        entry[1] += 1
+                        elem.clear()
+            except (OSError, ParseError) as e:
+                print(f"Warning: Could not read durations from {path}: {e}")
+    return {key: total / count for key, (total, count) in totals.items()}
+
+
+def plan_shards(nodeids, durations, num_shards):
+    """Assign node ids to shards; returns ([nodeids per shard], [expected seconds per shard])
+
+    Tests without history are weighted with the median known duration.
+    """
+    known = [durations[junit_key(nodeid)] for nodeid in nodeids if junit_key(nodeid) in durations]
+    default = median(known) if known else UNKNOWN_DURATION
+    weighted = sorted(((durations.get(junit_key(nodeid), default), nodeid) for nodeid in nodeids),
+                      key=lambda item: (-item[0], item[1]))
+
+    shards = [[] for _ in range(num_shards)]
+    loads = [0.0] * num_shards
+    heap = [(0.0, index) for index in range(num_shards)]
+    for duration, nodeid in weighted:
+        load, index = heapq.heappop(heap)
+        shards[index].append(nodeid)
+        loads[index] = load + duration
+        heapq.heappush(heap, (loads[index], index))
+    return shards, loads
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("sharding")
+    group.addoption("--shards", type=int, default=1,
+                    help="split the collected tests into this many duration-balanced shards")
+    group.addoption("--shard-index", type=int, default=0,
+                    help="0-based index of the shard to run")
+    group.addoption("--shard-durations", action="append", default=None, metavar="GLOB",
+                    help=f"junit.xml files with previous durations (default: {DEFAULT_DURATIONS})")
+
+
+def pytest_configure(config):
+    shards = config.getoption("shards")
+    index = config.getoption("shard_index")
+    if shards < 1 or not 0 <= index < shards:
+        raise pytest.UsageError(f"--shard-index must be in [0, {shards}) and --shards at least 1")
+
+
+def pytest_collection_modifyitems(session, config, items):
+    num_shards = config.getoption("shards")
+    if num_shards == 1:
+        return
+    index = config.getoption("shard_index")
+    durations = load_durations(config.getoption("shard_durations") or [DEFAULT_DURATIONS])
+    shards, loads = plan_shards([item.nodeid for item in items], durations, num_shards)
+
+    selected = set(shards[index])
+    deselected = [item for item in items if item.nodeid not in selected]
+    items[:] = [item for item in items if item.nodeid in selected]
+    config.hook.pytest_deselected(items=deselected)
+    config._shard_summary = (index, num_shards, len(items), loads[index], max(loads))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    summary = getattr(config, "_shard_summary", None)
+    if summary:
+        index, num_shards, count, load, slowest = summary
+        terminalreporter.write_line(
+            f"shard {index + 1}/{num_shards}: {count} tests, expected {load:.1f}s "
+            f"(slowest shard {slowest:.1f}s)")
@@ -0,0 +1,247 @@
+"""
+Mergeable latency sketches
+A log-bucketed quantile sketch (DDSketch style): every value is counted in a
+bucket whose bounds grow geometrically, so any percentile is answered within
+a fixed relative error and two sketches merge by adding bucket counts.
+Runs carry them under ``run["sketches"]``; metrics link to them through the
+``sketch`` and ``statistic`` keys of their metrics_schema entry, e.g.
+``{"name": "p99_latency", "sketch": "latency", "statistic": "p99", ...}``.
+"""
+
+import base64
+import math
+from collections import Counter
+
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class LatencySketch:
+    """Quantile sketch with bounded relative error on non-negative values"""
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._inv_log_gamma = 1.0 / math.log(self.gamma)
+        self.bins = Counter()
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value):
+        return math.ceil(math.log(value) * self._inv_log_gamma)
+
+    def _value(self, index):
+        # 桶 (gamma^(i-1), gamma^i] 的代表值，相对误差不超过 relative_accuracy
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value, count=1):
+        if value < 0:
+            raise ValueError(f"Sketch values must be non-negative, got {value}")
+        if value == 0:
+            self.zeros += count
+        else:
+            self.bins[self._index(value)] += count
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """Add another sketch's counts into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.bins.update(other.bins)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Nearest-rank percentile for ``q`` in [0, 100], matching runs.percentile"""
+        if not self.count:
+            return 0.0
+        if q <= 0:
+            return self.min
+        if q >= 100:
+            return self.max
+        rank = max(1, math.ceil(q * self.count / 100))
+        seen = self.zeros
+        if seen >= rank:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen >= rank:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def statistic(self, name):
+        """Value of ``p<q>``, ``mean``, ``min``, ``max`` or ``count``"""
+        if name.startswith('p'):
+            return self.quantile(float(name[1:]))
+        if name == 'mean':
+            return self.mean
+        if name in ('min', 'max', 'count'):
+            value = getattr(self, name)
+            return value if self.count else 0.0
+        raise ValueError(f"Unknown sketch statistic '{name}'")
+
+    def to_dict(self):
+        """Compact JSON-serializable form; buckets are varint-packed"""
+        return {
+            "type": "ddsketch",
+            "alpha": self.relative_accuracy,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "zeros": self.zeros,
+            "bins": encode_bins(self.bins),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("type") != "ddsketch":
+            raise ValueError(f"Unsupported sketch type {data.get('type')!r}")
+        sketch = cls(data["alpha"])
+        sketch.bins = decode_bins(data["bins"])
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        if sketch.zeros + sum(sketch.bins.values()) != sketch.count:
+            raise ValueError("Sketch bucket counts do not add up to its count")
+        return sketch
+
+
+def _zigzag(n):
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def _unzigzag(n):
+    return n // 2 if n % 2 == 0 else -(n + 1) // 2
+
+
+def _write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def encode_bins(bins):
+    """Sorted (index delta, count) pairs as base64 varints"""
+    out = bytearray()
+    previous = 0
+    for index in sorted(bins):
+        _write_varint(out, _zigzag(index - previous))
+        _write_varint(out, bins[index])
+        previous = index
+    return base64.b64encode(bytes(out)).decode('ascii')
+
+
+def decode_bins(text):
+    data = base64.b64decode(text)
+    values = []
+    n = shift = 0
+    for byte in data:
+        n |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(n)
+            n = shift = 0
+    if shift or len(values) % 2:
+        raise ValueError("Truncated sketch buckets")
+    bins = Counter()
+    index = 0
+    for delta, count in zip(values[::2], values[1::2]):
+        index += _unzigzag(delta)
+        bins[index] = count
+    return bins
+
+
+def validate_sketches(data, source=""):
+    """Drop malformed run sketches from a loaded tool file, warning once per run"""
+    rollups = [rollup for period in (data.get("rollups") or {}).values() for rollup in period]
+    for run in data.get("runs", []) + rollups:
+        sketches = run.get("sketches") if isinstance(run, dict) else None
+        if sketches is None:
+            continue
+        if not isinstance(sketches, dict):
+            print(f"Warning: ignoring sketches of {source} {run.get('build_id', run.get('start'))}: expected an object")
+            del run["sketches"]
+            continue
+        for name in list(sketches):
+            try:
+                LatencySketch.from_dict(sketches[name])
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Warning: ignoring sketch '{name}' of {source} {run.get('build_id', run.get('start'))}: {e}")
+                del sketches[name]
+    return data
+
+
+def merge_sketch_maps(sketch_maps, name):
+    """Merge sketch ``name`` across ``{name: sketch dict}`` maps; None unless every map carries it"""
+    merged = None
+    for sketches in sketch_maps:
+        data = (sketches or {}).get(name)
+        if data is None:
+            return None
+        sketch = LatencySketch.from_dict(data)
+        merged = sketch if merged is None else merged.merge(sketch)
+    return merged
+
+
+def merge_run_sketches(runs, name):
+    """Merge sketch ``name`` across runs; None unless every run carries it"""
+    return merge_sketch_maps((run.get("sketches") for run in runs), name)
+
+
+def sketch_metrics(metrics_schema):
+    """(metric, sketch, statistic) of the schema entries recomputable from a sketch"""
+    return [(metric["name"], metric["sketch"], metric["statistic"])
+            for metric in metrics_schema if metric.get("sketch") and metric.get("statistic")]
+
+
+def aggregate_sketch_maps(sketch_maps, metrics):
+    """True percentiles over a group of sketch maps for (metric, sketch, statistic) triples"""
+    sketch_maps = list(sketch_maps)
+    merged = {}
+    values = {}
+    for metric, name, statistic in metrics:
+        if name not in merged:
+            merged[name] = merge_sketch_maps(sketch_maps, name)
+        if merged[name] is not None:
+            values[metric] = merged[name].statistic(statistic)
+    return values
+
+
+def aggregate_metrics(runs, metrics_schema):
+    """True percentiles over a group of runs for every sketch-backed metric"""
+    return aggregate_sketch_maps([run.get("sketches") for run in runs], sketch_metrics(metrics_schema))
+
+
+def aggregate_runs(runs, metrics_schema, key=lambda run: run["build_id"]):
+    """Group runs (e.g. shards or retries of one build) and aggregate each group"""
+    groups = {}
+    for run in runs:
+        groups.setdefault(key(run), []).append(run)
+    return {group: aggregate_metrics(members, metrics_schema) for group, members in groups.items()}
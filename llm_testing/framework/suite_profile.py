@@ -0,0 +1,220 @@
+"""
+Per-test resource profile of the pytest suite itself
+A pytest plugin that records wall time, process CPU time and RSS delta of
+every test and appends one run per session to a tool file in the LLM test
+data format, so the report can show the slowest tests and the tests that
+got slower than their recent history.
+
+Enable with ``-p llm_testing.framework.suite_profile --suite-profile=<file>``.
+Per test it only reads two clocks and the process RSS and appends a tuple;
+everything else happens once at the end of the session. Sharded CI runs give
+every shard its own profile file and ``merge_profiles`` folds them into one
+run per build.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from statistics import median
+
+import pytest
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块
+    resource = None
+
+try:
+    from .runs import append_run, build_run, default_build_id, percentile
+except ImportError:
+    from runs import append_run, build_run, default_build_id, percentile
+
+
+TOOL_NAME = "PytestSuite"
+TOOL_DESCRIPTION = "测试套件自身的耗时与内存"
+
+METRICS_SCHEMA = [
+    {"name": "tests", "display_name": "Tests", "unit": "count", "description": "Number of tests run",
+     "lower_is_better": False, "format": "{:.0f}", "default_chart_type": None},
+    {"name": "wall_time", "display_name": "Wall Time", "unit": "s", "description": "Sum of per-test wall time",
+     "lower_is_better": True, "format": "{:.2f}", "default_chart_type": "line"},
+    {"name": "cpu_time", "display_name": "CPU Time", "unit": "s", "description": "Sum of per-test process CPU time",
+     "lower_is_better": True, "format": "{:.2f}", "default_chart_type": "line"},
+    {"name": "p95_test_time", "display_name": "P95 Test Time", "unit": "s",
+     "description": "95th percentile of per-test wall time",
+     "lower_is_better": True, "format": "{:.3f}", "default_chart_type": None},
+    {"name": "max_rss_delta", "display_name": "Max RSS Delta", "unit": "MB",
+     "description": "Largest RSS growth of a single test",
+     "lower_is_better": True, "format": "{:.1f}", "default_chart_type": None},
+]
+
+SLOWEST_LIMIT = 10
+# 与最近几次运行的中位数比较；过短的用例计时噪声太大，不参与回归判断
+REGRESSION_WINDOW = 5
+REGRESSION_MIN_SECONDS = 0.05
+REGRESSION_MIN_RATIO = 1.2
+
+_PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+
+
+def _statm_rss_kb():
+    with open("/proc/self/statm", "rb") as f:
+        return int(f.read().split()[1]) * _PAGE_KB
+
+
+def _maxrss_kb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+def _no_rss():
+    return 0
+
+
+def rss_reader():
+    """Cheapest available current-RSS reader in KB
+
+    Falls back to the peak RSS (whose delta is the growth of the high-water
+    mark) where /proc is unavailable, and to zero without ``resource``.
+    """
+    try:
+        _statm_rss_kb()
+        return _statm_rss_kb
+    except (OSError, ValueError, IndexError):
+        pass
+    return _maxrss_kb if resource else _no_rss
+
+
+class SuiteProfiler:
+    """Collects (nodeid, wall, cpu, rss delta) for each test of a session"""
+
+    def __init__(self, output_file, build_id=None):
+        self.output_file = output_file
+        self.build_id = build_id or default_build_id()
+        self.read_rss = rss_reader()
+        self.records = []
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        rss = self.read_rss()
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        yield
+        self.records.append((item.nodeid, time.perf_counter() - wall,
+                             time.process_time() - cpu, self.read_rss() - rss))
+
+    def pytest_sessionfinish(self, session):
+        if not self.records:
+            return
+        run = build_profile_run(self.records, self.build_id)
+        append_run(self.output_file, run, TOOL_NAME, TOOL_DESCRIPTION, METRICS_SCHEMA)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.records:
+            terminalreporter.write_line(
+                f"suite profile: {len(self.records)} tests appended to {self.output_file}")
+
+
+def build_profile_run(records, build_id):
+    """Run entry with suite metrics and the per-test [wall, cpu, rss KB] table"""
+    walls = sorted(wall for _, wall, _, _ in records)
+    metrics = {
+        "tests": len(records),
+        "wall_time": sum(walls),
+        "cpu_time": sum(cpu for _, _, cpu, _ in records),
+        "p95_test_time": percentile(walls, 95),
+        "max_rss_delta": max(rss for _, _, _, rss in records) / 1024,
+    }
+    env = {
+        "description": f"Python {platform.python_version()} / {platform.system()}",
+        "python": platform.python_version(),
+        "host": platform.node(),
+    }
+    tests = {nodeid: [round(wall, 4), round(cpu, 4), rss] for nodeid, wall, cpu, rss in records}
+    return build_run(build_id, metrics, env, tests=tests)
+
+
+def merge_profiles(profile_files, output_file, build_id=None):
+    """Fold the latest run of every shard profile into one run appended to ``output_file``
+
+    A run already recorded under the same build id is replaced, so merging a
+    build twice does not count it twice. Returns the merged run, or None when
+    no shard recorded any test.
+    """
+    records = []
+    for profile_file in profile_files:
+        with open(profile_file, 'r', encoding='utf-8') as f:
+            runs = json.load(f).get("runs") or []
+        if runs:
+            records.extend((nodeid, wall, cpu, rss) for nodeid, (wall, cpu, rss) in (runs[-1].get("tests") or {}).items())
+    if not records:
+        return None
+
+    run = build_profile_run(records, build_id or default_build_id())
+    output_path = Path(output_file)
+    if output_path.exists():
+        with open(output_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        kept = [entry for entry in data.get("runs", []) if entry.get("build_id") != run["build_id"]]
+        if len(kept) != len(data.get("runs", [])):
+            data["runs"] = kept
+            tmp_path = output_path.with_suffix(output_path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, output_path)
+    append_run(output_path, run, TOOL_NAME, TOOL_DESCRIPTION, METRICS_SCHEMA)
+    return run
+
+
+def slowest_tests(history, limit=SLOWEST_LIMIT):
+    """Slowest tests of the latest run: [(nodeid, wall, cpu, rss KB)]
+
+    ``history`` holds the ``tests`` profile of every run, oldest first.
+    """
+    tests = (history[-1] or {}) if history else {}
+    ranked = sorted(tests.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+    return [(nodeid, wall, cpu, rss) for nodeid, (wall, cpu, rss) in ranked]
+
+
+def slowest_regressions(history, limit=SLOWEST_LIMIT, window=REGRESSION_WINDOW):
+    """Tests of the latest run slower than their median over the previous ``window`` runs
+
+    ``history`` holds the ``tests`` profile of every run, oldest first.
+    Returns [(nodeid, baseline, latest, ratio)] ordered by the added seconds.
+    """
+    if len(history) < 2:
+        return []
+    previous_runs = [tests or {} for tests in history[-window - 1:-1]]
+    regressions = []
+    for nodeid, (wall, _, _) in (history[-1] or {}).items():
+        if wall < REGRESSION_MIN_SECONDS:
+            continue
+        previous = [tests[nodeid][0] for tests in previous_runs if nodeid in tests]
+        if not previous:
+            continue
+        baseline = median(previous)
+        if wall >= baseline * REGRESSION_MIN_RATIO:
+            regressions.append((nodeid, baseline, wall, wall / baseline if baseline else float("inf")))
+    regressions.sort(key=lambda row: row[2] - row[1], reverse=True)
+    return regressions[:limit]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("suite-profile")
+    group.addoption("--suite-profile", action="store", default=None, metavar="PATH",
+                    help="append per-test wall/CPU time and RSS delta to this LLM test data file")
+    group.addoption("--suite-profile-build-id", action="store", default=None,
+                    help="build id of the recorded run (default: BUILD_NUMBER or local time)")
+
+
+def pytest_configure(config):
+    output_file = config.getoption("suite_profile")
+    # pytest-xdist 的 worker 各自只看到部分用例，分布式运行时不记录
+    if output_file and not hasattr(config, "workerinput"):
+        config.pluginmanager.register(
+            SuiteProfiler(output_file, config.getoption("suite_profile_build_id")), "suite-profiler")
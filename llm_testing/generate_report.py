@@ -4,13 +4,15 @@ LLM测试报告生成器
 完全独立于pytest，仅通过JSON文件生成报告
 """
 
+import argparse
 import sys
 import os
 import json
+import tempfile
 from pathlib import Path
 
 
-def generate_standalone_report():
+def generate_standalone_report(profile=False):
     """生成独立的LLM测试报告"""
     print("正在生成独立LLM测试报告...")
     
@@ -23,6 +25,7 @@ def generate_standalone_report():
         
         # 导入报告生成器
         from llm_testing.framework.generator_html import LLMReportGenerator
+        from llm_testing.framework.profiling import ReportProfiler, profiling_enabled
         
         # 确保reports目录存在
         reports_dir = os.path.join(current_dir, 'reports')
@@ -30,9 +33,26 @@ def generate_standalone_report():
             os.makedirs(reports_dir)
             print(f"创建报告目录: {reports_dir}")
 
-        # 生成报告
-        generator = LLMReportGenerator("../llm_testing/data")
+        # 生成报告（开启性能分析时记录各阶段耗时）
+        profiler = ReportProfiler() if profile or profiling_enabled() else None
+        if profiler:
+            profiler.start()
+        generator = LLMReportGenerator("../llm_testing/data", profiler=profiler)
         output_file = generator.generate_html_report("reports/llm_eval_report.html")
+        # 保存计算好的报告模型，pytest-html 插件与 PDF 导出直接加载
+        model_file = generator.save_model()
+        print(f"报告模型已保存: {model_file}")
+        if profiler:
+            profiler.stop()
+            # cProfile 与内存各自单独再生成一遍报告测量，其开销不计入上面的阶段耗时
+            with tempfile.TemporaryDirectory(prefix="llm_report_profile_") as pass_dir:
+                def regenerate():
+                    LLMReportGenerator("../llm_testing/data").generate_html_report(
+                        os.path.join(pass_dir, "llm_eval_report.html"))
+                profiler.measure_functions(regenerate)
+                profiler.measure_memory(regenerate)
+            timings_file = profiler.write(output_file)
+            print(f"性能分析结果已写入: {timings_file}")
 
         print(f"独立报告已生成: {output_file}")
         print(f"请用浏览器打开查看: {output_file}")
@@ -45,6 +65,39 @@ def generate_standalone_report():
         return False
 
 
+def generate_diff_report(base, head, resamples=None):
+    """生成两个构建（或两组构建）之间的对比报告"""
+    print(f"正在生成构建对比报告: {base} → {head} ...")
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(current_dir))
+    from llm_testing.framework.bootstrap import DEFAULT_RESAMPLES
+    from llm_testing.framework.generator_html import LLMReportGenerator
+
+    generator = LLMReportGenerator(os.path.join(current_dir, 'data'))
+    output_file = generator.generate_diff_report(
+        base.split(','), head.split(','), os.path.join(current_dir, 'reports', 'llm_diff_report.html'),
+        resamples or DEFAULT_RESAMPLES)
+    print(f"对比报告已生成: {output_file}")
+    return True
+
+
+def serve_live_report(host, port, poll):
+    """实时报告：监听数据目录，变更的工具卡片通过 SSE 推送到浏览器"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(current_dir))
+    from llm_testing.framework.live_server import start_live_server
+
+    server = start_live_server(os.path.join(current_dir, 'data'), host, port, use_inotify=not poll)
+    try:
+        server.stopped.wait()
+    except KeyboardInterrupt:
+        print("\n实时报告已停止")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return True
+
+
 def validate_data_files():
     """验证数据文件是否存在"""
     print("正在验证数据文件...")
@@ -85,6 +138,24 @@ def show_report_info():
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="LLM测试报告生成器")
+    parser.add_argument("--profile", action="store_true",
+                        help="记录各阶段耗时、cProfile 与 tracemalloc 数据（也可设置 LLM_REPORT_PROFILE=1）")
+    parser.add_argument("--diff", nargs=2, metavar=("BASE", "HEAD"),
+                        help="对比两个构建，多个 build_id 用逗号分隔（如 build-10,build-11 build-12）")
+    parser.add_argument("--resamples", type=int, help="bootstrap 重采样次数")
+    parser.add_argument("--serve", action="store_true", help="启动实时报告服务，数据文件变化时自动更新页面")
+    parser.add_argument("--host", default="127.0.0.1", help="实时报告监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="实时报告端口")
+    parser.add_argument("--poll", action="store_true", help="不使用 inotify，改为定时检查文件")
+    args = parser.parse_args()
+
+    if args.serve:
+        return 0 if serve_live_report(args.host, args.port, args.poll) else 1
+
+    if args.diff:
+        return 0 if generate_diff_report(*args.diff, resamples=args.resamples) else 1
+
     print("=" * 60)
     print("LLM测试报告生成器 (独立版本)")
     print("=" * 60)
@@ -95,7 +166,7 @@ def main():
         return 1
     
     # 生成报告
-    success = generate_standalone_report()
+    success = generate_standalone_report(profile=args.profile)
     
     # 显示报告信息
     show_report_info()
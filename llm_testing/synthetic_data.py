@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+合成LLM测试历史数据生成器
+按 工具数 × 指标数 × 运行次数 生成符合标准数据格式的JSON文件，用于规模测试
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+
+MODELS = ["Llama-3-8B", "Llama-3-70B", "Qwen2-7B", "Qwen2-72B", "Mistral-7B", "DeepSeek-V2-Lite"]
+BACKENDS = ["vLLM", "vLLM-UC", "TensorRT-LLM", "SGLang", "PyTorch"]
+BATCH_SIZES = [1, 4, 8, 16, 32]
+MAX_TOKENS = [256, 512, 1024, 2048]
+
+# (名称前缀, 单位, 格式, 越低越好, 图表类型, 基准值)
+METRIC_TEMPLATES = [
+    ("ttft", "ms", "{:.2f}", True, "bar", 120.0),
+    ("tpot", "ms", "{:.2f}", True, "bar", 25.0),
+    ("latency_p99", "s", "{:.2f}", True, None, 2.5),
+    ("throughput", "tokens/s", "{:.2f}", False, "line", 900.0),
+    ("accuracy", "%", "{:.2f}", False, "line", 75.0),
+    ("f1_score", "", "{:.3f}", False, "line", 0.78),
+]
+
+START_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def generate_metrics_schema(n_metrics):
+    """Build a metrics_schema with ``n_metrics`` entries cycling through the templates"""
+    schema = []
+    for i in range(n_metrics):
+        prefix, unit, fmt, lower_is_better, chart_type, _ = METRIC_TEMPLATES[i % len(METRIC_TEMPLATES)]
+        suffix = f"_{i // len(METRIC_TEMPLATES)}" if i >= len(METRIC_TEMPLATES) else ""
+        schema.append({
+            "name": f"{prefix}{suffix}",
+            "display_name": f"{prefix.replace('_', ' ').title()}{suffix}",
+            "unit": unit,
+            "description": f"Synthetic {prefix} metric",
+            "lower_is_better": lower_is_better,
+            "format": fmt,
+            "default_chart_type": chart_type,
+        })
+    return schema
+
+
+def generate_runs(schema, n_runs, rng, tool_index=0):
+    """Generate ``n_runs`` runs with drifting metric values and varied environments"""
+    bases = [METRIC_TEMPLATES[i % len(METRIC_TEMPLATES)][5] for i in range(len(schema))]
+    levels = list(bases)
+    timestamp = START_TIME
+    runs = []
+    for i in range(n_runs):
+        model = rng.choice(MODELS)
+        backend = rng.choice(BACKENDS)
+        timestamp += timedelta(minutes=rng.randint(1, 90))
+
+        metrics = {}
+        for j, metric in enumerate(schema):
+            # 随机游走 + 噪声，模拟版本间的性能波动
+            levels[j] = max(bases[j] * 0.2, levels[j] * (1 + rng.gauss(0, 0.01)))
+            metrics[metric["name"]] = round(levels[j] * (1 + rng.gauss(0, 0.03)), 4)
+
+        runs.append({
+            "build_id": f"build-{tool_index}-{i + 1}",
+            "timestamp": timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "env": {
+                "model": model,
+                "backend": backend,
+                "batch_size": rng.choice(BATCH_SIZES),
+                "max_tokens": rng.choice(MAX_TOKENS),
+                "description": f"{backend} / {model}",
+            },
+            "metrics": metrics,
+        })
+    return runs
+
+
+def generate_tool_data(tool_index, n_metrics, n_runs, seed=0):
+    """Generate the complete data document for one synthetic tool"""
+    rng = random.Random(seed * 1000 + tool_index)
+    schema = generate_metrics_schema(n_metrics)
+    return {
+        "tool": f"SyntheticTool{tool_index + 1}",
+        "description": f"Synthetic benchmark history #{tool_index + 1}",
+        "metrics_schema": schema,
+        "runs": generate_runs(schema, n_runs, rng, tool_index),
+    }
+
+
+def generate_history(output_dir, n_tools=3, n_metrics=5, total_runs=1000, seed=0):
+    """Write ``n_tools`` data files sharing ``total_runs`` runs between them"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+    for tool_index in range(n_tools):
+        n_runs = total_runs // n_tools + (1 if tool_index < total_runs % n_tools else 0)
+        data = generate_tool_data(tool_index, n_metrics, n_runs, seed)
+        path = output_dir / f"synthetic_{tool_index + 1}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成的LLM测试历史数据')
+    parser.add_argument('output_dir', help='输出目录')
+    parser.add_argument('--tools', type=int, default=3, help='工具数量')
+    parser.add_argument('--metrics', type=int, default=5, help='每个工具的指标数量')
+    parser.add_argument('--runs', type=int, default=1000, help='所有工具的运行总数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    files = generate_history(args.output_dir, args.tools, args.metrics, args.runs, args.seed)
+    print(f"已生成 {len(files)} 个数据文件 ({args.runs} 次运行) 到 {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""
+Prometheus metrics for the Hello World service
+Request counts and latency histograms recorded from Flask request hooks
+into per-thread shards, merged only when /metrics is scraped
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+import weakref
+
+from flask import Response, g, request
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 上不压缩已退出进程的快照文件，只是继续累加
+    fcntl = None
+
+
+# 固定的延迟分桶（秒），与 Prometheus 客户端默认值一致
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REQUESTS_TOTAL = 'http_requests_total'
+REQUEST_DURATION = 'http_request_duration_seconds'
+REQUEST_LABELS = ('method', 'route', 'status')
+
+# 已退出进程的快照合并进这个文件；文件名不匹配 metrics_<pid>.json，不会被当作 worker
+ARCHIVE_FILE = 'metrics_archive.json'
+COMPACT_LOCK = '.compact.lock'
+COMPACTING_SUFFIX = '.compacting'
+
+
+class RequestMetrics:
+    """Lock-free request recorder with optional multi-process aggregation
+
+    Each thread writes into its own dict, so the hot path never takes a lock.
+    Shards of threads that have exited (the threaded server uses one thread
+    per connection) are folded into a base shard, so the number of shards
+    tracks the live threads. When ``multiproc_dir`` is set, every process
+    dumps its totals to ``<multiproc_dir>/metrics_<pid>.json`` from a
+    background timer and at exit, and a scrape served by any worker sums the
+    files of all workers; files of processes that have exited are compacted
+    into one archive file.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, multiproc_dir=None, flush_interval=1.0):
+        self.buckets = tuple(buckets)
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self.counters = {}
+        self.gauges = {}
+        self._reset_shards()
+
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            atexit.register(self.flush)
+            if hasattr(os, 'register_at_fork'):
+                # fork 出的 worker 不继承父进程的计数与定时线程
+                os.register_at_fork(after_in_child=self._reset_shards)
+
+    def _reset_shards(self):
+        # fork 时父进程的其它线程可能正持有锁，子进程中一并重建
+        self._shards_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        # [(线程弱引用, 分片)]；线程退出后分片并入 _base
+        self._shards = []
+        self._base = {}
+        self._compact_at = 16
+        self._flusher = None
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # 只在线程第一次记录时加锁注册分片
+            with self._shards_lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+                if len(self._shards) >= self._compact_at:
+                    self._fold_dead_shards()
+                    self._compact_at = max(16, 2 * len(self._shards))
+            if self.multiproc_dir and self._flusher is None:
+                self._start_flusher()
+        return shard
+
+    def _fold_dead_shards(self):
+        # 调用方持有 _shards_lock；已退出的线程不会再写入自己的分片
+        live = []
+        for thread_ref, shard in self._shards:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                live.append((thread_ref, shard))
+            else:
+                for key, entry in shard.items():
+                    merge_entry(self._base, key, entry)
+        self._shards = live
+
+    def _start_flusher(self):
+        with self._flush_lock:
+            if self._flusher is not None:
+                return
+            stop = threading.Event()
+            self._flusher = threading.Thread(target=self._flush_loop, args=(stop,),
+                                             name='metrics-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self, stop):
+        while not stop.wait(self.flush_interval):
+            self.flush()
+
+    def declare_counter(self, name, help_text, label_names=()):
+        """Declare an extra counter that is rendered alongside the request metrics"""
+        self.counters[name] = (help_text, tuple(label_names))
+
+    def declare_gauge(self, name, help_text, read_value):
+        """Declare a per-process gauge whose value is read when /metrics is scraped"""
+        self.gauges[name] = (help_text, read_value)
+
+    def inc(self, name, labels=(), amount=1):
+        """Increment a declared counter"""
+        shard = self._shard()
+        key = (name, tuple(labels))
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [0]
+        entry[0] += amount
+
+    def observe(self, method, route, status, seconds):
+        """Record one finished request"""
+        shard = self._shard()
+        key = (REQUEST_DURATION, (method, route, str(status)))
+        entry = shard.get(key)
+        if entry is None:
+            # [count, sum, bucket_0, ..., bucket_n, +Inf]
+            entry = shard[key] = [0, 0.0] + [0] * (len(self.buckets) + 1)
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2 + bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def snapshot(self):
+        """Merge all thread shards of this process into one dict"""
+        with self._shards_lock:
+            self._fold_dead_shards()
+            shards = [shard for _, shard in self._shards]
+            merged = {key: list(entry) for key, entry in self._base.items()}
+        for shard in shards:
+            for key, entry in list(shard.items()):
+                merge_entry(merged, key, entry)
+        return merged
+
+    def shard_count(self):
+        with self._shards_lock:
+            return len(self._shards)
+
+    def flush(self):
+        """Write this process' totals to the multi-process directory"""
+        if not self.multiproc_dir or not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            path = os.path.join(self.multiproc_dir, f'metrics_{os.getpid()}.json')
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([[name, list(labels), entry] for (name, labels), entry in self.snapshot().items()], f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not flush metrics to {self.multiproc_dir}: {e}")
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """Totals across all processes (or just this one)"""
+        merged = self.snapshot()
+        if not self.multiproc_dir:
+            return merged
+
+        self.compact()
+        own_file = f'metrics_{os.getpid()}.json'
+        with open(os.path.join(self.multiproc_dir, COMPACT_LOCK), 'a') as lock_file:
+            # 共享锁：压缩过程中文件暂时移出，读取须等压缩完成，避免计数回退
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_SH)
+            for filename in os.listdir(self.multiproc_dir):
+                if not filename.endswith('.json') or filename == own_file:
+                    continue
+                entries = read_entries(os.path.join(self.multiproc_dir, filename))
+                if filename == ARCHIVE_FILE:
+                    entries = entries.get('entries', []) if isinstance(entries, dict) else []
+                for name, labels, entry in entries or ():
+                    merge_entry(merged, (name, tuple(labels)), entry)
+        return merged
+
+    def compact(self):
+        """Fold the snapshot files of exited processes into the archive file
+
+        A dead worker's file is first renamed aside, then merged into the
+        archive, which records the names it has merged; a compaction that
+        stopped halfway is finished by the next one without counting a file
+        twice. Returns the number of files folded.
+        """
+        if not self.multiproc_dir or fcntl is None:
+            return 0
+        dead = [filename for filename in os.listdir(self.multiproc_dir) if is_dead_worker_file(filename)]
+        pending = [filename for filename in os.listdir(self.multiproc_dir) if filename.endswith(COMPACTING_SUFFIX)]
+        if not dead and not pending:
+            return 0
+
+        with open(os.path.join(self.multiproc_dir, COMPACT_LOCK), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # 其它 worker 正在压缩
+                return 0
+            for filename in dead:
+                path = os.path.join(self.multiproc_dir, filename)
+                try:
+                    aside = f'{path}.{os.stat(path).st_mtime_ns}{COMPACTING_SUFFIX}'
+                    os.rename(path, aside)
+                except OSError:
+                    continue
+            pending = sorted(filename for filename in os.listdir(self.multiproc_dir)
+                             if filename.endswith(COMPACTING_SUFFIX))
+            if not pending:
+                return 0
+
+            archive_path = os.path.join(self.multiproc_dir, ARCHIVE_FILE)
+            archive = read_entries(archive_path)
+            if not isinstance(archive, dict):
+                archive = {}
+            done = set(archive.get('merged', ()))
+            totals = {(name, tuple(labels)): entry for name, labels, entry in archive.get('entries', [])}
+            for filename in pending:
+                if filename not in done:
+                    for name, labels, entry in read_entries(os.path.join(self.multiproc_dir, filename)) or ():
+                        merge_entry(totals, (name, tuple(labels)), entry)
+            # 只需记住尚未删除的文件名
+            archive = {
+                'merged': pending,
+                'entries': [[name, list(labels), entry] for (name, labels), entry in totals.items()],
+            }
+            tmp_path = f'{archive_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(archive, f)
+            os.replace(tmp_path, archive_path)
+            for filename in pending:
+                try:
+                    os.unlink(os.path.join(self.multiproc_dir, filename))
+                except OSError:
+                    pass
+            return len(pending)
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        merged = self.collect()
+        histograms = sorted((labels, entry) for (name, labels), entry in merged.items()
+                            if name == REQUEST_DURATION)
+
+        lines = [
+            f'# HELP {REQUESTS_TOTAL} Total HTTP requests by method, route and status',
+            f'# TYPE {REQUESTS_TOTAL} counter',
+        ]
+        for labels, entry in histograms:
+            lines.append(f'{REQUESTS_TOTAL}{format_labels(REQUEST_LABELS, labels)} {entry[0]}')
+
+        lines.append(f'# HELP {REQUEST_DURATION} HTTP request latency by method, route and status')
+        lines.append(f'# TYPE {REQUEST_DURATION} histogram')
+        for labels, entry in histograms:
+            cumulative = 0
+            bounds = [str(b) for b in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, entry[2:]):
+                cumulative += count
+                bucket_labels = format_labels(REQUEST_LABELS + ('le',), labels + (bound,))
+                lines.append(f'{REQUEST_DURATION}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{REQUEST_DURATION}_sum{format_labels(REQUEST_LABELS, labels)} {entry[1]}')
+            lines.append(f'{REQUEST_DURATION}_count{format_labels(REQUEST_LABELS, labels)} {entry[0]}')
+
+        for name, (help_text, label_names) in self.counters.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            values = sorted((labels, entry[0]) for (n, labels), entry in merged.items() if n == name)
+            if not values and not label_names:
+                values = [((), 0)]
+            for labels, value in values:
+                lines.append(f'{name}{format_labels(label_names, labels)} {value}')
+
+        for name, (help_text, read_value) in self.gauges.items():
+            value = read_value()
+            if value is None:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def read_entries(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_dead_worker_file(filename):
+    """True for metrics_<pid>.json of a process that no longer exists"""
+    if not (filename.startswith('metrics_') and filename.endswith('.json')):
+        return False
+    pid = filename[len('metrics_'):-len('.json')]
+    if not pid.isdigit() or int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        # 进程存在但属于其它用户
+        return False
+    return False
+
+
+def merge_entry(merged, key, entry):
+    """Add an entry element-wise into the merged dict"""
+    current = merged.get(key)
+    if current is None:
+        merged[key] = list(entry)
+    else:
+        for i, value in enumerate(entry):
+            current[i] += value
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def init_app(app, metrics=None, endpoint='/metrics'):
+    """Install request timing hooks and the /metrics endpoint on a Flask app"""
+    if metrics is None:
+        metrics = RequestMetrics(multiproc_dir=os.environ.get('METRICS_MULTIPROC_DIR') or None)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            # 未匹配的路径统一归为 "unmatched"，避免标签基数膨胀
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            metrics.observe(request.method, route, response.status_code, time.perf_counter() - start)
+        return response
+
+    @app.route(endpoint, methods=['GET'])
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+    app.extensions['request_metrics'] = metrics
+    return metrics
@@ -0,0 +1,298 @@
+"""
+Mock LLM inference server
+An OpenAI-compatible stand-in that streams tokens over SSE with configurable
+time-to-first-token and inter-token latency distributions, bounded
+concurrency with queueing, and error injection. Runs on a single event loop
+so thousands of concurrent streams cost little more than their timers.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import uuid
+
+from asgi_server import serve
+
+
+WORDS = ["The", " quick", " brown", " fox", " jumps", " over", " the", " lazy", " dog", ".",
+         " Large", " language", " models", " stream", " tokens", " one", " at", " a", " time", ","]
+
+
+class LatencyDistribution:
+    """Samples latencies (seconds) around a mean, e.g. ``lognormal:0.2:0.5``"""
+
+    KINDS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, kind="constant", mean=0.0, spread=0.0):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown distribution '{kind}', expected one of {self.KINDS}")
+        self.kind = kind
+        self.mean = mean
+        self.spread = spread
+
+    @classmethod
+    def parse(cls, spec):
+        """Parse ``kind:mean[:spread]`` with times in seconds"""
+        parts = spec.split(":")
+        kind = parts[0]
+        mean = float(parts[1]) if len(parts) > 1 else 0.0
+        spread = float(parts[2]) if len(parts) > 2 else 0.0
+        return cls(kind, mean, spread)
+
+    def sample(self, rng):
+        if self.mean <= 0:
+            return 0.0
+        if self.kind == "constant":
+            return self.mean
+        if self.kind == "uniform":
+            return max(0.0, rng.uniform(self.mean - self.spread, self.mean + self.spread))
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(self.mean, self.spread))
+        if self.kind == "lognormal":
+            # spread 为对数标准差，保持分布均值为 mean
+            sigma = self.spread
+            return rng.lognormvariate(math.log(self.mean) - sigma * sigma / 2, sigma)
+        return rng.expovariate(1.0 / self.mean)
+
+    def __repr__(self):
+        return f"{self.kind}:{self.mean}:{self.spread}"
+
+
+class MockLLMConfig:
+    """Behaviour of the mock server"""
+
+    def __init__(self, ttft=None, itl=None, max_concurrency=0, max_queue=0,
+                 error_rate=0.0, stream_error_rate=0.0, default_max_tokens=16,
+                 model="mock-llm", seed=None):
+        self.ttft = ttft or LatencyDistribution("constant", 0.05)
+        self.itl = itl or LatencyDistribution("constant", 0.01)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.error_rate = error_rate
+        self.stream_error_rate = stream_error_rate
+        self.default_max_tokens = default_max_tokens
+        self.model = model
+        self.seed = seed
+
+
+class InjectedStreamError(Exception):
+    """Raised to drop a connection in the middle of a stream"""
+
+
+class MockLLMServer:
+    """ASGI application implementing the OpenAI completion endpoints"""
+
+    def __init__(self, config=None):
+        self.config = config or MockLLMConfig()
+        self.rng = random.Random(self.config.seed)
+        self.active = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self._slots = None
+
+    @property
+    def slots(self):
+        # 在事件循环内延迟创建信号量
+        if self._slots is None and self.config.max_concurrency > 0:
+            self._slots = asyncio.Semaphore(self.config.max_concurrency)
+        return self._slots
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        path, method = scope['path'], scope['method']
+        if path == '/health' and method == 'GET':
+            await send_json(send, 200, {"status": "healthy", "active": self.active,
+                                        "waiting": self.waiting, "served": self.served})
+        elif path == '/v1/models' and method == 'GET':
+            await send_json(send, 200, {"object": "list",
+                                        "data": [{"id": self.config.model, "object": "model"}]})
+        elif path in ('/v1/completions', '/v1/chat/completions') and method == 'POST':
+            body = await read_body(receive)
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError:
+                await send_json(send, 400, {"error": {"message": "Invalid JSON body"}})
+                return
+            if not isinstance(payload, dict):
+                await send_json(send, 400, {"error": {"message": "Expected a JSON object body"}})
+                return
+            await self.handle_completion(send, payload, chat=path.endswith('/chat/completions'))
+        else:
+            await send_json(send, 404, {"error": {"message": f"Unknown route {method} {path}"}})
+
+    async def handle_completion(self, send, payload, chat):
+        config = self.config
+        max_tokens = payload.get('max_tokens')
+        if max_tokens is None:
+            max_tokens = config.default_max_tokens
+        # 先校验参数再排队占槽位，非法请求不占用并发额度
+        if isinstance(max_tokens, bool) or not isinstance(max_tokens, int) or max_tokens < 1:
+            await send_json(send, 400, {"error": {"message": "max_tokens must be a positive integer"}})
+            return
+        if config.max_queue and self.slots is not None and self.slots.locked() \
+                and self.waiting >= config.max_queue:
+            self.rejected += 1
+            await send_json(send, 503, {"error": {"message": "Server overloaded"}},
+                            extra_headers=[(b'retry-after', b'1')])
+            return
+        if self.rng.random() < config.error_rate:
+            await send_json(send, 500, {"error": {"message": "Injected error"}})
+            return
+
+        self.waiting += 1
+        slots = self.slots
+        if slots is not None:
+            await slots.acquire()
+        self.waiting -= 1
+        self.active += 1
+        try:
+            # 获得槽位后才开始"预填充"，排队时间自然计入客户端观测到的首 token 时间
+            ttft = config.ttft.sample(self.rng)
+            if payload.get('stream'):
+                await self.stream_tokens(send, payload, chat, max_tokens, ttft)
+            else:
+                await asyncio.sleep(ttft + sum(config.itl.sample(self.rng) for _ in range(max_tokens - 1)))
+                text = ''.join(itertools.islice(itertools.cycle(WORDS), max_tokens))
+                await send_json(send, 200, completion_body(payload, chat, text, max_tokens, config.model))
+            self.served += 1
+        finally:
+            self.active -= 1
+            if slots is not None:
+                slots.release()
+
+    async def stream_tokens(self, send, payload, chat, max_tokens, ttft):
+        config = self.config
+        completion_id = f"cmpl-{uuid.uuid4().hex[:24]}"
+        model = payload.get('model') or config.model
+        fail_at = self.rng.randrange(max_tokens) if self.rng.random() < config.stream_error_rate else None
+
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache')]})
+        await asyncio.sleep(ttft)
+        words = itertools.cycle(WORDS)
+        for index in range(max_tokens):
+            if index:
+                await asyncio.sleep(config.itl.sample(self.rng))
+            if index == fail_at:
+                raise InjectedStreamError("Injected mid-stream failure")
+            chunk = stream_chunk(completion_id, model, chat, next(words))
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        usage = {"prompt_tokens": prompt_tokens(payload), "completion_tokens": max_tokens,
+                 "total_tokens": prompt_tokens(payload) + max_tokens}
+        final = {"id": completion_id, "object": "chat.completion.chunk" if chat else "text_completion",
+                 "model": model, "choices": [], "usage": usage}
+        await send({'type': 'http.response.body',
+                    'body': b'data: ' + json.dumps(final).encode('utf-8') + b'\n\ndata: [DONE]\n\n',
+                    'more_body': False})
+
+
+def stream_chunk(completion_id, model, chat, text):
+    if chat:
+        choice = {"index": 0, "delta": {"content": text}, "finish_reason": None}
+        event = {"id": completion_id, "object": "chat.completion.chunk", "model": model, "choices": [choice]}
+    else:
+        choice = {"index": 0, "text": text, "finish_reason": None}
+        event = {"id": completion_id, "object": "text_completion", "model": model, "choices": [choice]}
+    return b'data: ' + json.dumps(event).encode('utf-8') + b'\n\n'
+
+
+def completion_body(payload, chat, text, max_tokens, default_model):
+    usage = {"prompt_tokens": prompt_tokens(payload), "completion_tokens": max_tokens,
+             "total_tokens": prompt_tokens(payload) + max_tokens}
+    if chat:
+        choice = {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "length"}
+    else:
+        choice = {"index": 0, "text": text, "finish_reason": "length"}
+    return {"id": f"cmpl-{uuid.uuid4().hex[:24]}", "object": "chat.completion" if chat else "text_completion",
+            "model": payload.get('model') or default_model, "choices": [choice], "usage": usage}
+
+
+def prompt_tokens(payload):
+    if 'messages' in payload:
+        text = ' '.join(str(m.get('content', '')) for m in payload['messages'])
+    else:
+        text = str(payload.get('prompt', ''))
+    return len(text.split())
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def send_json(send, status, body, extra_headers=()):
+    data = json.dumps(body).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(data)).encode('latin-1')), *extra_headers]})
+    await send({'type': 'http.response.body', 'body': data})
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Mock OpenAI-compatible streaming LLM server')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)))
+    parser.add_argument('--model', default='mock-llm')
+    parser.add_argument('--ttft', default='lognormal:0.2:0.3',
+                        help='TTFT distribution kind:mean[:spread] in seconds (constant/uniform/normal/lognormal/exponential)')
+    parser.add_argument('--itl', default=None,
+                        help='Inter-token latency distribution kind:mean[:spread] in seconds')
+    parser.add_argument('--token-rate', type=float, default=50.0,
+                        help='Tokens per second per stream when --itl is not given')
+    parser.add_argument('--max-concurrency', type=int, default=0, help='Streams generated at once; 0 = unlimited')
+    parser.add_argument('--max-queue', type=int, default=0, help='Waiting requests before 503; 0 = unbounded')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of an immediate HTTP 500')
+    parser.add_argument('--stream-error-rate', type=float, default=0.0,
+                        help='Probability of dropping the connection mid-stream')
+    parser.add_argument('--default-max-tokens', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    itl = LatencyDistribution.parse(args.itl) if args.itl else \
+        LatencyDistribution("exponential", 1.0 / args.token_rate)
+    config = MockLLMConfig(
+        ttft=LatencyDistribution.parse(args.ttft),
+        itl=itl,
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        error_rate=args.error_rate,
+        stream_error_rate=args.stream_error_rate,
+        default_max_tokens=args.default_max_tokens,
+        model=args.model,
+        seed=args.seed,
+    )
+    print(f"Mock LLM server: ttft={config.ttft!r} itl={config.itl!r} "
+          f"max_concurrency={config.max_concurrency or 'unlimited'}")
+    try:
+        asyncio.run(serve(MockLLMServer(config), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
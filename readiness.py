@@ -0,0 +1,191 @@
+"""
+Readiness signalling for the Hello World service
+The server binds its socket first, then runs the registered warm-up steps
+while /livez already answers and /readyz still returns 503. Once warm-up is
+done the service announces itself: it writes READINESS_FILE (if set) and
+sends READY=1 to NOTIFY_SOCKET (systemd style, if set), so callers can stop
+polling. Time to ready and time to the first served request are exposed on
+/readyz and /metrics.
+"""
+
+import atexit
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Response, request
+from werkzeug.serving import make_server
+
+
+def process_start():
+    """Process start on the monotonic clock, read from /proc where available"""
+    try:
+        with open('/proc/self/stat', 'rb') as f:
+            # 第 22 个字段为开机后的启动时刻（时钟滴答）；comm 字段可能含空格，从右括号后开始切分
+            start_ticks = int(f.read().rsplit(b')', 1)[1].split()[19])
+        age = time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf('SC_CLK_TCK')
+        return time.monotonic() - max(age, 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        # 无 /proc 时以模块导入时间近似
+        return time.monotonic()
+
+
+PROCESS_START = process_start()
+
+PROBE_PATHS = ('/livez', '/readyz')
+
+
+def json_response(payload, status=200):
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True) + "\n"
+    return Response(body, status=status, mimetype="application/json")
+
+
+def notify_socket(address, message):
+    """Send one datagram to a systemd-style notify socket; '@' means abstract namespace"""
+    if address.startswith('@'):
+        address = '\0' + address[1:]
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.connect(address)
+        sock.sendall(message.encode('utf-8'))
+
+
+class Readiness:
+    """Warm-up steps, ready state and startup timings of one process"""
+
+    def __init__(self, started=None, readiness_file=None, notify_address=None):
+        self.started = PROCESS_START if started is None else started
+        self.readiness_file = readiness_file
+        self.notify_address = notify_address
+        self.warmups = []
+        self.port = None
+        self.ready_seconds = None
+        self.first_request_seconds = None
+        self._ready = threading.Event()
+        self._first_request_lock = threading.Lock()
+
+    def warmup(self, func):
+        """Register a warm-up step (usable as a decorator)"""
+        self.warmups.append(func)
+        return func
+
+    @property
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def start(self, port=None):
+        """Run the warm-up steps, then mark the service ready and signal it"""
+        for step in self.warmups:
+            step()
+        self.mark_ready(port)
+
+    def mark_ready(self, port=None):
+        self.port = port
+        self.ready_seconds = time.monotonic() - self.started
+        self._ready.set()
+        print(f"Service ready in {self.ready_seconds:.3f}s" + (f" on port {port}" if port else ""))
+        self.announce()
+
+    def announce(self):
+        """Write the readiness file and notify the socket; failures are only logged"""
+        if self.readiness_file:
+            try:
+                tmp_path = f'{self.readiness_file}.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "pid": os.getpid(),
+                        "port": self.port,
+                        "startup_seconds": round(self.ready_seconds, 6),
+                        "ready_at": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    }, f)
+                os.replace(tmp_path, self.readiness_file)
+                # 进程退出后删除，避免下一次启动读到过期的就绪状态
+                atexit.register(self.clear)
+            except OSError as e:
+                print(f"Warning: Could not write readiness file {self.readiness_file}: {e}")
+        if self.notify_address:
+            try:
+                notify_socket(self.notify_address,
+                              f"READY=1\nMAINPID={os.getpid()}\nSTATUS=ready in {self.ready_seconds:.3f}s")
+            except OSError as e:
+                print(f"Warning: Could not notify {self.notify_address}: {e}")
+
+    def clear(self):
+        if self.readiness_file:
+            try:
+                os.remove(self.readiness_file)
+            except FileNotFoundError:
+                pass
+
+    def record_request(self):
+        """Record the time to the first request served after becoming ready"""
+        if self.first_request_seconds is not None or not self.is_ready:
+            return
+        with self._first_request_lock:
+            if self.first_request_seconds is None:
+                self.first_request_seconds = time.monotonic() - self.started
+                print(f"First request served {self.first_request_seconds:.3f}s after start")
+
+    def state(self):
+        return {
+            "status": "ready" if self.is_ready else "warming_up",
+            "startup_seconds": self.ready_seconds,
+            "first_request_seconds": self.first_request_seconds,
+        }
+
+
+def init_app(app, readiness=None, metrics=None):
+    """Install /livez, /readyz and first-request timing on a Flask app
+
+    Without an explicit instance, READINESS_FILE and NOTIFY_SOCKET are read
+    from the environment.
+    """
+    if readiness is None:
+        readiness = Readiness(readiness_file=os.environ.get('READINESS_FILE') or None,
+                              notify_address=os.environ.get('NOTIFY_SOCKET') or None)
+
+    @app.after_request
+    def record_first_request(response):
+        if readiness.first_request_seconds is None and request.path not in PROBE_PATHS:
+            readiness.record_request()
+        return response
+
+    @app.route('/livez', methods=['GET'])
+    def liveness():
+        return json_response({"status": "alive", "uptime_seconds": round(time.monotonic() - readiness.started, 3)})
+
+    @app.route('/readyz', methods=['GET'])
+    def readiness_check():
+        return json_response(readiness.state(), 200 if readiness.is_ready else 503)
+
+    if metrics is not None:
+        metrics.declare_gauge('app_ready', 'Whether warm-up has finished', lambda: int(readiness.is_ready))
+        metrics.declare_gauge('app_startup_seconds', 'Seconds from process start to ready',
+                              lambda: readiness.ready_seconds)
+        metrics.declare_gauge('app_first_request_seconds', 'Seconds from process start to the first served request',
+                              lambda: readiness.first_request_seconds)
+
+    app.extensions['readiness'] = readiness
+    return readiness
+
+
+def make_ready_server(app, host, port, readiness):
+    """Bind the server, then warm up in the background; returns the server to serve_forever"""
+    server = make_server(host, port, app, threaded=True)
+    # 套接字已在监听：预热期间 /livez 可用，/readyz 返回 503
+    threading.Thread(target=readiness.start, args=(server.server_port,), daemon=True,
+                     name='readiness-warmup').start()
+    return server
+
+
+def serve(app, host, port, readiness):
+    # docker stop 发送 SIGTERM：正常退出以便 atexit 删除就绪文件
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    make_ready_server(app, host, port, readiness).serve_forever()
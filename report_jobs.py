@@ -0,0 +1,228 @@
+"""
+Background report rendering for the Hello World service
+POST /reports enqueues an LLM report render on a small worker pool and
+answers 202 right away; GET /reports/<id> returns the job's status and
+output location. A job is identified by its output file and the state
+(mtime, size) of the data files at submission, so submitters asking for the
+same report while an identical job is queued, running or already done share
+that job and the report is rendered once. When the queue is full, new jobs
+are rejected with 503 + Retry-After like admission control does.
+"""
+
+import importlib.util
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from flask import request
+
+from readiness import json_response
+
+# 报告生成器在第一次渲染时才导入，不拖慢服务启动；镜像中没有 llm_testing 时不启用
+REPORTS_AVAILABLE = importlib.util.find_spec('llm_testing.framework') is not None
+
+
+BASE_DIR = Path(__file__).parent
+DEFAULT_DATA_DIR = BASE_DIR / 'llm_testing' / 'data'
+DEFAULT_OUTPUT_DIR = BASE_DIR / 'llm_testing' / 'reports'
+DEFAULT_OUTPUT = 'llm_eval_report.html'
+
+JOBS_COUNTER = 'report_jobs_total'
+# 已结束的任务只保留最近这么多条，供 GET /reports/<id> 查询
+JOB_HISTORY = 200
+
+
+def data_signature(data_dir):
+    """(name, mtime_ns, size) of every data file; changes whenever a run is appended"""
+    signature = []
+    try:
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json') and entry.is_file():
+                    stat = entry.stat()
+                    signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    except FileNotFoundError:
+        pass
+    return tuple(sorted(signature))
+
+
+def render_report(data_dir, output_file):
+    """Render the LLM report to a temporary file, then move it into place"""
+    from llm_testing.framework.generator_html import LLMReportGenerator
+
+    output_file = Path(output_file)
+    tmp_file = output_file.with_name(f'.{output_file.stem}.{uuid.uuid4().hex[:8]}.tmp.html')
+    try:
+        LLMReportGenerator(data_dir).generate_html_report(str(tmp_file))
+        os.replace(tmp_file, output_file)
+    finally:
+        if tmp_file.exists():
+            tmp_file.unlink()
+    return str(output_file)
+
+
+class ReportJob:
+    """One queued render and the submitters sharing it"""
+
+    def __init__(self, key, output_file):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.output_file = output_file
+        self.status = 'queued'
+        self.error = None
+        self.submitters = 1
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "output": str(self.output_file) if self.status == 'done' else None,
+            "error": self.error,
+            "submitters": self.submitters,
+            "queued_seconds": round((self.started_at or time.time()) - self.submitted_at, 3),
+            "render_seconds": round(self.finished_at - self.started_at, 3) if self.finished_at else None,
+        }
+
+
+class ReportJobQueue:
+    """Bounded render pool that coalesces identical jobs"""
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, output_dir=DEFAULT_OUTPUT_DIR, workers=1,
+                 max_pending=8, retry_after=5, render=render_report):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.data_dir = Path(data_dir)
+        self.output_dir = Path(output_dir)
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.render = render
+        self.jobs = OrderedDict()
+        self.active = {}
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-job')
+
+    def submit(self, output=DEFAULT_OUTPUT):
+        """Queue a render of ``output``; returns (job, deduplicated) or (None, False) when full"""
+        output_file = self.output_dir / output
+        key = (output, data_signature(self.data_dir))
+        with self._lock:
+            job = self.active.get(key)
+            if job is not None and (job.status != 'done' or job.output_file.exists()):
+                job.submitters += 1
+                return job, True
+            if self.pending >= self.max_pending:
+                return None, False
+            job = ReportJob(key, output_file)
+            self.active[key] = job
+            self.jobs[job.id] = job
+            self.pending += 1
+            self._trim()
+        self._executor.submit(self._run, job)
+        return job, False
+
+    def _trim(self):
+        # 只淘汰已结束的任务；排队与运行中的任务数量受 max_pending 限制
+        while len(self.jobs) > JOB_HISTORY + self.pending:
+            for job_id, job in self.jobs.items():
+                if job.done.is_set():
+                    del self.jobs[job_id]
+                    break
+            else:
+                return
+
+    def _run(self, job):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self.render(self.data_dir, job.output_file)
+            job.status = 'done'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            print(f"Report job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self.pending -= 1
+                # 失败的任务不参与去重，下一次提交会重新渲染
+                if job.status == 'failed' and self.active.get(job.key) is job:
+                    del self.active[job.key]
+                # 同一输出只记住最新数据状态对应的任务
+                for key in [key for key, other in self.active.items()
+                            if key[0] == job.key[0] and other is not job and other.done.is_set()]:
+                    del self.active[key]
+            job.done.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def init_app(app, jobs=None, metrics=None):
+    """Install POST /reports and GET /reports/<id> on a Flask app
+
+    Without an explicit queue, settings are read from the environment:
+    REPORT_WORKERS (0 disables the endpoints), REPORT_QUEUE_DEPTH,
+    REPORT_DATA_DIR and REPORT_OUTPUT_DIR. Nothing is installed when the
+    llm_testing package cannot be imported.
+    """
+    if jobs is None:
+        workers = int(os.environ.get('REPORT_WORKERS', 1))
+        if workers <= 0 or not REPORTS_AVAILABLE:
+            return None
+        jobs = ReportJobQueue(
+            data_dir=os.environ.get('REPORT_DATA_DIR') or DEFAULT_DATA_DIR,
+            output_dir=os.environ.get('REPORT_OUTPUT_DIR') or DEFAULT_OUTPUT_DIR,
+            workers=workers,
+            max_pending=int(os.environ.get('REPORT_QUEUE_DEPTH', 8)),
+        )
+
+    if metrics is not None:
+        metrics.declare_counter(JOBS_COUNTER, 'Report render submissions by outcome', ('outcome',))
+        metrics.declare_gauge('report_jobs_pending', 'Report renders queued or running', lambda: jobs.pending)
+
+    @app.route('/reports', methods=['POST'])
+    def submit_report():
+        payload = request.get_json(silent=True) or {}
+        output = payload.get('output', DEFAULT_OUTPUT)
+        # 只接受报告目录下的非隐藏文件名，不允许写到其它位置
+        if not isinstance(output, str) or os.path.basename(output) != output or not output.endswith('.html') \
+                or not output[:-5] or output.startswith('.'):
+            return json_response({"error": "output must be a .html file name"}, 400)
+
+        job, deduplicated = jobs.submit(output)
+        if job is None:
+            if metrics is not None:
+                metrics.inc(JOBS_COUNTER, ('rejected',))
+            response = json_response({"status": "overloaded", "reason": "report_queue_full"}, 503)
+            response.headers['Retry-After'] = str(jobs.retry_after)
+            return response
+
+        if metrics is not None:
+            metrics.inc(JOBS_COUNTER, ('deduplicated' if deduplicated else 'queued',))
+        response = json_response({**job.to_dict(), "deduplicated": deduplicated}, 202)
+        response.headers['Location'] = f'/reports/{job.id}'
+        return response
+
+    @app.route('/reports/<job_id>', methods=['GET'])
+    def report_status(job_id):
+        job = jobs.get(job_id)
+        if job is None:
+            return json_response({"error": "unknown report job"}, 404)
+        return json_response(job.to_dict())
+
+    app.extensions['report_jobs'] = jobs
+    return jobs
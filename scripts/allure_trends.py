@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Incremental Allure trend aggregation without the Java allure CLI
+Streams the ``*-result.json`` files written since the previous run and
+prepends one build entry to the history, duration, retry and categories
+trends stored under ``<report>/history``, the same files ``allure generate``
+reads and writes. Per-test history (``history.json``) is updated in place,
+so the work done per build scales with the new results, not the history.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+DEFAULT_RESULTS_DIR = "tests/reports/allure-results"
+DEFAULT_REPORT_DIR = "tests/reports/allure-report"
+
+STATUSES = ("failed", "broken", "skipped", "passed", "unknown")
+TREND_FILES = ("history-trend", "duration-trend", "retry-trend", "categories-trend")
+STATE_FILE = "aggregator-state.json"
+
+# 与 Allure 默认值一致：每个用例保留最近 20 次结果
+HISTORY_LIMIT = 20
+TREND_LIMIT = 100
+
+# Allure 默认缺陷分类
+DEFAULT_CATEGORIES = {"failed": "Product defects", "broken": "Test defects"}
+
+
+def empty_statistic():
+    statistic = dict.fromkeys(STATUSES, 0)
+    statistic["total"] = 0
+    return statistic
+
+
+def read_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not load {path}: {e}")
+        return default
+
+
+def write_json(path, data):
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def new_result_files(results_dir, state):
+    """Result files newer than the watermark left by the previous run
+
+    The watermark is the newest modification time seen plus the names that
+    carried it, so files written within the same clock tick are not lost.
+    Returns (paths, new state).
+    """
+    mtime = state.get("mtime_ns", 0)
+    seen = set(state.get("names", []))
+    files = []
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith("-result.json") or not entry.is_file():
+                continue
+            entry_mtime = entry.stat().st_mtime_ns
+            if entry_mtime > mtime or (entry_mtime == mtime and entry.name not in seen):
+                files.append((entry_mtime, entry.name))
+
+    if not files:
+        return [], state
+    newest = max(entry_mtime for entry_mtime, _ in files)
+    names = [name for entry_mtime, name in files if entry_mtime == newest]
+    if newest == mtime:
+        names.extend(seen)
+    files.sort()
+    return [Path(results_dir) / name for _, name in files], {"mtime_ns": newest, "names": sorted(names)}
+
+
+def iter_results(paths):
+    """Yield the fields the trends need, one result file at a time"""
+    for path in paths:
+        data = read_json(path, None)
+        if not isinstance(data, dict):
+            continue
+        start = data.get("start") or 0
+        stop = data.get("stop") or start
+        status = data.get("status") if data.get("status") in STATUSES else "unknown"
+        yield {
+            "uuid": data.get("uuid", path.stem),
+            "historyId": data.get("historyId") or data.get("fullName") or data.get("name", path.stem),
+            "status": status,
+            "statusDetails": data.get("statusDetails"),
+            "start": start,
+            "stop": stop,
+        }
+
+
+def collapse_retries(results):
+    """Keep the latest attempt of every historyId; returns (latest, retry count)"""
+    latest = {}
+    retries = 0
+    for result in results:
+        previous = latest.get(result["historyId"])
+        if previous is None:
+            latest[result["historyId"]] = result
+            continue
+        retries += 1
+        if (result["start"], result["stop"]) >= (previous["start"], previous["stop"]):
+            latest[result["historyId"]] = result
+    return latest, retries
+
+
+def build_info(results_dir):
+    """buildOrder/reportName/reportUrl from executor.json or the Jenkins environment"""
+    executor = read_json(Path(results_dir) / "executor.json", {})
+    info = {}
+    build_order = executor.get("buildOrder") or os.environ.get("BUILD_NUMBER")
+    if build_order is not None:
+        try:
+            info["buildOrder"] = int(build_order)
+        except (TypeError, ValueError):
+            pass
+    report_name = executor.get("reportName") or executor.get("buildName") or os.environ.get("JOB_NAME")
+    if report_name:
+        info["reportName"] = report_name
+    report_url = executor.get("reportUrl") or os.environ.get("BUILD_URL")
+    if report_url:
+        info["reportUrl"] = report_url
+    return info
+
+
+def test_uid(result):
+    # 与 Allure 一样使用 16 位十六进制 uid
+    return hashlib.md5(result["uuid"].encode('utf-8')).hexdigest()[:16]
+
+
+def update_history(history, latest):
+    """Prepend this build's result to each test's history.json entry"""
+    for history_id, result in latest.items():
+        entry = history.setdefault(history_id, {"statistic": empty_statistic(), "items": []})
+        item = {
+            "uid": test_uid(result),
+            "status": result["status"],
+            "time": {
+                "start": result["start"],
+                "stop": result["stop"],
+                "duration": result["stop"] - result["start"],
+            },
+        }
+        message = (result["statusDetails"] or {}).get("message")
+        if message:
+            item["statusDetails"] = message
+        entry["items"] = [item] + entry["items"][:HISTORY_LIMIT - 1]
+        entry["statistic"][result["status"]] += 1
+        entry["statistic"]["total"] += 1
+    return history
+
+
+def build_trend_data(latest, retries):
+    """One build's data for each trend file"""
+    statistic = empty_statistic()
+    categories = {}
+    start = stop = None
+    for result in latest.values():
+        statistic[result["status"]] += 1
+        statistic["total"] += 1
+        category = DEFAULT_CATEGORIES.get(result["status"])
+        if category:
+            categories[category] = categories.get(category, 0) + 1
+        start = result["start"] if start is None else min(start, result["start"])
+        stop = result["stop"] if stop is None else max(stop, result["stop"])
+
+    return {
+        "history-trend": statistic,
+        "duration-trend": {"duration": (stop - start) if latest else 0},
+        "retry-trend": {"run": len(latest) + retries, "retry": retries},
+        "categories-trend": categories,
+    }, {"start": start or 0, "stop": stop or 0}
+
+
+def aggregate(results_dir=DEFAULT_RESULTS_DIR, report_dir=DEFAULT_REPORT_DIR, previous_history=None):
+    """Fold new results into the report's trends; returns this build's statistic or None
+
+    ``previous_history`` points at the previous build's ``history`` directory
+    when it lives elsewhere (e.g. copied from the last Jenkins build);
+    otherwise the report's own ``history`` directory is the previous state.
+    """
+    results_dir = Path(results_dir)
+    history_dir = Path(report_dir) / "history"
+    widgets_dir = Path(report_dir) / "widgets"
+    source_dir = Path(previous_history) if previous_history else history_dir
+
+    if not results_dir.exists():
+        print(f"✗ 目录不存在: {results_dir}")
+        return None
+
+    state = read_json(source_dir / STATE_FILE, {})
+    paths, new_state = new_result_files(results_dir, state)
+    if not paths:
+        print("没有新的 Allure 结果，趋势保持不变")
+        return None
+
+    latest, retries = collapse_retries(iter_results(paths))
+    history_dir.mkdir(parents=True, exist_ok=True)
+    if not latest:
+        print("新的结果文件均无法解析，趋势保持不变")
+        write_json(history_dir / STATE_FILE, new_state)
+        return None
+
+    data, launch_time = build_trend_data(latest, retries)
+    info = build_info(results_dir)
+    widgets_dir.mkdir(parents=True, exist_ok=True)
+
+    for name in TREND_FILES:
+        trend = read_json(source_dir / f"{name}.json", [])
+        trend = [{**info, "data": data[name]}] + trend[:TREND_LIMIT - 1]
+        write_json(history_dir / f"{name}.json", trend)
+        write_json(widgets_dir / f"{name}.json", trend)
+
+    history = update_history(read_json(source_dir / "history.json", {}), latest)
+    write_json(history_dir / "history.json", history)
+
+    durations = [result["stop"] - result["start"] for result in latest.values()]
+    summary = read_json(widgets_dir / "summary.json", {"reportName": "Allure Report", "testRuns": []})
+    summary["statistic"] = data["history-trend"]
+    summary["time"] = {
+        **launch_time,
+        "duration": data["duration-trend"]["duration"],
+        "minDuration": min(durations),
+        "maxDuration": max(durations),
+        "sumDuration": sum(durations),
+    }
+    write_json(widgets_dir / "summary.json", summary)
+
+    # 状态文件最后写入，中途失败时下次运行会重新处理这批结果
+    write_json(history_dir / STATE_FILE, new_state)
+
+    print(f"✓ 已聚合 {len(paths)} 个新结果（{len(latest)} 个用例，{retries} 次重试）")
+    return data["history-trend"]
+
+
+def generate_report(results_dir=DEFAULT_RESULTS_DIR, report_dir=DEFAULT_REPORT_DIR):
+    """Render the HTML report with the allure CLI when installed, keeping the trends
+
+    ``allure generate --clean`` wipes the report directory, so the previous
+    history is saved first and the new results are folded into it afterwards.
+    """
+    previous_history = tempfile.mkdtemp()
+    history_dir = Path(report_dir) / "history"
+    try:
+        if history_dir.is_dir():
+            shutil.copytree(history_dir, previous_history, dirs_exist_ok=True)
+        if shutil.which("allure"):
+            subprocess.run(["allure", "generate", str(results_dir), "-o", str(report_dir), "--clean"],
+                           check=True, timeout=300)
+            print("✓ Allure报告生成成功")
+        else:
+            print("Allure未安装，仅更新趋势")
+        return aggregate(results_dir, report_dir, previous_history)
+    finally:
+        shutil.rmtree(previous_history, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update Allure trend files from new results")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_DIR, help="allure-results directory")
+    parser.add_argument("--report", default=DEFAULT_REPORT_DIR, help="allure-report directory")
+    parser.add_argument("--previous-history", default=None,
+                        help="history directory of the previous build (default: <report>/history)")
+    parser.add_argument("--generate", action="store_true",
+                        help="also render the HTML report with the allure CLI when it is installed")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_report(args.results, args.report)
+    else:
+        aggregate(args.results, args.report, args.previous_history)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
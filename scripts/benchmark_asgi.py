@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+WSGI vs ASGI benchmark for the Hello World service
+Holds a set of idle keep-alive connections open against each server and
+measures how many stay usable and the p99 latency of concurrent probes
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'wsgi': 'app.py',
+    'asgi': 'asgi_app.py',
+}
+
+
+def find_free_port():
+    """获取一个空闲端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(variant, port, timeout=30):
+    """启动服务并等待 /health 可用"""
+    env = dict(os.environ, PORT=str(port))
+    proc = subprocess.Popen([sys.executable, SERVERS[variant]], cwd=ROOT_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"{variant} server did not start on port {port}")
+
+
+def open_idle_connections(port, count, timeout):
+    """Open keep-alive connections, each having served one request"""
+    connections = []
+    for _ in range(count):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        try:
+            conn.request('GET', '/hello')
+            conn.getresponse().read()
+        except OSError:
+            conn.close()
+            continue
+        connections.append(conn)
+    return connections
+
+
+def count_held(connections):
+    """Count connections that are still open and can serve another request"""
+    held = 0
+    for conn in connections:
+        # 服务端已关闭的连接会被 http.client 丢弃 socket，这里不允许自动重连
+        if conn.sock is None:
+            continue
+        try:
+            conn.request('GET', '/hello')
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200 and conn.sock is not None:
+                held += 1
+        except OSError:
+            pass
+    return held
+
+
+def probe_latency(port, requests, concurrency, timeout):
+    """Issue probe requests over fresh connections and return latencies in ms"""
+    def one_request(_):
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+            conn.request('GET', '/hello')
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            ok = response.status == 200
+        except OSError:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_request, range(requests)))
+    return [latency for latency, ok in results if ok], sum(1 for _, ok in results if not ok)
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run_variant(variant, args):
+    port = find_free_port()
+    proc = start_server(variant, port)
+    try:
+        connections = open_idle_connections(port, args.idle_connections, args.timeout)
+        latencies, errors = probe_latency(port, args.requests, args.concurrency, args.timeout)
+        held = count_held(connections)
+        for conn in connections:
+            conn.close()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    return {
+        'variant': variant,
+        'idle_connections': args.idle_connections,
+        'connections_held': held,
+        'probe_requests': args.requests,
+        'probe_errors': errors,
+        'p50_latency_ms': percentile(latencies, 50),
+        'p99_latency_ms': percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare WSGI and ASGI entry points under idle keep-alive load')
+    parser.add_argument('--variants', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+    parser.add_argument('--idle-connections', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    for variant in args.variants:
+        print(f"Benchmarking {variant} ...")
+        results.append(run_variant(variant, args))
+
+    print(f"\n{'variant':<8}{'held':>10}{'errors':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for r in results:
+        p50 = f"{r['p50_latency_ms']:.2f}" if r['p50_latency_ms'] is not None else 'N/A'
+        p99 = f"{r['p99_latency_ms']:.2f}" if r['p99_latency_ms'] is not None else 'N/A'
+        held = f"{r['connections_held']}/{r['idle_connections']}"
+        print(f"{r['variant']:<8}{held:>10}{r['probe_errors']:>10}{p50:>12}{p99:>12}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,8 +4,12 @@
 """
 import os
 import sys
+import shutil
 import subprocess
 import json
+import tempfile
+
+from allure_trends import aggregate
 
 def check_allure_installation():
     """检查Allure是否已安装"""
@@ -89,6 +93,21 @@ def generate_allure_report():
         print(f"✗ Allure报告生成异常: {e}")
         return False
 
+def update_allure_trends(previous_history=None):
+    """增量更新趋势文件（不依赖 Allure 命令行）"""
+    results_dir = "tests/reports/allure-results"
+    report_dir = "tests/reports/allure-report"
+
+    print("正在更新Allure趋势...")
+    try:
+        statistic = aggregate(results_dir, report_dir, previous_history)
+        if statistic:
+            print(f"  本次构建: {statistic}")
+        return True
+    except Exception as e:
+        print(f"✗ Allure趋势更新异常: {e}")
+        return False
+
 def main():
     print("=== Allure报告调试脚本 ===\n")
 
@@ -102,14 +121,30 @@ def main():
     results_ok = check_allure_results()
     print()
 
-    # 3. 生成报告
-    if allure_installed and results_ok:
-        print("3. 生成Allure报告:")
-        generate_allure_report()
-        print()
-    else:
+    if not results_ok:
         print("3. 跳过报告生成（前置条件未满足）")
         print()
+        return
+
+    # 3. 生成报告；--clean 会清空报告目录，先保存上一次构建的趋势
+    previous_history = tempfile.mkdtemp()
+    history_dir = "tests/reports/allure-report/history"
+    if os.path.isdir(history_dir):
+        shutil.copytree(history_dir, previous_history, dirs_exist_ok=True)
+    try:
+        if allure_installed:
+            print("3. 生成Allure报告:")
+            generate_allure_report()
+        else:
+            print("3. 跳过HTML报告生成（Allure未安装）")
+        print()
+
+        # 4. 更新趋势
+        print("4. 更新Allure趋势:")
+        update_allure_trends(previous_history)
+        print()
+    finally:
+        shutil.rmtree(previous_history, ignore_errors=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Distributed load generation
+A coordinator hands one test plan to several load-generator workers (local
+processes or other hosts) over TCP, starts them at the same instant, merges
+the latency sketches they stream back and writes a single combined run in
+the llm_testing data format.
+
+Protocol: one JSON object per line.
+    worker -> coordinator  {"type": "hello", "worker": name}
+    coordinator -> worker  {"type": "plan", "plan": {...}}
+    worker -> coordinator  {"type": "ready"}
+    coordinator -> worker  {"type": "start", "start_at": unix_time}
+    worker -> coordinator  {"type": "progress", "sketch": {...}, "errors": n}   (every interval)
+    worker -> coordinator  {"type": "done", "sketch": {...}, "errors": n, "duration": s}
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from load_generator import (DEFAULT_OUTPUT, METRICS_SCHEMA, TOOL_DESCRIPTION, TOOL_NAME, HTTPTarget,
+                            InProcessTarget, LoadResult, run_closed_loop, run_open_loop)
+from llm_testing.framework.runs import append_run, build_run, default_build_id
+from llm_testing.framework.sketch import LatencySketch
+
+
+DEFAULT_PORT = 5557
+START_DELAY = 1.0
+
+
+def send_message(stream, message):
+    stream.write(json.dumps(message) + '\n')
+    stream.flush()
+
+
+def read_message(stream, expected=None):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Peer closed the connection")
+    message = json.loads(line)
+    if expected and message.get('type') != expected:
+        raise ConnectionError(f"Expected '{expected}' message, got {message.get('type')!r}")
+    return message
+
+
+# ---------------------------------------------------------------- worker
+
+def run_plan(plan, result):
+    """Run this worker's share of the plan, recording into ``result``"""
+    target = HTTPTarget(plan['url']) if plan.get('url') else InProcessTarget()
+    try:
+        if plan['mode'] == 'closed':
+            run_closed_loop(target, plan['concurrency'], plan['duration'], plan['method'], plan['path'],
+                            result=result)
+        else:
+            run_open_loop(target, plan['rate'], plan['duration'], plan['method'], plan['path'],
+                          plan['max_workers'], seed=plan.get('seed'), result=result)
+    finally:
+        target.close()
+
+
+def interval_message(kind, result, **extra):
+    sketch, errors = result.take()
+    return {"type": kind, "sketch": sketch.to_dict(), "errors": errors, **extra}
+
+
+def run_worker(host, port, name=None, connect_timeout=30.0):
+    """Connect to a coordinator, run the plan it sends and stream results back"""
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port), timeout=connect_timeout)
+            break
+        except OSError:
+            # 协调者可能尚未开始监听
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+    sock.settimeout(None)
+    stream = sock.makefile('rw', encoding='utf-8')
+    try:
+        send_message(stream, {"type": "hello", "worker": name})
+        plan = read_message(stream, 'plan')['plan']
+        send_message(stream, {"type": "ready"})
+        start_at = read_message(stream, 'start')['start_at']
+
+        delay = start_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        result = LoadResult()
+        runner = threading.Thread(target=run_plan, args=(plan, result), daemon=True)
+        started = time.perf_counter()
+        runner.start()
+        while runner.is_alive():
+            runner.join(plan['interval'])
+            if runner.is_alive():
+                send_message(stream, interval_message('progress', result))
+        send_message(stream, interval_message('done', result, duration=time.perf_counter() - started))
+    finally:
+        stream.close()
+        sock.close()
+
+
+# ---------------------------------------------------------------- coordinator
+
+class WorkerState:
+    """Coordinator-side view of one connected worker"""
+
+    def __init__(self, conn, stream, name):
+        self.conn = conn
+        self.stream = stream
+        self.name = name
+        self.requests = 0
+        self.errors = 0
+        self.duration = 0.0
+        self.failed = None
+
+
+class Coordinator:
+    """Distributes a plan to ``num_workers`` workers and merges their sketches"""
+
+    def __init__(self, plan, num_workers, host='0.0.0.0', port=DEFAULT_PORT):
+        self.plan = plan
+        self.num_workers = num_workers
+        self.server = socket.create_server((host, port))
+        self.port = self.server.getsockname()[1]
+        self.workers = []
+        self.sketch = LatencySketch()
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def accept_workers(self, timeout=60.0):
+        self.server.settimeout(timeout)
+        while len(self.workers) < self.num_workers:
+            try:
+                conn, address = self.server.accept()
+            except socket.timeout:
+                raise TimeoutError(f"Only {len(self.workers)}/{self.num_workers} workers connected")
+            conn.settimeout(timeout)
+            stream = conn.makefile('rw', encoding='utf-8')
+            hello = read_message(stream, 'hello')
+            self.workers.append(WorkerState(conn, stream, hello.get('worker') or f"{address[0]}:{address[1]}"))
+            print(f"  worker {hello.get('worker')} 已连接 ({len(self.workers)}/{self.num_workers})")
+        self.server.close()
+
+    def worker_plan(self, index):
+        plan = dict(self.plan)
+        if plan['mode'] == 'open':
+            # 总到达率平均分给各个 worker，合起来仍是泊松过程
+            plan['rate'] = self.plan['rate'] / self.num_workers
+        if plan.get('seed') is not None:
+            plan['seed'] = plan['seed'] + index
+        return plan
+
+    def record(self, worker, message):
+        sketch = LatencySketch.from_dict(message['sketch'])
+        with self._lock:
+            self.sketch.merge(sketch)
+            self.errors += message['errors']
+            worker.requests += sketch.count
+            worker.errors += message['errors']
+
+    def collect(self, worker):
+        try:
+            while True:
+                message = read_message(worker.stream)
+                self.record(worker, message)
+                if message['type'] == 'done':
+                    worker.duration = message['duration']
+                    return
+        except (OSError, ValueError, KeyError) as e:
+            worker.failed = str(e) or type(e).__name__
+            print(f"  worker {worker.name} 失败: {worker.failed}")
+        finally:
+            worker.stream.close()
+            worker.conn.close()
+
+    def run(self, accept_timeout=60.0, start_delay=START_DELAY):
+        """Run the distributed test; returns the merged metrics"""
+        self.accept_workers(accept_timeout)
+        for index, worker in enumerate(self.workers):
+            send_message(worker.stream, {"type": "plan", "plan": self.worker_plan(index)})
+        for worker in self.workers:
+            read_message(worker.stream, 'ready')
+            worker.conn.settimeout(self.plan['duration'] + 60)
+
+        start_at = time.time() + start_delay
+        for worker in self.workers:
+            send_message(worker.stream, {"type": "start", "start_at": start_at})
+        print(f"  {len(self.workers)} 个 worker 将在 {start_delay:.1f}s 后同时开始")
+
+        collectors = [threading.Thread(target=self.collect, args=(worker,), daemon=True)
+                      for worker in self.workers]
+        for t in collectors:
+            t.start()
+        while True:
+            alive = [t for t in collectors if t.is_alive()]
+            if not alive:
+                break
+            alive[0].join(self.plan['interval'])
+            with self._lock:
+                print(f"  已完成 {self.sketch.count} 个请求，错误 {self.errors}，"
+                      f"p99 {self.sketch.quantile(99):.2f}ms")
+        return self.summary()
+
+    def summary(self):
+        duration = max((w.duration for w in self.workers if w.failed is None), default=0.0)
+        total = self.sketch.count + self.errors
+        return {
+            "avg_latency": self.sketch.mean,
+            "p50_latency": self.sketch.quantile(50),
+            "p95_latency": self.sketch.quantile(95),
+            "p99_latency": self.sketch.quantile(99),
+            "requests_per_second": self.sketch.count / duration if duration > 0 else 0.0,
+            "error_rate": 100.0 * self.errors / total if total else 0.0,
+        }
+
+
+def spawn_local_workers(count, port, host='127.0.0.1'):
+    """Start ``count`` worker processes on this machine"""
+    return [
+        subprocess.Popen([sys.executable, str(Path(__file__).resolve()), 'worker',
+                          '--coordinator', f'{host}:{port}', '--name', f'local-{index}'],
+                         cwd=str(ROOT_DIR))
+        for index in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed load generation for the Hello World service')
+    sub = parser.add_subparsers(dest='role', required=True)
+
+    coord = sub.add_parser('coordinator', help='Hand out the plan and merge the results')
+    coord.add_argument('--workers', type=int, default=2, help='Number of workers to wait for')
+    coord.add_argument('--spawn-local', action='store_true', help='Start the workers as local processes')
+    coord.add_argument('--listen', default='0.0.0.0')
+    coord.add_argument('--port', type=int, default=DEFAULT_PORT)
+    coord.add_argument('--url', help='Base URL of the service; omit to drive the WSGI app in each worker')
+    coord.add_argument('--path', default='/hello')
+    coord.add_argument('--method', default='GET')
+    coord.add_argument('--mode', choices=['closed', 'open'], default='closed')
+    coord.add_argument('--concurrency', type=int, default=8, help='Closed-loop workers per process')
+    coord.add_argument('--rate', type=float, default=100.0, help='Total arrivals per second in open-loop mode')
+    coord.add_argument('--max-workers', type=int, default=64, help='Thread pool per process in open-loop mode')
+    coord.add_argument('--duration', type=float, default=10.0)
+    coord.add_argument('--interval', type=float, default=1.0, help='Seconds between streamed sketches')
+    coord.add_argument('--seed', type=int, default=None)
+    coord.add_argument('--accept-timeout', type=float, default=60.0)
+    coord.add_argument('--build-id', default=default_build_id())
+    coord.add_argument('--output', default=str(DEFAULT_OUTPUT))
+    coord.add_argument('--no-save', action='store_true')
+
+    worker = sub.add_parser('worker', help='Run load on behalf of a coordinator')
+    worker.add_argument('--coordinator', required=True, help='host:port of the coordinator')
+    worker.add_argument('--name')
+    args = parser.parse_args()
+
+    if args.role == 'worker':
+        host, _, port = args.coordinator.rpartition(':')
+        run_worker(host, int(port), args.name)
+        return 0
+
+    plan = {
+        "url": args.url, "path": args.path, "method": args.method, "mode": args.mode,
+        "concurrency": args.concurrency, "rate": args.rate, "max_workers": args.max_workers,
+        "duration": args.duration, "interval": args.interval, "seed": args.seed,
+    }
+    coordinator = Coordinator(plan, args.workers, args.listen, args.port)
+    print(f"协调者监听 {args.listen}:{coordinator.port}，等待 {args.workers} 个 worker ...")
+    processes = spawn_local_workers(args.workers, coordinator.port) if args.spawn_local else []
+    try:
+        summary = coordinator.run(args.accept_timeout)
+    finally:
+        for process in processes:
+            process.wait(timeout=args.duration + 60)
+
+    failed = [w for w in coordinator.workers if w.failed]
+    print(f"Requests: {coordinator.sketch.count + coordinator.errors}  Errors: {coordinator.errors}  "
+          f"Workers: {len(coordinator.workers) - len(failed)}/{len(coordinator.workers)}")
+    print(f"RPS: {summary['requests_per_second']:.2f}")
+    print(f"Latency ms  avg={summary['avg_latency']:.2f}  p50={summary['p50_latency']:.2f}  "
+          f"p95={summary['p95_latency']:.2f}  p99={summary['p99_latency']:.2f}")
+
+    if not args.no_save:
+        load_desc = f"concurrency={args.concurrency}x{args.workers}" if args.mode == 'closed' \
+            else f"rate={args.rate:g}/s"
+        env = {
+            "target": args.url or "in-process",
+            "path": args.path,
+            "mode": f"distributed {args.mode}-loop",
+            "workers": len(coordinator.workers),
+            "concurrency": (args.concurrency if args.mode == 'closed' else args.max_workers) * args.workers,
+            "description": f"{args.workers} workers {args.mode}-loop {load_desc}",
+        }
+        if args.mode == 'open':
+            env["rate"] = args.rate
+        run = build_run(args.build_id, summary, env, sketches={"latency": coordinator.sketch.to_dict()})
+        output_path = append_run(args.output, run, TOOL_NAME, TOOL_DESCRIPTION, METRICS_SCHEMA)
+        print(f"Run appended to {output_path}")
+    return 0 if coordinator.sketch.count and not failed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
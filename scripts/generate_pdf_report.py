@@ -1,17 +1,68 @@
 #!/usr/bin/env python3
 """
 PDF Report Generator for Test Results
+Renders directly from tests/reports/junit.xml and the LLM report model; the
+weasyprint conversion of the pytest-html page is kept behind --from-html
 """
+import argparse
 import os
 import sys
+import time
 from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from structured_pdf import generate_structured_pdf, load_report_model
+
 try:
     from weasyprint import HTML, CSS
     from weasyprint.text.fonts import FontConfiguration
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
-    print("Warning: weasyprint not available, PDF generation disabled")
+
+JUNIT_FILE = "tests/reports/junit.xml"
+HTML_FILE = "tests/reports/test_report.html"
+PDF_FILE = "tests/reports/test_report.pdf"
+
+def render_llm_section(model):
+    """Static HTML for the PDF: model tables plus bar geometry, no JavaScript"""
+    parts = ['<html><head><meta charset="UTF-8"></head><body><h1>LLM Test Results</h1>']
+    for tool in model.tools:
+        parts.append(f'<h2>{tool.tool}</h2><p>{tool.description}</p>')
+        headers = ['Build ID', 'Date'] + [column.header for column in tool.columns]
+        parts.append('<table><thead><tr>' + ''.join(f'<th>{h}</th>' for h in headers) + '</tr></thead><tbody>')
+        for row in tool.rows:
+            cells = [row.build_id, row.date] + [cell if cell is not None else 'N/A' for cell in row.cells]
+            parts.append('<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>')
+        if tool.merged:
+            cells = ['Merged', f'{tool.merged.run_count} runs'] + \
+                    [cell if cell is not None else '-' for cell in tool.merged.cells]
+            parts.append('<tr>' + ''.join(f'<td><b>{cell}</b></td>' for cell in cells) + '</tr>')
+        parts.append('</tbody></table>')
+        for chart in tool.charts:
+            parts.append(f'<h3>{chart.title}</h3><table class="llm-bars">')
+            for label, formatted, height in zip(chart.labels, chart.formatted, chart.heights):
+                parts.append(f'<tr><td>{label}</td><td><div class="llm-bar" style="width: {height:.1f}%"></div></td>'
+                             f'<td>{formatted}</td></tr>')
+            parts.append('</table>')
+    parts.append(f'<p class="timestamp">LLM data computed at {model.generated_at}</p></body></html>')
+    return ''.join(parts)
+
+
+def generate_pdf_from_junit(junit_file=JUNIT_FILE, pdf_file=PDF_FILE, workers=None):
+    """Render the PDF straight from junit.xml and the LLM report model"""
+    print(f"Generating PDF report from {junit_file}")
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(pdf_file), exist_ok=True)
+    pages = generate_structured_pdf(junit_file, pdf_file, load_report_model(), workers)
+    print(f"PDF report generated successfully: {pdf_file} ({pages} pages, "
+          f"{time.perf_counter() - started:.2f}s)")
+    return True
+
 
 def generate_pdf_report():
     """Generate PDF report from HTML test results"""
@@ -21,8 +72,8 @@ def generate_pdf_report():
     
     try:
         # 检查HTML报告是否存在
-        html_file = "tests/reports/test_report.html"
-        pdf_file = "tests/reports/test_report.pdf"
+        html_file = HTML_FILE
+        pdf_file = PDF_FILE
         
         if not os.path.exists(html_file):
             print(f"HTML report not found: {html_file}")
@@ -121,80 +172,70 @@ def generate_pdf_report():
             font-size: 10px;
             text-align: right;
         }
+        
+        /* LLM 部分由报告模型直接渲染，隐藏 HTML 报告中依赖 JavaScript 的版本 */
+        .llm-test-report {
+            display: none;
+        }
+        
+        .llm-bars td {
+            border: none;
+            padding: 2px 4px;
+        }
+        
+        .llm-bar {
+            height: 8px;
+            background-color: #2dae7d;
+        }
         """
         
         font_config = FontConfiguration()
         
-        # 生成PDF
-        HTML(filename=html_file).write_pdf(
-            pdf_file,
-            stylesheets=[CSS(string=css_content, font_config=font_config)],
-            font_config=font_config
-        )
+        stylesheets = [CSS(string=css_content, font_config=font_config)]
+        
+        # 生成PDF：测试结果页 + 由报告模型渲染的 LLM 数据页
+        document = HTML(filename=html_file).render(stylesheets=stylesheets, font_config=font_config)
+        pages = list(document.pages)
+        model = load_report_model()
+        if model is not None and model.tools:
+            llm_document = HTML(string=render_llm_section(model)).render(
+                stylesheets=stylesheets, font_config=font_config)
+            pages.extend(llm_document.pages)
+        document.copy(pages).write_pdf(pdf_file)
         
         print(f"PDF report generated successfully: {pdf_file}")
         return True
         
     except Exception as e:
         print(f"Error generating PDF report: {e}")
-        # 尝试创建一个简单的PDF报告作为备选
-        try:
-            create_simple_pdf_report(pdf_file)
-            return True
-        except Exception as fallback_error:
-            print(f"Fallback PDF generation also failed: {fallback_error}")
-            return False
-
-def create_simple_pdf_report(pdf_file):
-    """创建一个简单的PDF报告作为备选方案"""
-    print("Creating a simple fallback PDF report...")
-    
-    # 创建一个简单的HTML报告
-    fallback_html = f"""
-    <html>
-    <head>
-        <title>Test Report</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 20px; }}
-            h1 {{ color: #2c3e50; }}
-            .timestamp {{ color: #7f8c8d; font-size: 12px; }}
-        </style>
-    </head>
-    <body>
-        <h1>Test Report</h1>
-        <div class="timestamp">Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
-        <p>Test report was generated successfully.</p>
-        <p>Please check the original HTML report for complete details.</p>
-    </body>
-    </html>
-    """
-    
-    # 临时保存HTML
-    temp_html = "temp_fallback_report.html"
-    with open(temp_html, 'w', encoding='utf-8') as f:
-        f.write(fallback_html)
-    
-    try:
-        from weasyprint import HTML, CSS
-        HTML(temp_html).write_pdf(pdf_file, stylesheets=[CSS(string="""
-            @page {{ size: A4; margin: 1cm; }}
-            body {{ font-family: Arial, sans-serif; font-size: 12px; }}
-        """)])
-        print(f"Fallback PDF report created: {pdf_file}")
-    finally:
-        # 清理临时文件
-        if os.path.exists(temp_html):
-            os.remove(temp_html)
+        return False
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='PDF Report Generator')
+    parser.add_argument('--junit', default=JUNIT_FILE, help='junit.xml written by pytest')
+    parser.add_argument('--output', default=PDF_FILE)
+    parser.add_argument('--workers', type=int, help='Processes rendering sections in parallel')
+    parser.add_argument('--from-html', action='store_true',
+                        help='Convert the pytest-html report with weasyprint instead')
+    args = parser.parse_args()
+
     print(f"PDF Report Generator - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # 确保目录存在
     os.makedirs("tests/reports", exist_ok=True)
     
-    success = generate_pdf_report()
+    if args.from_html or not os.path.exists(args.junit):
+        if not args.from_html:
+            print(f"{args.junit} not found, falling back to the HTML report")
+        success = generate_pdf_report()
+    else:
+        try:
+            success = generate_pdf_from_junit(args.junit, args.output, args.workers)
+        except Exception as e:
+            print(f"Error generating PDF report: {e}")
+            success = False
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
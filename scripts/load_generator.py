@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Load generator for the Hello World service
+Drives the service in-process through the WSGI app or over HTTP with pooled
+keep-alive connections, in closed-loop (fixed concurrency) or open-loop
+(Poisson arrivals) mode, and records the result as a run in the
+llm_testing data format so LLMReportGenerator trends it with the rest
+"""
+import argparse
+import http.client
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from llm_testing.framework.runs import append_run, build_run, default_build_id
+from llm_testing.framework.sketch import LatencySketch
+
+DEFAULT_OUTPUT = ROOT_DIR / "llm_testing" / "data" / "service_load.json"
+
+TOOL_NAME = "ServiceLoad"
+TOOL_DESCRIPTION = "HTTP load test of the Hello World service"
+
+METRICS_SCHEMA = [
+    {
+        "name": "avg_latency",
+        "display_name": "Average Latency",
+        "unit": "ms",
+        "description": "Mean request latency",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": "line",
+        "sketch": "latency",
+        "statistic": "mean"
+    },
+    {
+        "name": "p50_latency",
+        "display_name": "50th Percentile Latency",
+        "unit": "ms",
+        "description": "Median request latency",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": "line",
+        "sketch": "latency",
+        "statistic": "p50"
+    },
+    {
+        "name": "p95_latency",
+        "display_name": "95th Percentile Latency",
+        "unit": "ms",
+        "description": "95% of requests finish within this time",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": "line",
+        "sketch": "latency",
+        "statistic": "p95"
+    },
+    {
+        "name": "p99_latency",
+        "display_name": "99th Percentile Latency",
+        "unit": "ms",
+        "description": "99% of requests finish within this time",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": "line",
+        "sketch": "latency",
+        "statistic": "p99"
+    },
+    {
+        "name": "requests_per_second",
+        "display_name": "Requests per Second",
+        "unit": "req/s",
+        "description": "Completed requests per second",
+        "lower_is_better": False,
+        "format": "{:.2f}",
+        "default_chart_type": "bar"
+    },
+    {
+        "name": "error_rate",
+        "display_name": "Error Rate",
+        "unit": "%",
+        "description": "Share of requests that failed or returned a non-2xx status",
+        "lower_is_better": True,
+        "format": "{:.2f}",
+        "default_chart_type": None
+    }
+]
+
+
+class InProcessTarget:
+    """Calls the Flask WSGI app directly, one test client per thread"""
+
+    def __init__(self, app=None):
+        if app is None:
+            from app import app
+        self.app = app
+        self.name = "in-process"
+        self._local = threading.local()
+
+    def request(self, method, path):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method)
+        response.close()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class HTTPTarget:
+    """Sends requests over HTTP, keeping one keep-alive connection per thread"""
+
+    def __init__(self, base_url, timeout=10.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.name = base_url
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def request(self, method, path):
+        conn = self._connection()
+        try:
+            conn.request(method, self.prefix + path, headers={'Connection': 'keep-alive'})
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            # 连接失效时丢弃，下次请求重新建立
+            conn.close()
+            self._local.conn = None
+            raise
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class LoadResult:
+    """Latency sketch and error count collected during one load test
+
+    Latencies go straight into a mergeable sketch as each request completes,
+    so memory stays bounded however long the run is. A second sketch holds
+    what was recorded since the last :meth:`take`, for interim progress.
+    """
+
+    def __init__(self):
+        self.sketch = LatencySketch()
+        self.errors = 0
+        self.duration = 0.0
+        self._lock = threading.Lock()
+        self._interval = LatencySketch()
+        self._interval_errors = 0
+
+    def record(self, latency):
+        """Record one request: its latency in ms, or None for a failure"""
+        with self._lock:
+            if latency is None:
+                self.errors += 1
+                self._interval_errors += 1
+            else:
+                self.sketch.add(latency)
+                self._interval.add(latency)
+
+    def take(self):
+        """Sketch and error count recorded since the previous call"""
+        with self._lock:
+            sketch, errors = self._interval, self._interval_errors
+            self._interval = LatencySketch()
+            self._interval_errors = 0
+        return sketch, errors
+
+    @property
+    def total(self):
+        return self.sketch.count + self.errors
+
+    def summary(self):
+        """Compute the metrics recorded for a run"""
+        return {
+            "avg_latency": self.sketch.mean,
+            "p50_latency": self.sketch.quantile(50),
+            "p95_latency": self.sketch.quantile(95),
+            "p99_latency": self.sketch.quantile(99),
+            "requests_per_second": self.sketch.count / self.duration if self.duration > 0 else 0.0,
+            "error_rate": 100.0 * self.errors / self.total if self.total else 0.0,
+        }
+
+    def sketches(self):
+        """Mergeable latency sketch so runs from several generators can be combined"""
+        return {"latency": self.sketch.to_dict()}
+
+
+def timed_request(target, method, path, start):
+    """Send one request; returns latency in ms or None on failure"""
+    try:
+        status = target.request(method, path)
+    except Exception:
+        return None
+    if not 200 <= status < 300:
+        return None
+    return (time.perf_counter() - start) * 1000
+
+
+def run_closed_loop(target, concurrency, duration, method='GET', path='/hello', max_requests=None,
+                    result=None):
+    """Each of ``concurrency`` workers sends the next request as soon as the previous returns"""
+    result = result or LoadResult()
+    deadline = time.perf_counter() + duration
+    budget = [max_requests]
+    budget_lock = threading.Lock()
+
+    def worker():
+        while time.perf_counter() < deadline:
+            if max_requests is not None:
+                with budget_lock:
+                    if budget[0] <= 0:
+                        break
+                    budget[0] -= 1
+            # 每个请求完成即记录，运行中的中间结果（分布式 worker 的进度上报）才完整
+            result.record(timed_request(target, method, path, time.perf_counter()))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    result.duration = time.perf_counter() - started
+    return result
+
+
+def run_open_loop(target, rate, duration, method='GET', path='/hello', max_workers=64, seed=None,
+                  result=None):
+    """Send requests at Poisson-distributed arrival times regardless of completions
+
+    Latency is measured from each request's scheduled arrival, so time spent
+    waiting for a free worker counts against the service (no coordinated
+    omission).
+    """
+    result = result or LoadResult()
+    rng = random.Random(seed)
+
+    def fire(scheduled):
+        result.record(timed_request(target, method, path, scheduled))
+
+    started = time.perf_counter()
+    end = started + duration
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        next_arrival = started + rng.expovariate(rate)
+        while next_arrival < end:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, next_arrival)
+            next_arrival += rng.expovariate(rate)
+    result.duration = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Closed/open-loop load generator for the Hello World service')
+    parser.add_argument('--url', help='Base URL of a running service; omit to drive the WSGI app in-process')
+    parser.add_argument('--path', default='/hello')
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--mode', choices=['closed', 'open'], default='closed')
+    parser.add_argument('--concurrency', type=int, default=8, help='Workers in closed-loop mode')
+    parser.add_argument('--rate', type=float, default=100.0, help='Mean arrivals per second in open-loop mode')
+    parser.add_argument('--max-workers', type=int, default=64, help='Worker pool size in open-loop mode')
+    parser.add_argument('--duration', type=float, default=10.0, help='Test duration in seconds')
+    parser.add_argument('--build-id', default=default_build_id())
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='Tool data file to append the run to')
+    parser.add_argument('--no-save', action='store_true', help='Only print the summary')
+    args = parser.parse_args()
+
+    target = HTTPTarget(args.url) if args.url else InProcessTarget()
+    print(f"Running {args.mode}-loop load against {target.name}{args.path} for {args.duration}s ...")
+    try:
+        if args.mode == 'closed':
+            result = run_closed_loop(target, args.concurrency, args.duration, args.method, args.path)
+            load_desc = f"concurrency={args.concurrency}"
+        else:
+            result = run_open_loop(target, args.rate, args.duration, args.method, args.path, args.max_workers)
+            load_desc = f"rate={args.rate:g}/s"
+    finally:
+        target.close()
+
+    summary = result.summary()
+    print(f"Requests: {result.total}  Errors: {result.errors}  Duration: {result.duration:.2f}s")
+    print(f"RPS: {summary['requests_per_second']:.2f}")
+    print(f"Latency ms  avg={summary['avg_latency']:.2f}  p50={summary['p50_latency']:.2f}  "
+          f"p95={summary['p95_latency']:.2f}  p99={summary['p99_latency']:.2f}")
+
+    if not args.no_save:
+        env = {
+            "target": target.name,
+            "path": args.path,
+            "mode": f"{args.mode}-loop",
+            "concurrency": args.concurrency if args.mode == 'closed' else args.max_workers,
+            "description": f"{args.mode}-loop {load_desc}",
+        }
+        if args.mode == 'open':
+            env["rate"] = args.rate
+        run = build_run(args.build_id, summary, env, sketches=result.sketches())
+        output_path = append_run(args.output, run, TOOL_NAME, TOOL_DESCRIPTION, METRICS_SCHEMA)
+        print(f"Run appended to {output_path}")
+    return 0 if result.total and result.errors < result.total else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Merge the outputs of sharded pytest runs
+Each shard writes junit.xml, test_report.html and allure-results/ under
+tests/reports/shard-<index>/. This script streams the junit files into one
+tests/reports/junit.xml, copies the allure results into one directory and
+merges the pytest-html reports into one tests/reports/test_report.html (an
+index linking the shard reports when they cannot be merged), so the PDF,
+Allure and trend steps keep reading their usual paths. With
+``--suite-profile`` the shards' suite_profile.json files are folded into one
+run of that data file per build.
+"""
+
+import argparse
+import glob
+import html
+import json
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+from xml.etree.ElementTree import ParseError, iterparse, tostring
+from xml.sax.saxutils import quoteattr
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+
+DEFAULT_REPORTS_DIR = "tests/reports"
+SHARD_PATTERN = "shard-*"
+COUNTERS = ("tests", "errors", "failures", "skipped")
+SHARD_PROFILE = "suite_profile.json"
+
+# pytest-html 4 把全部结果以 JSON 存在 data-container 的属性里，页面由脚本渲染；
+# 摘要中的计数与筛选框则是静态 HTML
+HTML_DATA_PATTERN = re.compile(r'(<div id="data-container" data-jsonblob=")([^"]*)(")')
+HTML_OUTCOMES = ("failed", "passed", "skipped", "xfailed", "xpassed", "error", "rerun")
+
+
+def suite_totals(junit_file):
+    """Counters of every <testsuite> in a junit file, read from the start tags only"""
+    totals = dict.fromkeys(COUNTERS, 0)
+    totals["time"] = 0.0
+    timestamp = None
+    for _, elem in iterparse(junit_file, events=("start",)):
+        if elem.tag == "testsuite":
+            for name in COUNTERS:
+                totals[name] += int(elem.get(name) or 0)
+            totals["time"] += float(elem.get("time") or 0)
+            timestamp = min(filter(None, (timestamp, elem.get("timestamp"))), default=None)
+    return totals, timestamp
+
+
+def merge_junit(junit_files, output_file):
+    """Stream the test cases of all shards into one <testsuite>; returns per-shard totals"""
+    shard_totals = []
+    timestamps = []
+    for junit_file in junit_files:
+        totals, timestamp = suite_totals(junit_file)
+        shard_totals.append(totals)
+        if timestamp:
+            timestamps.append(timestamp)
+
+    merged = {name: sum(totals[name] for totals in shard_totals) for name in COUNTERS}
+    # 各分片并行执行，墙钟时间取最慢的分片
+    wall_time = max((totals["time"] for totals in shard_totals), default=0.0)
+    attributes = " ".join(f'{name}="{merged[name]}"' for name in COUNTERS)
+    timestamp = f' timestamp={quoteattr(min(timestamps))}' if timestamps else ""
+
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        out.write('<?xml version="1.0" encoding="utf-8"?>\n<testsuites>')
+        out.write(f'<testsuite name="pytest" {attributes} time="{wall_time:.3f}"{timestamp}>')
+        for junit_file in junit_files:
+            for _, elem in iterparse(junit_file, events=("end",)):
+                if elem.tag == "testcase":
+                    elem.tail = None
+                    out.write(tostring(elem, encoding="unicode"))
+                    elem.clear()
+        out.write('</testsuite></testsuites>\n')
+    os.replace(tmp_path, output_path)
+    return shard_totals
+
+
+def merge_allure(results_dirs, output_dir):
+    """Copy every shard's allure results into one directory; file names are uuids"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    copied = 0
+    for results_dir in results_dirs:
+        for entry in os.scandir(results_dir):
+            if entry.is_file():
+                shutil.copy2(entry.path, output_dir / entry.name)
+                copied += 1
+    return copied
+
+
+def read_html_data(report_file):
+    """(page, results JSON) of a pytest-html 4 report; results are None for other pages"""
+    with open(report_file, 'r', encoding='utf-8') as f:
+        page = f.read()
+    match = HTML_DATA_PATTERN.search(page)
+    if not match:
+        return page, None
+    try:
+        return page, json.loads(html.unescape(match.group(2)))
+    except ValueError:
+        return page, None
+
+
+def format_html_duration(seconds):
+    # 与 pytest-html 的写法一致：不足 1 秒用毫秒，否则 HH:MM:SS
+    if seconds < 1:
+        return f"{round(seconds * 1000)} ms"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def merge_html_reports(report_files, output_file, wall_time):
+    """Merge pytest-html reports into one; returns the number of tests, or None if a report is not mergeable"""
+    page, merged = None, None
+    for report_file in report_files:
+        shard_page, data = read_html_data(report_file)
+        if data is None:
+            return None
+        if merged is None:
+            page, merged = shard_page, data
+        else:
+            merged["tests"].update(data.get("tests", {}))
+    if merged is None:
+        return None
+
+    counts = dict.fromkeys(HTML_OUTCOMES, 0)
+    for results in merged["tests"].values():
+        for result in results:
+            outcome = result.get("result", "").lower()
+            if outcome in counts:
+                counts[outcome] += 1
+    total = sum(count for outcome, count in counts.items() if outcome != "rerun")
+
+    blob = html.escape(json.dumps(merged), quote=True)
+    page = HTML_DATA_PATTERN.sub(lambda match: match.group(1) + blob + match.group(3), page, count=1)
+    page = re.sub(r'<p class="run-count">[^<]*</p>',
+                  f'<p class="run-count">{total} {"test" if total == 1 else "tests"} took '
+                  f'{format_html_duration(wall_time)}.</p>', page, count=1)
+    for outcome, count in counts.items():
+        page = re.sub(rf'(<span class="{outcome}">)\d+', rf'\g<1>{count}', page, count=1)
+        page = re.sub(rf'(data-test-result="{outcome}")\s*(disabled)?/>',
+                      rf'\1 {"" if count else "disabled"}/>', page, count=1)
+
+    tmp_path = Path(output_file).with_suffix('.html.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    os.replace(tmp_path, output_file)
+    return total
+
+
+def write_html_index(shards, output_file):
+    """Index page linking every shard's pytest-html report with its counts"""
+    output_dir = Path(output_file).parent
+    rows = []
+    for shard_dir, totals in shards:
+        report = shard_dir / "test_report.html"
+        name = html.escape(shard_dir.name)
+        link = (f'<a href="{html.escape(os.path.relpath(report, output_dir))}">{name}</a>'
+                if report.exists() else name)
+        passed = totals["tests"] - totals["failures"] - totals["errors"] - totals["skipped"]
+        rows.append(f'<tr><td>{link}</td><td>{totals["tests"]}</td><td>{passed}</td>'
+                    f'<td>{totals["failures"]}</td><td>{totals["errors"]}</td>'
+                    f'<td>{totals["skipped"]}</td><td>{totals["time"]:.2f}s</td></tr>')
+
+    html_content = f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Test Report</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        table {{ border-collapse: collapse; }}
+        th, td {{ border: 1px solid #ddd; padding: 6px 12px; text-align: right; }}
+        th {{ background-color: #f2f2f2; }}
+        td:first-child {{ text-align: left; }}
+    </style>
+</head>
+<body>
+    <h1>Test Report</h1>
+    <p>测试按历史耗时分为 {len(shards)} 个分片并行执行，详细结果见各分片报告。</p>
+    <table>
+        <thead><tr><th>Shard</th><th>Tests</th><th>Passed</th><th>Failed</th><th>Errors</th><th>Skipped</th><th>Time</th></tr></thead>
+        <tbody>{"".join(rows)}</tbody>
+    </table>
+</body>
+</html>"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    return output_file
+
+
+def merge_shards(reports_dir=DEFAULT_REPORTS_DIR, suite_profile=None):
+    """Merge every tests/reports/shard-* directory; returns the number of shards"""
+    reports_dir = Path(reports_dir)
+    shard_dirs = sorted(Path(path) for path in glob.glob(str(reports_dir / SHARD_PATTERN)) if os.path.isdir(path))
+    if not shard_dirs:
+        print(f"✗ 没有找到分片目录: {reports_dir / SHARD_PATTERN}")
+        return 0
+
+    with_junit = [shard_dir for shard_dir in shard_dirs if (shard_dir / "junit.xml").exists()]
+    try:
+        totals = merge_junit([shard_dir / "junit.xml" for shard_dir in with_junit], reports_dir / "junit.xml")
+    except ParseError as e:
+        print(f"✗ junit.xml 合并失败: {e}")
+        return 0
+    print(f"✓ 已合并 {len(with_junit)} 个 junit.xml，共 {sum(t['tests'] for t in totals)} 个用例")
+
+    results_dirs = [shard_dir / "allure-results" for shard_dir in shard_dirs
+                    if (shard_dir / "allure-results").is_dir()]
+    copied = merge_allure(results_dirs, reports_dir / "allure-results")
+    print(f"✓ 已合并 {copied} 个 Allure 结果文件")
+
+    html_reports = [shard_dir / "test_report.html" for shard_dir in shard_dirs]
+    merged_tests = None
+    if html_reports and all(report.exists() for report in html_reports):
+        wall_time = max((t["time"] for t in totals), default=0.0)
+        merged_tests = merge_html_reports(html_reports, reports_dir / "test_report.html", wall_time)
+    if merged_tests is not None:
+        print(f"✓ 已合并 {len(html_reports)} 个 HTML 报告，共 {merged_tests} 个用例: {reports_dir / 'test_report.html'}")
+    else:
+        write_html_index(list(zip(with_junit, totals)), reports_dir / "test_report.html")
+        print(f"✓ 分片报告索引: {reports_dir / 'test_report.html'}")
+
+    profiles = [shard_dir / SHARD_PROFILE for shard_dir in shard_dirs if (shard_dir / SHARD_PROFILE).exists()]
+    if suite_profile and profiles:
+        from llm_testing.framework.suite_profile import merge_profiles
+
+        run = merge_profiles(profiles, suite_profile)
+        if run:
+            print(f"✓ 已合并 {len(profiles)} 个分片的套件耗时: {run['metrics']['tests']} 个用例 -> {suite_profile}")
+    return len(shard_dirs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge junit, HTML and Allure outputs of test shards")
+    parser.add_argument("--reports-dir", default=DEFAULT_REPORTS_DIR,
+                        help="directory holding the shard-<index> output directories")
+    parser.add_argument("--suite-profile", default=None, metavar="PATH",
+                        help=f"fold the shards' {SHARD_PROFILE} into one run of this data file")
+    args = parser.parse_args()
+    return 0 if merge_shards(args.reports_dir, args.suite_profile) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
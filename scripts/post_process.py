@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Post-test report pipeline
+Declares the report steps that follow a test run as a dependency graph and
+runs every stage whose dependencies are done concurrently, up to a bounded
+number at a time. A stage is skipped when the hash of its command, its
+input files and its dependencies' hashes matches the previous run and its
+outputs still exist. Per-stage timings are written next to the reports.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+
+CACHE_FILE = "tests/reports/.post_process_cache.json"
+TIMINGS_FILE = "tests/reports/post_process_timings.json"
+DEFAULT_WORKERS = 3
+
+
+@dataclass
+class Stage:
+    name: str
+    command: List[str]
+    deps: List[str] = field(default_factory=list)
+    # 输入文件的 glob；全部未匹配到文件时跳过该阶段，下游照常执行
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    # 命令导入的代码与样式文件的 glob；只参与缓存键，不决定是否跳过
+    sources: List[str] = field(default_factory=list)
+    cwd: Optional[str] = None
+    timeout: float = 600
+
+
+PYTHON = sys.executable
+
+STAGES = [
+    Stage("merge_shards", [PYTHON, "scripts/merge_shards.py", "--suite-profile", "llm_testing/data/pytest_suite.json"],
+          inputs=["tests/reports/shard-*/junit.xml", "tests/reports/shard-*/allure-results/*",
+                  "tests/reports/shard-*/suite_profile.json"],
+          outputs=["tests/reports/junit.xml", "tests/reports/test_report.html"],
+          sources=["llm_testing/framework/*.py"]),
+    # 套件耗时由 merge_shards 写入数据目录，LLM 报告需在其后生成
+    Stage("llm_report", [PYTHON, "generate_report.py"], deps=["merge_shards"], cwd="llm_testing",
+          inputs=["llm_testing/data/*.json"],
+          outputs=["llm_testing/reports/llm_eval_report.html", "llm_testing/reports/llm_report_model.json"],
+          sources=["llm_testing/framework/*.py", "llm_testing/reports/*.css"]),
+    Stage("allure_report", [PYTHON, "scripts/allure_trends.py", "--generate"], deps=["merge_shards"],
+          inputs=["tests/reports/allure-results/*"],
+          outputs=["tests/reports/allure-report/history/history-trend.json"]),
+    Stage("pdf_report", [PYTHON, "scripts/generate_pdf_report.py"], deps=["merge_shards", "llm_report"],
+          inputs=["tests/reports/junit.xml", "llm_testing/reports/llm_report_model.json"],
+          outputs=["tests/reports/test_report.pdf"],
+          sources=["scripts/structured_pdf.py", "llm_testing/framework/*.py"]),
+]
+
+
+def check_graph(stages):
+    """Reject unknown dependencies and cycles; returns stages by name"""
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through stage '{name}'")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in by_name:
+        visit(name)
+    return by_name
+
+
+def glob_files(patterns, root):
+    files = set()
+    for pattern in patterns:
+        files.update(path for path in glob.glob(os.path.join(root, pattern), recursive=True)
+                     if os.path.isfile(path))
+    return sorted(files)
+
+
+def input_files(stage, root):
+    return glob_files(stage.inputs, root)
+
+
+def script_file(stage, root):
+    """The script a stage runs (``command[1]``), when it is a file under the stage's directory"""
+    if len(stage.command) < 2:
+        return None
+    path = os.path.join(root, stage.cwd or '', stage.command[1])
+    return path if os.path.isfile(path) else None
+
+
+def stage_key(stage, files, dep_keys, root='.'):
+    """Hash of the command, the code it runs, every input file and the dependencies' keys"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([stage.command[1:], stage.cwd, dep_keys]).encode('utf-8'))
+    # 脚本及其导入的模块、样式修改后也需重新执行
+    script = script_file(stage, root)
+    code = sorted(set(([script] if script else []) + glob_files(stage.sources, root)))
+    for path in code + files:
+        digest.update(path.encode('utf-8'))
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def run_stage(stage, root):
+    """Run one stage's command; returns (exit code, output)"""
+    try:
+        result = subprocess.run(stage.command, cwd=os.path.join(root, stage.cwd or ""),
+                                capture_output=True, text=True, timeout=stage.timeout)
+        return result.returncode, result.stdout + result.stderr
+    except subprocess.TimeoutExpired:
+        return -1, f"timed out after {stage.timeout}s"
+    except OSError as e:
+        return -1, str(e)
+
+
+def run_pipeline(stages=None, root=".", workers=DEFAULT_WORKERS, use_cache=True,
+                 cache_file=CACHE_FILE, timings_file=TIMINGS_FILE):
+    """Run the stage graph; returns {stage: timing entry}
+
+    Each entry has ``status`` (``ran``, ``cached``, ``no-input``, ``failed``
+    or ``skipped`` when a dependency failed), ``seconds`` and ``started``
+    relative to the pipeline start.
+    """
+    stages = check_graph(stages or STAGES)
+    cache_path = os.path.join(root, cache_file)
+    cache = load_cache(cache_path) if use_cache else {}
+    keys, timings = {}, {}
+    pending = dict(stages)
+    running = {}
+    pipeline_start = time.perf_counter()
+
+    def finish(name, status, started, output=""):
+        timings[name] = {
+            "status": status,
+            "started": round(started - pipeline_start, 3),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        mark = "✓" if status in ("ran", "cached", "no-input") else "✗"
+        print(f"{mark} {name}: {status} ({timings[name]['seconds']:.2f}s)")
+        if status == "failed" and output:
+            print(output.rstrip()[-2000:])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            # 依赖全部结束的阶段才能调度；依赖失败则跳过
+            for name, stage in list(pending.items()):
+                if any(dep not in timings for dep in stage.deps):
+                    continue
+                del pending[name]
+                started = time.perf_counter()
+                if any(timings[dep]["status"] in ("failed", "skipped") for dep in stage.deps):
+                    finish(name, "skipped", started)
+                    continue
+                files = input_files(stage, root)
+                if stage.inputs and not files:
+                    finish(name, "no-input", started)
+                    continue
+                keys[name] = stage_key(stage, files, [keys.get(dep) for dep in stage.deps], root)
+                outputs_exist = all(os.path.exists(os.path.join(root, output)) for output in stage.outputs)
+                if cache.get(name) == keys[name] and outputs_exist:
+                    finish(name, "cached", started)
+                    continue
+                running[executor.submit(run_stage, stage, root)] = (name, started)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, started = running.pop(future)
+                code, output = future.result()
+                if code == 0:
+                    cache[name] = keys[name]
+                    finish(name, "ran", started)
+                else:
+                    cache.pop(name, None)
+                    finish(name, "failed", started, output)
+
+    total = time.perf_counter() - pipeline_start
+    if use_cache:
+        write_json(cache_path, cache)
+    write_json(os.path.join(root, timings_file), {"total_seconds": round(total, 3), "stages": timings})
+    print(f"报告后处理完成，用时 {total:.2f}s（各阶段串行合计 "
+          f"{sum(entry['seconds'] for entry in timings.values()):.2f}s）")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the post-test report stages as a dependency graph")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="stages running at the same time")
+    parser.add_argument("--no-cache", action="store_true", help="run every stage even if its inputs are unchanged")
+    parser.add_argument("--only", nargs="+", metavar="STAGE", help="run only these stages and their dependencies")
+    args = parser.parse_args()
+
+    stages = STAGES
+    if args.only:
+        by_name = check_graph(STAGES)
+        selected = set()
+
+        def select(name):
+            if name not in by_name:
+                parser.error(f"unknown stage '{name}'")
+            if name not in selected:
+                selected.add(name)
+                for dep in by_name[name].deps:
+                    select(dep)
+
+        for name in args.only:
+            select(name)
+        stages = [stage for stage in STAGES if stage.name in selected]
+
+    timings = run_pipeline(stages, workers=args.workers, use_cache=not args.no_cache)
+    return 1 if any(entry["status"] == "failed" for entry in timings.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
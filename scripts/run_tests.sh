@@ -18,24 +18,32 @@ mkdir -p tests/reports allure-results logs
 
 # 启动服务
 echo "Starting test environment..."
+# 服务预热完成后写入就绪文件（通过卷挂载到 tests/reports/run）
+ready_file="tests/reports/run/app.ready"
+mkdir -p tests/reports/run
+rm -f "$ready_file"
+service_url=${SERVICE_URL:-http://localhost:8080}
+start_ms=$(date +%s%3N)
 docker-compose -f docker-compose.test.yml up -d
 
 echo "Waiting for service to be ready..."
-timeout=300
-interval=5
-elapsed=0
-
-while [ $elapsed -lt $timeout ]; do
-    if curl -f http://localhost:5000/health >/dev/null 2>&1; then
-        echo -e "${GREEN}Service is ready!${NC}"
+timeout_ms=300000
+ready=0
+while [ $(( $(date +%s%3N) - start_ms )) -lt $timeout_ms ]; do
+    # 就绪文件由服务主动写入；/readyz 作为兜底，两者都只需短间隔检查
+    if [ -f "$ready_file" ] || curl -sf "${service_url}/readyz" >/dev/null 2>&1; then
+        ready=1
         break
     fi
-    echo "Waiting for service... ($elapsed/$timeout seconds)"
-    sleep $interval
-    elapsed=$((elapsed + interval))
+    sleep 0.1
 done
 
-if [ $elapsed -ge $timeout ]; then
+if [ $ready -eq 1 ]; then
+    echo -e "${GREEN}Service is ready after $(( $(date +%s%3N) - start_ms )) ms${NC}"
+    if [ -f "$ready_file" ]; then
+        echo "Service startup: $(cat "$ready_file")"
+    fi
+else
     echo -e "${RED}Service failed to start within timeout period${NC}"
     docker-compose -f docker-compose.test.yml logs
     exit 1
@@ -45,12 +53,32 @@ fi
 echo "Running tests..."
 test_start_time=$(date +%s)
 
-if docker-compose -f docker-compose.test.yml run --rm test pytest; then
+# 按上次 junit.xml 中的耗时把用例分到 TEST_SHARDS 个分片，各分片在独立容器中并行执行
+shards=${TEST_SHARDS:-2}
+pids=()
+for ((index = 0; index < shards; index++)); do
+    shard_dir="tests/reports/shard-${index}"
+    rm -rf "$shard_dir"
+    docker-compose -f docker-compose.test.yml run --rm test pytest \
+        -p llm_testing.framework.sharding --shards "$shards" --shard-index "$index" \
+        --shard-durations tests/reports/junit.xml \
+        -p llm_testing.framework.suite_profile --suite-profile="${shard_dir}/suite_profile.json" \
+        --junit-xml="${shard_dir}/junit.xml" --html="${shard_dir}/test_report.html" \
+        --alluredir="${shard_dir}/allure-results" &
+    pids+=($!)
+done
+
+test_result=0
+for pid in "${pids[@]}"; do
+    if ! wait "$pid"; then
+        test_result=1
+    fi
+done
+
+if [ $test_result -eq 0 ]; then
     echo -e "${GREEN}All tests passed!${NC}"
-    test_result=0
 else
     echo -e "${RED}Some tests failed!${NC}"
-    test_result=1
 fi
 
 test_end_time=$(date +%s)
@@ -58,28 +86,21 @@ test_duration=$((test_end_time - test_start_time))
 
 echo "Test execution time: ${test_duration} seconds"
 
-# 生成Allure报告
-echo "Generating Allure report..."
-if command -v allure >/dev/null 2>&1; then
-    allure generate allure-results -o allure-report --clean
-    echo -e "${GREEN}Allure report generated${NC}"
-else
-    echo -e "${YELLOW}Allure command not found, skipping report generation${NC}"
-fi
-
-# 生成PDF报告
-echo "Generating PDF report..."
-if python scripts/generate_pdf_report.py; then
-    echo -e "${GREEN}PDF report generated${NC}"
+# 报告后处理：合并分片输出、Allure、LLM 报告与 PDF 按依赖关系并行生成
+echo "Generating reports..."
+if python scripts/post_process.py; then
+    echo -e "${GREEN}Reports generated${NC}"
 else
-    echo -e "${YELLOW}PDF report generation failed${NC}"
+    echo -e "${YELLOW}Some report stages failed, see tests/reports/post_process_timings.json${NC}"
 fi
 
 # 显示测试摘要
 echo "===== Test Summary ====="
 echo "Test Duration: ${test_duration} seconds"
 echo "HTML Report: tests/reports/test_report.html"
-echo "Allure Results: allure-results/"
+echo "Allure Report: tests/reports/allure-report/"
+echo "LLM Report: llm_testing/reports/llm_eval_report.html"
+echo "Stage Timings: tests/reports/post_process_timings.json"
 echo "PDF Report: tests/reports/test_report.pdf"
 
 # 清理
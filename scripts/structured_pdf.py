@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Structured PDF report
+Renders the PDF straight from junit.xml and the LLM report model instead of
+converting the pytest-html page. junit.xml is streamed with iterparse, test
+cases are laid out in fixed-size chunks, and independent sections render in
+parallel worker processes. Finished page streams are written to the file as
+they arrive, so memory stays flat however many tests the suite has.
+"""
+import heapq
+import os
+import sys
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+PAGE_WIDTH, PAGE_HEIGHT = 595.28, 841.89  # A4，单位 pt
+MARGIN = 42
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+FONTS = {"regular": ("F1", "Helvetica"), "bold": ("F2", "Helvetica-Bold"), "mono": ("F3", "Courier")}
+# WinAnsi 无法表示的字符（中文描述、标题等）改用 Adobe 预定义的 CJK 字体，
+# 文本以 UCS-2 编码写出，并附带 ToUnicode 以便复制与检索
+CJK_FONT = ("F4", "STSong-Light", "UniGB-UCS2-H")
+CJK_WIDTH = 1.0
+
+STATUS_COLORS = {
+    "passed": (0.15, 0.55, 0.33),
+    "failed": (0.80, 0.16, 0.16),
+    "error": (0.55, 0.05, 0.05),
+    "skipped": (0.85, 0.55, 0.05),
+}
+
+CHUNK_SIZE = 500
+MAX_FAILURE_DETAILS = 200
+MAX_DETAIL_LINES = 40
+SLOWEST_COUNT = 25
+
+SECTION_ORDER = ("summary", "failures", "slowest", "llm", "tests")
+
+
+def is_winansi(char):
+    try:
+        char.encode('cp1252')
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def pdf_text(value):
+    """Escape text for a PDF literal string (WinAnsi, unsupported characters become '?')"""
+    text = str(value).encode('cp1252', 'replace').decode('cp1252')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def text_runs(text):
+    """Split text into (is_cjk, segment) runs: WinAnsi text and text for the CJK font"""
+    runs = []
+    for char in str(text):
+        # UCS-2 只覆盖基本平面，其余字符仍以 '?' 显示
+        cjk = not is_winansi(char) and ord(char) <= 0xFFFF
+        if runs and runs[-1][0] == cjk:
+            runs[-1][1].append(char)
+        else:
+            runs.append((cjk, [char]))
+    return [(cjk, ''.join(chars)) for cjk, chars in runs]
+
+
+def cjk_hex(text):
+    return text.encode('utf-16-be').hex().upper()
+
+
+def char_width(char, size, font="regular"):
+    # Courier 等宽；Helvetica 用平均字宽近似，偏保守以免溢出；CJK 字符为全角
+    if ord(char) > 0xFF and not is_winansi(char):
+        return size * CJK_WIDTH
+    return size * (0.6 if font == "mono" else 0.54)
+
+
+def text_width(text, size, font="regular"):
+    return sum(char_width(char, size, font) for char in str(text))
+
+
+def fit(text, width, size, font="regular"):
+    text = str(text)
+    if text_width(text, size, font) <= width:
+        return text
+    limit = width - char_width('~', size, font)
+    used = 0.0
+    for index, char in enumerate(text):
+        used += char_width(char, size, font)
+        if used > limit:
+            return text[:max(1, index)] + '~'
+    return text
+
+
+def wrap(text, width, size, font="regular"):
+    lines = []
+    for raw in str(text).splitlines() or ['']:
+        raw = raw.expandtabs(4)
+        start, used = 0, 0.0
+        for index, char in enumerate(raw):
+            advance = char_width(char, size, font)
+            if used + advance > width and index > start:
+                lines.append(raw[start:index])
+                start, used = index, 0.0
+            used += advance
+        lines.append(raw[start:])
+    return lines
+
+
+class PageLayout:
+    """Lays out headings, paragraphs and tables on A4 pages; one content stream per page"""
+
+    def __init__(self):
+        self.pages = []
+        self.ops = None
+        self.y = 0
+
+    def new_page(self):
+        self._flush()
+        self.ops = []
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def _flush(self):
+        if self.ops is not None:
+            self.pages.append(zlib.compress('\n'.join(self.ops).encode('cp1252', 'replace')))
+            self.ops = None
+
+    def ensure(self, height):
+        if self.ops is None or self.y - height < MARGIN + 14:
+            self.new_page()
+
+    def draw_text(self, x, y, text, size=9, font="regular", color=(0, 0, 0)):
+        runs = text_runs(text) or [(False, '')]
+        shows = []
+        for index, (cjk, segment) in enumerate(runs):
+            # 第一段的字体在 Td 之前设置，纯 WinAnsi 文本的输出与之前一致
+            if index:
+                shows.append(f"/{CJK_FONT[0] if cjk else FONTS[font][0]} {size} Tf")
+            shows.append(f"<{cjk_hex(segment)}> Tj" if cjk else f"({pdf_text(segment)}) Tj")
+        first_font = CJK_FONT[0] if runs[0][0] else FONTS[font][0]
+        self.ops.append(f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg BT /{first_font} {size} Tf "
+                        f"{x:.2f} {y:.2f} Td {' '.join(shows)} ET")
+
+    def rect(self, x, y, width, height, color):
+        self.ops.append(f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f")
+
+    def heading(self, text, level=1):
+        size = {1: 16, 2: 12, 3: 10}[level]
+        self.ensure(size * 2.5 + 24)
+        self.y -= size + 4
+        self.draw_text(MARGIN, self.y, fit(text, CONTENT_WIDTH, size, "bold"), size, "bold", (0.17, 0.24, 0.31))
+        if level == 1:
+            self.rect(MARGIN, self.y - 5, CONTENT_WIDTH, 1.2, (0.20, 0.60, 0.86))
+        self.y -= 10
+
+    def paragraph(self, text, size=9, font="regular", color=(0, 0, 0), max_lines=None):
+        lines = wrap(text, CONTENT_WIDTH, size, font)
+        if max_lines and len(lines) > max_lines:
+            lines = lines[:max_lines] + [f"... ({len(lines) - max_lines} more lines)"]
+        for line in lines:
+            self.ensure(size + 3)
+            self.y -= size + 3
+            self.draw_text(MARGIN, self.y, line, size, font, color)
+        self.y -= 4
+
+    def table(self, headers, rows, widths=None, size=7.5, colors=None):
+        """Rows repeat the header after each page break; cells are truncated to fit"""
+        widths = widths or [CONTENT_WIDTH / len(headers)] * len(headers)
+        scale = CONTENT_WIDTH / sum(widths)
+        widths = [w * scale for w in widths]
+        row_height = size + 5
+
+        def header_row():
+            self.ensure(row_height * 2)
+            self.y -= row_height
+            self.rect(MARGIN, self.y - 3, CONTENT_WIDTH, row_height, (0.93, 0.94, 0.95))
+            x = MARGIN
+            for header, width in zip(headers, widths):
+                self.draw_text(x + 2, self.y, fit(header, width - 4, size, "bold"), size, "bold")
+                x += width
+
+        header_row()
+        for index, row in enumerate(rows):
+            if self.y - row_height < MARGIN + 14:
+                self.new_page()
+                header_row()
+            self.y -= row_height
+            if index % 2:
+                self.rect(MARGIN, self.y - 3, CONTENT_WIDTH, row_height, (0.97, 0.97, 0.98))
+            x = MARGIN
+            for column, (cell, width) in enumerate(zip(row, widths)):
+                color = (colors or {}).get((index, column), (0, 0, 0))
+                self.draw_text(x + 2, self.y, fit('' if cell is None else cell, width - 4, size), size,
+                               "regular", color)
+                x += width
+        self.y -= 8
+
+    def bars(self, labels, formatted, heights, size=7.5):
+        """Horizontal bar chart from precomputed percentages"""
+        label_width, value_width = 110, 70
+        bar_width = CONTENT_WIDTH - label_width - value_width
+        for label, value, percent in zip(labels, formatted, heights):
+            self.ensure(size + 6)
+            self.y -= size + 6
+            self.draw_text(MARGIN, self.y, fit(label, label_width - 4, size), size)
+            self.rect(MARGIN + label_width, self.y - 1, bar_width * percent / 100, size, (0.18, 0.68, 0.49))
+            self.draw_text(MARGIN + label_width + bar_width + 4, self.y, value, size)
+        self.y -= 6
+
+    def finish(self):
+        self._flush()
+        return self.pages
+
+
+# ---------------------------------------------------------------- sections
+
+def format_seconds(seconds):
+    return f"{seconds:.3f}s" if seconds < 60 else f"{int(seconds // 60)}m {seconds % 60:.1f}s"
+
+
+def render_summary(summary):
+    layout = PageLayout()
+    layout.heading("Test Report")
+    layout.paragraph(f"Generated on {summary['generated_at']}", 8, color=(0.5, 0.55, 0.55))
+    total = summary['tests']
+    passed = total - summary['failures'] - summary['errors'] - summary['skipped']
+    rate = 100.0 * passed / (total - summary['skipped']) if total - summary['skipped'] else 0.0
+    rows = [
+        ("Total tests", total),
+        ("Passed", passed),
+        ("Failed", summary['failures']),
+        ("Errors", summary['errors']),
+        ("Skipped", summary['skipped']),
+        ("Pass rate", f"{rate:.1f}%"),
+        ("Total test time", format_seconds(summary['time'])),
+    ]
+    colors = {(1, 1): STATUS_COLORS['passed'], (2, 1): STATUS_COLORS['failed'],
+              (3, 1): STATUS_COLORS['error'], (4, 1): STATUS_COLORS['skipped']}
+    layout.table(["Metric", "Value"], rows, [2, 3], size=9, colors=colors)
+
+    if summary['suites']:
+        layout.heading("Test Classes", 2)
+        layout.table(["Class", "Tests", "Failed", "Errors", "Skipped", "Time"],
+                     [(name, *counts[:4], format_seconds(counts[4]))
+                      for name, counts in sorted(summary['suites'].items())],
+                     [6, 1, 1, 1, 1, 1.4])
+    return layout.finish()
+
+
+def render_failures(failures, total_failures):
+    layout = PageLayout()
+    layout.heading("Failures and Errors")
+    if not failures:
+        layout.paragraph("No failing tests.")
+        return layout.finish()
+    for case in failures:
+        layout.heading(f"[{case['status'].upper()}] {case['classname']}::{case['name']}", 3)
+        if case['message']:
+            layout.paragraph(case['message'], 8, color=STATUS_COLORS[case['status']], max_lines=4)
+        if case['detail']:
+            layout.paragraph(case['detail'], 6.5, "mono", (0.2, 0.2, 0.2), max_lines=MAX_DETAIL_LINES)
+    if total_failures > len(failures):
+        layout.paragraph(f"{total_failures - len(failures)} further failures omitted; see junit.xml.", 8)
+    return layout.finish()
+
+
+def render_slowest(slowest):
+    layout = PageLayout()
+    layout.heading(f"Slowest {len(slowest)} Tests")
+    layout.table(["Test", "Status", "Time"],
+                 [(f"{case['classname']}::{case['name']}", case['status'], format_seconds(case['time']))
+                  for case in slowest],
+                 [8, 1, 1.2],
+                 colors={(i, 1): STATUS_COLORS[case['status']] for i, case in enumerate(slowest)})
+    return layout.finish()
+
+
+def render_test_chunk(cases, first):
+    layout = PageLayout()
+    layout.heading("All Test Cases" if first else "All Test Cases (continued)")
+    layout.table(["Class", "Test", "Status", "Time"],
+                 [(case[0], case[1], case[2], format_seconds(case[3])) for case in cases],
+                 [4, 5, 1, 1.2],
+                 colors={(i, 2): STATUS_COLORS[case[2]] for i, case in enumerate(cases)})
+    return layout.finish()
+
+
+def render_llm(model):
+    layout = PageLayout()
+    layout.heading("LLM Test Results")
+    layout.paragraph(f"LLM data computed at {model.generated_at}", 8, color=(0.5, 0.55, 0.55))
+    for tool in model.tools:
+        layout.heading(f"{tool.tool} - {tool.description}", 2)
+        headers = ["Build ID", "Date"] + [f"{column.display_name} ({column.unit})" for column in tool.columns]
+        rows = [(row.build_id, row.date, *[cell if cell is not None else "N/A" for cell in row.cells])
+                for row in tool.rows]
+        if tool.merged:
+            rows.append(("Merged", f"{tool.merged.run_count} runs",
+                         *[cell if cell is not None else "-" for cell in tool.merged.cells]))
+        layout.table(headers, rows, [1.6, 1.2] + [1] * len(tool.columns), size=6.5)
+        for table in tool.tables:
+            layout.heading(table.title, 3)
+            layout.table(table.headers, table.rows, [4] + [1] * (len(table.headers) - 1), size=6.5)
+        for chart in tool.charts:
+            layout.heading(chart.title, 3)
+            layout.bars(chart.labels, chart.formatted, chart.heights)
+    return layout.finish()
+
+
+# ---------------------------------------------------------------- junit
+
+def iter_testcases(junit_file):
+    """Stream test cases from junit.xml, clearing each element once read"""
+    for _, elem in iterparse(junit_file, events=("end",)):
+        if elem.tag != "testcase":
+            continue
+        status, message, detail = "passed", "", ""
+        for child in elem:
+            if child.tag in ("failure", "error", "skipped"):
+                status = "failed" if child.tag == "failure" else child.tag
+                message = child.get("message") or ""
+                detail = (child.text or "").strip()
+                break
+        yield {
+            "classname": elem.get("classname") or "",
+            "name": elem.get("name") or "",
+            "time": float(elem.get("time") or 0),
+            "status": status,
+            "message": message[:500],
+            "detail": detail[:8000],
+        }
+        elem.clear()
+
+
+# ---------------------------------------------------------------- assembly
+
+def pdf_info_text(value):
+    """Document info string: a literal when WinAnsi suffices, otherwise UTF-16BE with a BOM"""
+    text = str(value)
+    if all(is_winansi(char) for char in text):
+        return f"({pdf_text(text)})"
+    return f"<FEFF{text.encode('utf-16-be').hex().upper()}>"
+
+
+def to_unicode_cmap():
+    """ToUnicode CMap for UCS-2 codes, which already are the Unicode code points"""
+    # bfrange 只能在最后一个字节上变化，按高字节分成 256 段（跳过代理区）
+    ranges = [f"<{high:02X}00> <{high:02X}FF> <{high:02X}00>" for high in range(256) if not 0xD8 <= high <= 0xDF]
+    blocks = []
+    for start in range(0, len(ranges), 100):
+        chunk = ranges[start:start + 100]
+        blocks.append(f"{len(chunk)} beginbfrange\n" + "\n".join(chunk) + "\nendbfrange")
+    return ("/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+            "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+            "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+            "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+            + "\n".join(blocks)
+            + "\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend").encode('ascii')
+
+
+class PDFWriter:
+    """Writes page content streams as they arrive; page tree and xref are written at close"""
+
+    def __init__(self, path, title):
+        self.file = open(path, 'wb')
+        self.offsets = {}
+        self.next_id = 1
+        self.sections = {}
+        self.catalog_id = self._reserve()
+        self.pages_id = self._reserve()
+        self.font_ids = {}
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for key, (_, base_font) in FONTS.items():
+            self.font_ids[key] = self._object(
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>".encode())
+        self.cjk_font_id = self._cjk_font()
+        self.title = title
+
+    def _cjk_font(self):
+        _, base_font, encoding = CJK_FONT
+        descriptor_id = self._object(
+            f"<< /Type /FontDescriptor /FontName /{base_font} /Flags 6 /FontBBox [-25 -254 1000 880] "
+            f"/ItalicAngle 0 /Ascent 880 /Descent -120 /CapHeight 880 /StemV 93 >>".encode())
+        cid_font_id = self._object(
+            f"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /{base_font} "
+            f"/CIDSystemInfo << /Registry (Adobe) /Ordering (GB1) /Supplement 4 >> "
+            f"/FontDescriptor {descriptor_id} 0 R /DW {int(CJK_WIDTH * 1000)} >>".encode())
+        to_unicode_id = self._stream(zlib.compress(to_unicode_cmap()))
+        return self._object(
+            f"<< /Type /Font /Subtype /Type0 /BaseFont /{base_font}-{encoding} /Encoding /{encoding} "
+            f"/DescendantFonts [{cid_font_id} 0 R] /ToUnicode {to_unicode_id} 0 R >>".encode())
+
+    def _reserve(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def _object(self, body, obj_id=None):
+        obj_id = obj_id or self._reserve()
+        self.offsets[obj_id] = self.file.tell()
+        self.file.write(f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n")
+        return obj_id
+
+    def _stream(self, data):
+        return self._object(f"<< /Length {len(data)} /Filter /FlateDecode >>\nstream\n".encode()
+                            + data + b"\nendstream")
+
+    def add_pages(self, section, pages):
+        self.sections.setdefault(section, []).extend(self._stream(page) for page in pages)
+
+    def close(self):
+        content_ids = [cid for section in SECTION_ORDER for cid in self.sections.get(section, [])]
+        total = len(content_ids)
+        fonts = " ".join(f"/{FONTS[key][0]} {obj_id} 0 R" for key, obj_id in self.font_ids.items())
+        fonts += f" /{CJK_FONT[0]} {self.cjk_font_id} 0 R"
+        page_ids = []
+        for number, content_id in enumerate(content_ids, 1):
+            footer = (f"0.5 0.5 0.5 rg BT /F1 8 Tf {PAGE_WIDTH - MARGIN - 60:.2f} 24 Td "
+                      f"(Page {number} of {total}) Tj ET")
+            footer_id = self._stream(zlib.compress(footer.encode()))
+            page_ids.append(self._object(
+                f"<< /Type /Page /Parent {self.pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << {fonts} >> >> /Contents [{content_id} 0 R {footer_id} 0 R] >>".encode()))
+        kids = " ".join(f"{obj_id} 0 R" for obj_id in page_ids)
+        self._object(f"<< /Type /Pages /Kids [{kids}] /Count {total} >>".encode(), self.pages_id)
+        self._object(f"<< /Type /Catalog /Pages {self.pages_id} 0 R >>".encode(), self.catalog_id)
+        info_id = self._object(f"<< /Title {pdf_info_text(self.title)} /Producer (structured_pdf) "
+                               f"/CreationDate (D:{datetime.now().strftime('%Y%m%d%H%M%S')}) >>".encode())
+
+        xref_offset = self.file.tell()
+        self.file.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode())
+        for obj_id in range(1, self.next_id):
+            self.file.write(f"{self.offsets[obj_id]:010d} 00000 n \n".encode())
+        self.file.write(f"trailer\n<< /Size {self.next_id} /Root {self.catalog_id} 0 R /Info {info_id} 0 R >>\n"
+                        f"startxref\n{xref_offset}\n%%EOF\n".encode())
+        self.file.close()
+        return total
+
+
+class InlineExecutor:
+    """Runs submitted work immediately; used when workers=1"""
+
+    class _Done:
+        def __init__(self, value):
+            self._value = value
+
+        def result(self):
+            return self._value
+
+    def submit(self, func, *args):
+        return self._Done(func(*args))
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def generate_structured_pdf(junit_file, pdf_file, model=None, workers=None, chunk_size=CHUNK_SIZE):
+    """Render junit.xml (and the LLM report model) to ``pdf_file``; returns the page count"""
+    workers = workers or min(4, os.cpu_count() or 1)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else InlineExecutor()
+    writer = PDFWriter(pdf_file, "Test Report")
+    # 同时在途的分块数有上限，已完成的页面按提交顺序写入文件
+    pending = deque()
+    max_pending = workers * 2
+
+    def drain(limit):
+        while len(pending) > limit:
+            section, future = pending.popleft()
+            writer.add_pages(section, future.result())
+
+    summary = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0, "time": 0.0, "suites": {},
+               "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    failures = []
+    total_failures = 0
+    slowest = []
+    chunk = []
+    try:
+        for index, case in enumerate(iter_testcases(junit_file)):
+            summary["tests"] += 1
+            summary["time"] += case["time"]
+            counts = summary["suites"].setdefault(case["classname"], [0, 0, 0, 0, 0.0])
+            counts[0] += 1
+            counts[4] += case["time"]
+            if case["status"] != "passed":
+                key = {"failed": "failures", "error": "errors", "skipped": "skipped"}[case["status"]]
+                summary[key] += 1
+                counts[{"failures": 1, "errors": 2, "skipped": 3}[key]] += 1
+                if case["status"] in ("failed", "error"):
+                    total_failures += 1
+                    if len(failures) < MAX_FAILURE_DETAILS:
+                        failures.append(case)
+            entry = (case["time"], index, {k: case[k] for k in ("classname", "name", "status", "time")})
+            if len(slowest) < SLOWEST_COUNT:
+                heapq.heappush(slowest, entry)
+            else:
+                heapq.heappushpop(slowest, entry)
+
+            chunk.append((case["classname"], case["name"], case["status"], case["time"]))
+            if len(chunk) >= chunk_size:
+                pending.append(("tests", executor.submit(render_test_chunk, chunk, index < chunk_size)))
+                chunk = []
+                drain(max_pending)
+        if chunk or not summary["tests"]:
+            pending.append(("tests", executor.submit(render_test_chunk, chunk, summary["tests"] <= chunk_size)))
+
+        pending.append(("summary", executor.submit(render_summary, summary)))
+        pending.append(("failures", executor.submit(render_failures, failures, total_failures)))
+        pending.append(("slowest", executor.submit(
+            render_slowest, [case for _, _, case in sorted(slowest, reverse=True)])))
+        if model is not None and model.tools:
+            pending.append(("llm", executor.submit(render_llm, model)))
+        drain(0)
+    finally:
+        executor.shutdown(wait=True)
+    return writer.close()
+
+
+def load_report_model():
+    """LLM report model saved by generate_report.py, computed from the data directory if missing"""
+    sys.path.insert(0, str(ROOT_DIR))
+    try:
+        from llm_testing.framework.records import load_tools
+        from llm_testing.framework.report_model import ReportModel, build_report_model, default_model_path
+    except ImportError as e:
+        print(f"Warning: LLM report model unavailable: {e}")
+        return None
+    model_file = default_model_path()
+    if model_file.exists():
+        print(f"Using LLM report model {model_file}")
+        return ReportModel.load(model_file)
+    return build_report_model(load_tools(ROOT_DIR / "llm_testing" / "data"))
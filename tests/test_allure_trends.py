@@ -0,0 +1,65 @@
+import json
+import os
+
+from scripts.allure_trends import aggregate
+
+
+def write_result(results_dir, uuid, history_id, status, start, stop, mtime_ns):
+    path = results_dir / f"{uuid}-result.json"
+    path.write_text(json.dumps({
+        "name": history_id, "status": status, "uuid": uuid, "historyId": history_id,
+        "start": start, "stop": stop,
+    }), encoding='utf-8')
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def read(report_dir, name):
+    return json.loads((report_dir / "history" / f"{name}.json").read_text(encoding='utf-8'))
+
+
+class TestAllureTrends:
+
+    def test_builds_prepend_trend_entries(self, tmp_path, monkeypatch):
+        """Test each build adds one trend entry computed from its new results only"""
+        results, report = tmp_path / "allure-results", tmp_path / "allure-report"
+        results.mkdir()
+        monkeypatch.setenv("BUILD_NUMBER", "1")
+        write_result(results, "a1", "test_a", "passed", 1000, 1010, 1)
+        write_result(results, "b1", "test_b", "failed", 1005, 1030, 1)
+        aggregate(results, report)
+
+        # 第二次构建：test_b 重试一次后通过，旧结果文件仍留在目录中
+        monkeypatch.setenv("BUILD_NUMBER", "2")
+        write_result(results, "a2", "test_a", "passed", 2000, 2004, 2)
+        write_result(results, "b2", "test_b", "broken", 2000, 2005, 2)
+        write_result(results, "b3", "test_b", "passed", 2006, 2012, 3)
+        statistic = aggregate(results, report)
+
+        assert statistic == {"failed": 0, "broken": 0, "skipped": 0, "passed": 2, "unknown": 0, "total": 2}
+        history_trend = read(report, "history-trend")
+        assert [item["buildOrder"] for item in history_trend] == [2, 1]
+        assert history_trend[1]["data"]["failed"] == 1
+        assert read(report, "duration-trend")[0]["data"] == {"duration": 12}
+        assert read(report, "retry-trend")[0]["data"] == {"run": 3, "retry": 1}
+        assert read(report, "categories-trend")[1]["data"] == {"Product defects": 1}
+
+        history = read(report, "history")
+        assert [item["status"] for item in history["test_b"]["items"]] == ["passed", "failed"]
+        assert history["test_b"]["statistic"]["total"] == 2
+
+        # 没有新结果时不追加趋势
+        assert aggregate(results, report) is None
+        assert len(read(report, "history-trend")) == 2
+
+    def test_previous_history_directory(self, tmp_path):
+        """Test trends continue from a history directory copied from the previous build"""
+        results, report = tmp_path / "allure-results", tmp_path / "allure-report"
+        previous = tmp_path / "previous"
+        results.mkdir()
+        previous.mkdir()
+        (previous / "history-trend.json").write_text(json.dumps([{"data": {"passed": 4, "total": 4}}]))
+        write_result(results, "a1", "test_a", "skipped", 0, 0, 1)
+
+        aggregate(results, report, previous_history=previous)
+        assert [item["data"]["total"] for item in read(report, "history-trend")] == [1, 4]
+        assert json.loads((report / "widgets" / "summary.json").read_text())["statistic"]["skipped"] == 1
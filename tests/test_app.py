@@ -1,4 +1,7 @@
+import json
+import os
 import pytest
+import threading
 import time
 from app import app
 
@@ -88,4 +91,283 @@ class TestHelloWorldService:
                 assert response.status_code == 404
         else:
             response = self.__class__.client.get('/nonexistent')
-            assert response.status_code == 404
\ No newline at end of file
+            assert response.status_code == 404
+    
+    def test_conditional_get(self):
+        """Test static endpoints return a strong ETag and honour If-None-Match"""
+        if ALLURE_AVAILABLE:
+            with allure.step("Send GET request to /hello and read ETag"):
+                response = self.__class__.client.get('/hello')
+                etag = response.headers.get('ETag')
+            
+            with allure.step("Verify ETag is strong"):
+                assert etag is not None
+                assert not etag.startswith('W/')
+            
+            with allure.step("Send conditional GET with matching ETag"):
+                cached = self.__class__.client.get('/hello', headers={'If-None-Match': etag})
+            
+            with allure.step("Verify 304 status code with empty body"):
+                assert cached.status_code == 304
+                assert cached.data == b''
+                assert cached.headers.get('ETag') == etag
+        else:
+            response = self.__class__.client.get('/hello')
+            etag = response.headers.get('ETag')
+            assert etag is not None
+            assert not etag.startswith('W/')
+            
+            cached = self.__class__.client.get('/hello', headers={'If-None-Match': etag})
+            assert cached.status_code == 304
+            assert cached.data == b''
+            assert cached.headers.get('ETag') == etag
+    
+    def test_conditional_get_mismatch(self):
+        """Test a stale ETag still receives the full response"""
+        response = self.__class__.client.get('/health', headers={'If-None-Match': '"stale"'})
+        assert response.status_code == 200
+        assert response.get_json()["status"] == "healthy"
+    
+    def test_metrics_endpoint(self):
+        """Test /metrics exposes per-route counters and latency histograms"""
+        self.__class__.client.get('/hello')
+        self.__class__.client.get('/nonexistent')
+        response = self.__class__.client.get('/metrics')
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain')
+        
+        text = response.get_data(as_text=True)
+        assert '# TYPE http_request_duration_seconds histogram' in text
+        assert 'http_requests_total{method="GET",route="/hello",status="200"}' in text
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/hello",status="200",le="+Inf"}' in text
+    
+    def test_metrics_multiprocess_aggregation(self, tmp_path):
+        """Test totals from several worker processes are summed on scrape"""
+        from metrics import RequestMetrics
+        
+        worker_a = RequestMetrics(multiproc_dir=str(tmp_path), flush_interval=0.05)
+        worker_a.observe('GET', '/hello', 200, 0.002)
+        worker_a.observe('GET', '/hello', 200, 0.3)
+        # 快照由后台定时线程写出，无需等下一次请求
+        own_file = tmp_path / f'metrics_{os.getpid()}.json'
+        deadline = time.time() + 5
+        while time.time() < deadline and '0.302' not in (own_file.read_text() if own_file.exists() else ''):
+            time.sleep(0.02)
+        assert json.loads(own_file.read_text())[0][2][:2] == [2, 0.302]
+        # 模拟另一个 worker 进程写入的快照文件
+        (tmp_path / 'metrics_999999.json').write_text(
+            '[["http_request_duration_seconds", ["GET", "/hello", "200"], [1, 0.004, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]]]'
+        )
+        
+        text = worker_a.render()
+        assert 'http_requests_total{method="GET",route="/hello",status="200"} 3' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/hello",status="200",le="0.005"} 2' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/hello",status="200",le="0.5"} 3' in text
+        # 已退出进程的文件并入归档，之后的抓取结果不变
+        assert not (tmp_path / 'metrics_999999.json').exists()
+        assert (tmp_path / 'metrics_archive.json').exists()
+        assert 'http_requests_total{method="GET",route="/hello",status="200"} 3' in worker_a.render()
+
+    def test_metrics_fold_exited_thread_shards(self):
+        """Test shards of finished connection threads are folded so they do not pile up"""
+        from metrics import RequestMetrics
+
+        metrics = RequestMetrics()
+        for _ in range(300):
+            thread = threading.Thread(target=metrics.observe, args=('GET', '/hello', 200, 0.001))
+            thread.start()
+            thread.join()
+        assert metrics.shard_count() < 32
+        assert metrics.snapshot()[('http_request_duration_seconds', ('GET', '/hello', '200'))][0] == 300
+        assert metrics.shard_count() == 0
+
+
+class TestAdmissionControl:
+    
+    @classmethod
+    def setup_class(cls):
+        """Build a service with a single slot and no wait queue"""
+        from flask import Flask
+        from admission import AdmissionController, init_app as init_admission
+        from metrics import RequestMetrics, init_app as init_metrics
+        
+        service = Flask(__name__)
+        metrics = init_metrics(service, RequestMetrics())
+        cls.controller = init_admission(service, AdmissionController(1, retry_after=2), metrics=metrics)
+        service.add_url_rule('/hello', 'hello', lambda: 'ok')
+        service.add_url_rule('/health', 'health', lambda: 'healthy')
+        cls.client = service.test_client()
+    
+    def test_admitted_when_slot_free(self):
+        """Test requests are served while capacity is available"""
+        response = self.__class__.client.get('/hello')
+        assert response.status_code == 200
+        # 请求结束后槽位应被释放
+        assert self.__class__.controller.try_acquire() is None
+        self.__class__.controller.release()
+    
+    def test_shed_when_saturated(self):
+        """Test saturation fast-fails with 503 while /health stays exempt"""
+        controller = self.__class__.controller
+        assert controller.try_acquire() is None
+        try:
+            response = self.__class__.client.get('/hello')
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '2'
+            assert response.get_json()["reason"] == "queue_full"
+            
+            health = self.__class__.client.get('/health')
+            assert health.status_code == 200
+            
+            metrics = self.__class__.client.get('/metrics').get_data(as_text=True)
+            assert 'http_requests_shed_total{reason="queue_full"} 1' in metrics
+        finally:
+            controller.release()
+    
+    def test_queue_timeout(self):
+        """Test a queued request is shed once its wait times out"""
+        from admission import AdmissionController
+        
+        controller = AdmissionController(1, max_queue_depth=1, queue_timeout=0.01)
+        assert controller.try_acquire() is None
+        assert controller.try_acquire() == 'queue_timeout'
+        assert controller.waiting == 0
+        controller.release()
+
+
+class TestReadiness:
+    
+    def build_service(self, **kwargs):
+        from flask import Flask
+        from metrics import RequestMetrics, init_app as init_metrics
+        from readiness import Readiness, init_app as init_readiness
+        
+        service = Flask(__name__)
+        metrics = init_metrics(service, RequestMetrics())
+        readiness = init_readiness(service, Readiness(**kwargs), metrics=metrics)
+        service.add_url_rule('/hello', 'hello', lambda: 'ok')
+        return service, readiness
+    
+    def test_probes_follow_warm_up(self, tmp_path):
+        """Test /readyz is 503 until warm-up ends while /livez answers throughout"""
+        ready_file = tmp_path / 'app.ready'
+        service, readiness = self.build_service(readiness_file=str(ready_file))
+        client = service.test_client()
+        
+        assert client.get('/livez').status_code == 200
+        response = client.get('/readyz')
+        assert response.status_code == 503
+        assert response.get_json()["status"] == "warming_up"
+        client.get('/hello')
+        assert readiness.first_request_seconds is None
+        
+        warmed = []
+        readiness.warmup(lambda: warmed.append(True))
+        readiness.start(port=5000)
+        assert warmed == [True]
+        assert json.loads(ready_file.read_text())["port"] == 5000
+        
+        client.get('/hello')
+        state = client.get('/readyz').get_json()
+        assert state["status"] == "ready"
+        assert state["first_request_seconds"] >= state["startup_seconds"]
+        metrics = client.get('/metrics').get_data(as_text=True)
+        assert 'app_ready 1' in metrics
+        assert 'app_first_request_seconds ' in metrics
+        readiness.clear()
+    
+    def test_server_notifies_socket_once_listening(self, tmp_path):
+        """Test the real server sends READY=1 after it is listening"""
+        import socket
+        import urllib.request
+        from readiness import make_ready_server
+        
+        address = str(tmp_path / 'notify.sock')
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        listener.bind(address)
+        listener.settimeout(5)
+        service, readiness = self.build_service(notify_address=address)
+        server = make_ready_server(service, '127.0.0.1', 0, readiness)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            message = listener.recv(1024).decode()
+            assert message.startswith('READY=1')
+            url = f'http://127.0.0.1:{server.server_port}/readyz'
+            with urllib.request.urlopen(url, timeout=5) as response:
+                assert json.loads(response.read())["status"] == "ready"
+        finally:
+            server.shutdown()
+            listener.close()
+
+
+class TestReportJobs:
+    
+    def build_service(self, tmp_path, render, **kwargs):
+        from flask import Flask
+        from metrics import RequestMetrics, init_app as init_metrics
+        from report_jobs import DEFAULT_DATA_DIR, ReportJobQueue, init_app as init_report_jobs
+        
+        service = Flask(__name__)
+        metrics = init_metrics(service, RequestMetrics())
+        jobs = ReportJobQueue(DEFAULT_DATA_DIR, tmp_path, render=render, **kwargs)
+        init_report_jobs(service, jobs, metrics=metrics)
+        return service.test_client(), jobs
+    
+    def test_identical_submissions_render_once(self, tmp_path):
+        """Test concurrent submitters share one job and a full queue sheds with 503"""
+        started, release, renders = threading.Event(), threading.Event(), []
+        
+        def render(data_dir, output_file):
+            renders.append(output_file.name)
+            started.set()
+            release.wait(5)
+            output_file.write_text('report')
+        
+        client, jobs = self.build_service(tmp_path, render, max_pending=2, retry_after=3)
+        first = client.post('/reports', json={})
+        assert first.status_code == 202
+        job_id = first.get_json()["id"]
+        assert first.headers['Location'] == f'/reports/{job_id}'
+        started.wait(5)
+        
+        ids = [client.post('/reports').get_json()["id"] for _ in range(3)]
+        assert ids == [job_id] * 3
+        assert client.get(f'/reports/{job_id}').get_json()["status"] == "running"
+        
+        assert client.post('/reports', json={"output": "other.html"}).status_code == 202
+        shed = client.post('/reports', json={"output": "third.html"})
+        assert shed.status_code == 503
+        assert shed.headers['Retry-After'] == '3'
+        for bad_output in ("../escape.html", ".html", ".hidden.html", "report.txt"):
+            assert client.post('/reports', json={"output": bad_output}).status_code == 400
+        
+        release.set()
+        jobs.shutdown()
+        state = client.get(f'/reports/{job_id}').get_json()
+        assert state["status"] == "done"
+        assert state["submitters"] == 4
+        assert state["output"] == str(tmp_path / 'llm_eval_report.html')
+        assert renders == ['llm_eval_report.html', 'other.html']
+        metrics = client.get('/metrics').get_data(as_text=True)
+        assert 'report_jobs_total{outcome="deduplicated"} 3' in metrics
+        assert 'report_jobs_total{outcome="rejected"} 1' in metrics
+        assert client.get('/reports/unknown').status_code == 404
+    
+    def test_renders_llm_report(self, tmp_path):
+        """Test a job renders the real LLM report and finished jobs are reused"""
+        from report_jobs import render_report
+        
+        client, jobs = self.build_service(tmp_path, render_report)
+        job_id = client.post('/reports').get_json()["id"]
+        jobs.get(job_id).done.wait(30)
+        state = client.get(f'/reports/{job_id}').get_json()
+        assert state["status"] == "done", state["error"]
+        assert 'UC-Eval' in (tmp_path / 'llm_eval_report.html').read_text(encoding='utf-8')
+        assert (tmp_path / 'llm_report_styles.css').exists()
+        assert not list(tmp_path.glob('.*.tmp.html'))
+        
+        again = client.post('/reports').get_json()
+        assert again["id"] == job_id and again["deduplicated"]
+        jobs.shutdown()
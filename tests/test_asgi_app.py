@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+from werkzeug.datastructures import Headers
+
+import test_app
+from admission import AdmissionController
+from app import app as flask_app
+from asgi_app import ASGIApplication, STATIC_ROUTES, application
+from asgi_server import start_server
+from metrics import RequestMetrics
+from readiness import Readiness
+
+
+class ASGIResponse:
+    """Minimal response object mirroring the Flask test client API"""
+
+    def __init__(self, status_code, headers, data):
+        self.status_code = status_code
+        self.headers = headers
+        self.data = data
+
+    @property
+    def content_type(self):
+        return self.headers.get('Content-Type')
+
+    def get_data(self, as_text=False):
+        return self.data.decode('utf-8') if as_text else self.data
+
+    def get_json(self):
+        return json.loads(self.data)
+
+
+class ASGITestClient:
+    """Drives an ASGI app in-process, one request per event loop"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def get(self, path, headers=None):
+        return asyncio.run(self.request('GET', path, headers or {}))
+
+    async def request(self, method, path, headers):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers.items()],
+            'client': ('127.0.0.1', 12345),
+            'server': ('localhost', 80),
+        }
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await self.app(scope, receive, send)
+        start = sent[0]
+        response_headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in start['headers']])
+        body = b''.join(m.get('body', b'') for m in sent[1:])
+        return ASGIResponse(start['status'], response_headers, body)
+
+
+class TestHelloWorldServiceASGI(test_app.TestHelloWorldService):
+    """Run the WSGI service assertions against the ASGI entry point"""
+
+    @classmethod
+    def setup_class(cls):
+        cls.client = ASGITestClient(application)
+
+
+async def echo_app(scope, receive, send):
+    """Echo the request body and the message type of a second receive()"""
+    first = await receive()
+    second = await receive()
+    body = first['body'] + b'|' + second['type'].encode('latin-1')
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-length', str(len(body)).encode('latin-1'))]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def raw_exchange(app, request):
+    """Send raw bytes to the built-in server and return everything it answers before closing"""
+    server = await start_server(app, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    return response
+
+
+class TestBuiltinServer:
+
+    def test_chunked_request_body(self):
+        """Test chunked bodies are decoded and receive() reports disconnect once the body is consumed"""
+        response = asyncio.run(raw_exchange(echo_app, (
+            b'POST /echo HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n'
+            b'5\r\nhello\r\n6;ext=1\r\n world\r\n0\r\nX-Trailer: 1\r\n\r\n')))
+        assert response.startswith(b'HTTP/1.1 200 OK\r\n')
+        assert response.endswith(b'\r\n\r\nhello world|http.disconnect')
+
+    def test_unsupported_framing_is_rejected(self):
+        """Test unknown transfer codings get 501 and malformed chunks 400 instead of a hang"""
+        response = asyncio.run(raw_exchange(echo_app, (
+            b'POST /echo HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: gzip\r\n\r\n')))
+        assert response.startswith(b'HTTP/1.1 501 Not Implemented\r\n')
+        response = asyncio.run(raw_exchange(echo_app, (
+            b'POST /echo HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n')))
+        assert response.startswith(b'HTTP/1.1 400 Bad Request\r\n')
+
+    def test_malformed_request_line_is_rejected(self):
+        """Test a request line without a valid HTTP version gets 400 instead of an IndexError"""
+        for request_line in (b'GET / FOO', b'GET / HTTP/', b'GET /'):
+            response = asyncio.run(raw_exchange(echo_app, request_line + b'\r\nHost: x\r\n\r\n'))
+            assert response.startswith(b'HTTP/1.1 400 Bad Request\r\n')
+
+
+class TestStaticFastPath:
+
+    def test_static_routes_pass_admission_metrics_and_readiness(self):
+        """Test /hello on the event loop is shed, counted and timed like the Flask route"""
+        metrics = RequestMetrics()
+        controller = AdmissionController(1, retry_after=2)
+        readiness = Readiness()
+        readiness.mark_ready()
+        client = ASGITestClient(ASGIApplication(flask_app, STATIC_ROUTES, metrics=metrics,
+                                                admission=controller, readiness=readiness))
+
+        assert client.get('/hello').status_code == 200
+        assert readiness.first_request_seconds is not None
+        assert controller.try_acquire() is None
+        try:
+            response = client.get('/hello')
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '2'
+            assert response.get_json()['reason'] == 'queue_full'
+            # /health 不参与限流
+            assert client.get('/health').status_code == 200
+        finally:
+            controller.release()
+
+        text = metrics.render()
+        assert 'http_requests_shed_total{reason="queue_full"} 1' in text
+        assert 'route="/hello",status="503"' in text and 'route="/hello",status="200"' in text
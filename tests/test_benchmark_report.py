@@ -0,0 +1,54 @@
+import json
+import sys
+
+from llm_testing import benchmark_report
+from llm_testing.benchmark_report import RESULTS_DIR, benchmark_size, compare_with_baseline
+from llm_testing.synthetic_data import generate_history
+
+
+class TestBenchmarkReport:
+
+    def test_generate_history_splits_runs(self, tmp_path):
+        """Test synthetic history divides the runs between tools and is seeded"""
+        files = generate_history(tmp_path / 'a', n_tools=3, n_metrics=7, total_runs=20, seed=4)
+        data = [json.loads(path.read_text(encoding='utf-8')) for path in files]
+        assert [len(tool['runs']) for tool in data] == [7, 7, 6]
+        assert [metric['name'] for metric in data[0]['metrics_schema']][-1] == 'ttft_1'
+        assert all(set(run['metrics']) == {m['name'] for m in tool['metrics_schema']}
+                   for tool in data for run in tool['runs'])
+        again = generate_history(tmp_path / 'b', n_tools=3, n_metrics=7, total_runs=20, seed=4)
+        assert [path.read_bytes() for path in again] == [path.read_bytes() for path in files]
+
+    def test_benchmark_flags_regression_against_baseline(self, tmp_path, monkeypatch):
+        """Test generate -> benchmark -> compare passes on its own baseline and flags a slower phase"""
+        entry = benchmark_size(300, 2, 3, True, tmp_path)
+        assert entry['runs'] == 300
+        assert all(values['seconds'] >= 0 and values['peak_bytes'] is not None
+                   for values in entry['phases'].values())
+        assert compare_with_baseline([entry], {"results": [entry]}, 1.5) == []
+
+        baseline = json.loads(json.dumps(entry))
+        baseline['phases']['full_report']['seconds'] = 0.1
+        slower = json.loads(json.dumps(entry))
+        slower['phases']['full_report']['seconds'] = 0.5
+        # 基线耗时极短的阶段不比较耗时
+        slower['phases']['chart_render']['seconds'] = 1.0
+        baseline['phases']['chart_render']['seconds'] = 0.001
+        regressions = compare_with_baseline([slower], {"results": [baseline]}, 1.5)
+        assert regressions == ["300 runs / full_report / seconds: 0.1 -> 0.5 (5.00x)"]
+
+        # 命令行：与一个更快的基线比较时以非零退出
+        baseline_file = tmp_path / 'baseline.json'
+        entry['phases']['build_model']['peak_bytes'] = 1
+        baseline_file.write_text(json.dumps({"results": [entry]}), encoding='utf-8')
+        monkeypatch.setattr(sys, 'argv', ['benchmark_report.py', '--sizes', '300', '--tools', '2', '--metrics', '3',
+                                          '--output', str(tmp_path / 'latest.json'), '--baseline', str(baseline_file)])
+        assert benchmark_report.main() == 1
+        assert json.loads((tmp_path / 'latest.json').read_text(encoding='utf-8'))['results'][0]['runs'] == 300
+
+    def test_committed_baseline_covers_default_sizes(self):
+        """Test the committed baseline has every phase for the sizes CI compares"""
+        baseline = json.loads((RESULTS_DIR / 'baseline.json').read_text(encoding='utf-8'))
+        sizes = {entry['runs']: entry for entry in baseline['results']}
+        assert {1000, 10000, 100000} <= set(sizes)
+        assert all(set(entry['phases']) == set(sizes[1000]['phases']) for entry in sizes.values())
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+from llm_testing.benchmark_runner import build_payload, run_benchmark, send_streaming_request, summarize
+from llm_testing.framework.async_http import AsyncHTTPClient
+
+
+TOKENS = ["Hello", " from", " the", " stand", "-in"]
+
+
+async def stand_in_server(reader, writer):
+    """Tiny OpenAI-compatible streaming endpoint with keep-alive"""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except asyncio.IncompleteReadError:
+                return
+            headers = dict(line.split(': ', 1) for line in head.decode().split('\r\n')[1:] if ': ' in line)
+            payload = json.loads(await reader.readexactly(int(headers['Content-Length'])))
+            if payload['model'] == 'broken':
+                writer.write(b'HTTP/1.1 500 Internal Server Error\r\nContent-Length: 4\r\n\r\nfail')
+                await writer.drain()
+                continue
+
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n')
+            for token in TOKENS[:payload['max_tokens']]:
+                await asyncio.sleep(0.002)
+                event = b'data: ' + json.dumps({'choices': [{'text': token}]}).encode() + b'\n\n'
+                writer.write(b'%x\r\n%s\r\n' % (len(event), event))
+                await writer.drain()
+            done = b'data: [DONE]\n\n'
+            writer.write(b'%x\r\n%s\r\n0\r\n\r\n' % (len(done), done))
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run_against_stand_in(model, prompts, **kwargs):
+    server = await asyncio.start_server(stand_in_server, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await run_benchmark(f'http://127.0.0.1:{port}', prompts, model, **kwargs)
+
+
+class TestStreamingBenchmark:
+
+    def test_token_timing(self):
+        """Test per-token timings and run metrics from a streamed benchmark"""
+        results, duration = asyncio.run(run_against_stand_in(
+            'stand-in', ['prompt'] * 6, max_tokens=5, concurrency=2))
+
+        assert len(results) == 6
+        assert all(r.error is None for r in results)
+        assert all(r.output_tokens == 5 for r in results)
+        assert all(len(r.inter_token_latencies()) == 4 for r in results)
+
+        metrics = summarize(results, duration)
+        assert metrics['error_rate'] == 0.0
+        assert metrics['TTFT'] > 0
+        assert metrics['TPOT'] > 0
+        assert metrics['latency_p99'] >= metrics['latency_p50']
+        assert metrics['Throughput'] > 0
+
+    def test_errors_counted(self):
+        """Test failed requests are reported in the error rate"""
+        results, duration = asyncio.run(run_against_stand_in(
+            'broken', ['prompt'] * 3, max_tokens=5, concurrency=3, request_rate=1000.0))
+
+        assert all(r.error for r in results)
+        assert summarize(results, duration)['error_rate'] == 100.0
+
+    def test_streams_reuse_pooled_connections(self):
+        """Test a stream read to [DONE] leaves its connection reusable for the next request"""
+        async def run():
+            server = await asyncio.start_server(stand_in_server, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                client = AsyncHTTPClient(f'http://127.0.0.1:{port}', limit=2)
+                slots = asyncio.Semaphore(2)
+
+                async def one():
+                    async with slots:
+                        payload = build_payload('/v1/completions', 'stand-in', 'prompt', 5, 0.0)
+                        return await send_streaming_request(client, '/v1/completions', payload, 10)
+
+                results = await asyncio.gather(*(one() for _ in range(20)))
+                await client.close()
+                return results, client.connections_opened
+
+        results, connections_opened = asyncio.run(run())
+        assert all(r.error is None and r.output_tokens == 5 for r in results)
+        assert connections_opened <= 2
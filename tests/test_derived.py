@@ -0,0 +1,112 @@
+import pytest
+
+from llm_testing.framework import derived
+from llm_testing.framework.derived import compile_expression, derivation_order
+from llm_testing.framework.records import load_tool
+from llm_testing.framework.report_model import ReportModel, build_report_model, build_tool_report
+
+
+SCHEMA = [
+    {"name": "latency_ms", "format": "{:.1f}", "default_chart_type": "line"},
+    {"name": "p95", "format": "{:.1f}"},
+    {"name": "p50", "format": "{:.1f}"},
+    {"name": "ms_per_token", "derived": "latency_ms / env.max_tokens", "format": "{:.3f}",
+     "default_chart_type": "line"},
+    {"name": "tail_ratio", "derived": 'metrics["p95"] / p50', "format": "{:.2f}"},
+    {"name": "tail_penalty", "derived": "max(tail_ratio - 1, 0) * 100", "format": "{:.1f}"},
+    {"name": "loop_a", "derived": "loop_b + 1"},
+    {"name": "loop_b", "derived": "loop_a + 1"},
+]
+
+
+def make_runs():
+    return [
+        {"build_id": f"build-{i}", "timestamp": f"2025-01-0{i + 1}T00:00:00Z",
+         "env": {"description": "gpu", "max_tokens": tokens},
+         "metrics": {"latency_ms": 100.0 + i, "p95": 30 + i, "p50": 20}}
+        for i, tokens in enumerate([128, 0, "n/a", 256])
+    ]
+
+
+class TestDerived:
+
+    def test_expressions_are_whitelisted(self):
+        """Test only arithmetic over metrics, env fields and the math helpers compiles"""
+        expression = compile_expression("sqrt(abs(latency_ms - env.base)) / env['batch size']")
+        assert expression.inputs == (("metrics", "latency_ms"), ("env", "base"), ("env", "batch size"))
+        assert expression.evaluate([[110.0, None, 5.0], [10.0, 1.0, 9.0], [2.0, 2.0, 0.0]]) == [5.0, None, None]
+        assert compile_expression("latency_ms / env.max_tokens") is compile_expression("latency_ms / env.max_tokens")
+
+        for bad in ("__import__('os').system('ls')", "latency_ms.__class__", "latency_ms if p50 else p95",
+                    "'a' * 3", "[latency_ms]", "lambda: 1", "latency_ms +", "2 ** 10"):
+            with pytest.raises(ValueError):
+                compile_expression(bad)
+
+        derived = {name: compile_expression(text) for name, text in
+                   (("c", "a + b"), ("b", "a * 2"), ("x", "y"), ("y", "x"))}
+        assert derivation_order(derived) == (["b", "c"], ["x", "y"])
+
+    def test_derived_metrics_reach_tables_charts_and_rollups(self, capsys):
+        """Test derived values are computed at load and rendered like stored metrics"""
+        rollup = {"period": "daily", "start": "2024-12-31", "group": "gpu", "count": 4,
+                  "first_timestamp": "2024-12-31T00:00:00Z", "last_timestamp": "2024-12-31T23:00:00Z",
+                  "first_build": "old-1", "last_build": "old-4",
+                  "metrics": {"p95": {"count": 4, "mean": 40.0}, "p50": {"count": 4, "mean": 20.0}}}
+        data = {"tool": "Bench", "metrics_schema": SCHEMA, "runs": make_runs(), "rollups": {"daily": [rollup]}}
+        tool = load_tool(data, "bench.json")
+        assert "dependency cycle" in capsys.readouterr().out
+        assert [metric.name for metric in tool.metrics_schema][-1] == "tail_penalty"
+        assert tool.metric("ms_per_token").to_dict()["derived"] == "latency_ms / env.max_tokens"
+
+        # 除零和非数值的环境字段不产生结果
+        assert [run.metrics.get("ms_per_token") for run in tool.runs] == [100.0 / 128, None, None, 103.0 / 256]
+        assert tool.runs[1].metrics["tail_ratio"] == 31 / 20
+        assert tool.runs[0].metrics["tail_penalty"] == pytest.approx(50.0)
+        assert "tail_ratio" not in data["rollups"]["daily"][0]["metrics"]
+        assert tool.rollups["daily"][0]["metrics"]["tail_ratio"] == {"count": 4, "mean": 2.0}
+
+        report = build_tool_report("Bench", tool)
+        column = [column.name for column in report.columns].index("tail_ratio")
+        assert [row.cells[column] for row in report.rows] == ["2.00", "1.50", "1.55", "1.60", "1.65"]
+        assert report.rows[2].cells[column - 1] is None
+        assert report.chart("ms_per_token").formatted[-1] == "0.402"
+
+    def test_numpy_columns_match_python_loop(self, monkeypatch):
+        """Test the numpy column expression gives the same values as the per-run loop"""
+        pytest.importorskip("numpy")
+        columns = [[110.0, None, 5.0, -4.0, 9.0], [10.0, 1.0, 0.0, 2.0, 3.0], [2.0, 2.0, 0.0, 1.0, 0.5]]
+        texts = ("sqrt(abs(latency_ms - env.base)) / env['batch size']", "log(latency_ms) * env.base",
+                 "max(latency_ms, env.base, 4) - min(env['batch size'], 1)", "latency_ms % env.base // 2",
+                 "-latency_ms ** 0.5 + 1e308 * env.base")
+
+        def evaluate_all():
+            # 绕过 lru_cache，按当前实现重新编译
+            expressions = [compile_expression.__wrapped__(text) for text in texts]
+            return [e.evaluate(columns[:len(e.inputs)]) for e in expressions]
+
+        numpy_values = evaluate_all()
+        monkeypatch.setattr(derived, "NUMPY_AVAILABLE", False)
+        python_values = evaluate_all()
+        for text, expected, actual in zip(texts, python_values, numpy_values):
+            assert actual == pytest.approx(expected), text
+        assert python_values[0] == [5.0, None, None, pytest.approx(6 ** 0.5), pytest.approx(6 ** 0.5 / 0.5)]
+
+    def test_derived_values_are_not_serialized_as_stored(self):
+        """Test to_dict leaves derived values out and the report model marks derived columns"""
+        rollup = {"period": "daily", "start": "2024-12-31", "group": "gpu", "count": 4,
+                  "first_timestamp": "2024-12-31T00:00:00Z", "last_timestamp": "2024-12-31T23:00:00Z",
+                  "first_build": "old-1", "last_build": "old-4",
+                  "metrics": {"p95": {"count": 4, "mean": 40.0}, "p50": {"count": 4, "mean": 20.0}}}
+        tool = load_tool({"tool": "Bench", "metrics_schema": SCHEMA[:6], "runs": make_runs(),
+                          "rollups": {"daily": [rollup]}}, "bench.json")
+        assert tool.runs[0].metrics["ms_per_token"] == 100.0 / 128
+
+        data = tool.to_dict()
+        assert data["runs"][0]["metrics"] == {"latency_ms": 100.0, "p95": 30, "p50": 20}
+        assert set(data["rollups"]["daily"][0]["metrics"]) == {"p95", "p50"}
+        reloaded = load_tool(data, "bench.json")
+        assert [run.metrics for run in reloaded.runs] == [run.metrics for run in tool.runs]
+
+        model = ReportModel.from_dict(build_report_model({"Bench": tool}).to_dict())
+        columns = {column.name: column.derived for column in model.tool("Bench").columns}
+        assert columns["ms_per_token"] == "latency_ms / env.max_tokens" and columns["latency_ms"] is None
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from llm_testing.framework.sketch import LatencySketch
+from scripts.distributed_load import Coordinator, interval_message, run_plan, run_worker, spawn_local_workers
+from scripts.load_generator import LoadResult
+
+
+PLAN = {"url": None, "path": "/hello", "method": "GET", "mode": "closed", "concurrency": 2,
+        "rate": 0, "max_workers": 0, "duration": 0.5, "interval": 0.2, "seed": 1}
+
+
+class TestDistributedLoad:
+
+    def test_local_worker_processes(self):
+        """Test worker processes start together and their sketches merge into one run"""
+        coordinator = Coordinator(PLAN, 2, '127.0.0.1', 0)
+        processes = spawn_local_workers(2, coordinator.port)
+        try:
+            summary = coordinator.run(accept_timeout=30, start_delay=0.5)
+        finally:
+            for process in processes:
+                process.wait(timeout=30)
+
+        assert all(process.returncode == 0 for process in processes)
+        assert all(w.failed is None and w.requests > 0 for w in coordinator.workers)
+        assert coordinator.sketch.count == sum(w.requests for w in coordinator.workers)
+        assert summary['error_rate'] == 0.0
+        assert summary['p99_latency'] >= summary['p50_latency'] > 0
+        assert summary['requests_per_second'] > 0
+
+    def test_open_loop_rate_split(self):
+        """Test the total open-loop rate is divided between workers"""
+        plan = dict(PLAN, mode='open', rate=40.0, max_workers=4)
+        coordinator = Coordinator(plan, 2, '127.0.0.1', 0)
+        workers = [threading.Thread(target=run_worker, args=('127.0.0.1', coordinator.port, f'w{i}'))
+                   for i in range(2)]
+        for t in workers:
+            t.start()
+        coordinator.run(accept_timeout=10, start_delay=0.1)
+        for t in workers:
+            t.join(10)
+
+        assert coordinator.worker_plan(0)['rate'] == 20.0
+        assert coordinator.worker_plan(0)['seed'] != coordinator.worker_plan(1)['seed']
+        assert 0 < coordinator.sketch.count < 60
+
+    def test_progress_messages_carry_interval_deltas(self):
+        """Test interim messages hold the requests finished in their interval and add up to the run"""
+        result = LoadResult()
+        runner = threading.Thread(target=run_plan, args=(dict(PLAN, duration=0.6), result))
+        runner.start()
+        messages = []
+        while runner.is_alive():
+            time.sleep(0.15)
+            messages.append(interval_message('progress', result))
+        runner.join()
+        messages.append(interval_message('done', result))
+
+        counts = [LatencySketch.from_dict(m['sketch']).count for m in messages]
+        assert len(counts) >= 3 and all(count > 0 for count in counts[:2])
+        assert sum(counts) == result.sketch.count
+        assert sum(m['errors'] for m in messages) == result.errors
+        assert not hasattr(result, 'latencies')
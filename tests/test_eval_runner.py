@@ -0,0 +1,104 @@
+import asyncio
+import json
+import sqlite3
+
+from llm_testing.eval_runner import Checkpoint, ResponseCache, evaluate, parse_answer, score
+
+
+ITEMS = [
+    {"id": str(i), "question": f"Question {i}?", "choices": ["w", "x", "y", "z"],
+     "answer": "ABCD"[i % 4], "subject": "astronomy" if i % 2 else "philosophy",
+     "category": "stem" if i % 2 else "humanities"}
+    for i in range(12)
+]
+
+
+async def answer_server(reader, writer):
+    """Answers 'A' to every question with keep-alive"""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except asyncio.IncompleteReadError:
+                return
+            headers = dict(line.split(': ', 1) for line in head.decode().split('\r\n')[1:] if ': ' in line)
+            await reader.readexactly(int(headers['Content-Length']))
+            answer_server.requests += 1
+            body = json.dumps({'choices': [{'text': ' A'}]}).encode()
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s'
+                         % (len(body), body))
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def evaluate_runs(runs):
+    """Run (items, cache, checkpoint, host) evaluations one after another against one server"""
+    server = await asyncio.start_server(answer_server, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    results = []
+    async with server:
+        for items, cache, checkpoint, host in runs:
+            results.append(await evaluate(items, f'http://{host}:{port}', 'stand-in', {'max_tokens': 1},
+                                          cache, checkpoint, batch_size=5, concurrency=4))
+    return results
+
+
+async def evaluate_with_server(items, cache, checkpoint):
+    return (await evaluate_runs([(items, cache, checkpoint, '127.0.0.1')]))[0]
+
+
+class TestEvalRunner:
+
+    def test_scores_and_caches_answers(self, tmp_path):
+        """Test scoring and that a repeated evaluation is answered from the cache"""
+        answer_server.requests = 0
+        cache = ResponseCache(tmp_path / 'cache.sqlite3')
+        (records, stats), (_, cached_stats), (_, other_stats) = asyncio.run(evaluate_runs([
+            (ITEMS, cache, Checkpoint(tmp_path / 'a.jsonl'), '127.0.0.1'),
+            (ITEMS, cache, Checkpoint(tmp_path / 'b.jsonl'), '127.0.0.1'),
+            # 同名模型换一个服务地址不能命中缓存
+            (ITEMS, cache, Checkpoint(tmp_path / 'c.jsonl'), 'localhost'),
+        ]))
+        cache.close()
+
+        assert len(records) == 12 and stats['cache_hits'] == 0
+        metrics = score(records)
+        assert metrics['accuracy'] == 25.0
+        assert metrics['humanities_accuracy'] == 50.0
+        assert metrics['stem_accuracy'] == 0.0
+        assert cached_stats['cache_hits'] == 12
+        assert other_stats['cache_hits'] == 0
+        assert answer_server.requests == 24
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        """Test items already in the checkpoint are not asked again"""
+        answer_server.requests = 0
+        checkpoint = Checkpoint(tmp_path / 'run.jsonl')
+        cache = ResponseCache(tmp_path / 'cache.sqlite3')
+        asyncio.run(evaluate_with_server(ITEMS[:7], cache, checkpoint))
+        records, stats = asyncio.run(evaluate_with_server(ITEMS, ResponseCache(tmp_path / 'other.sqlite3'),
+                                                          checkpoint))
+
+        assert stats['resumed'] == 7
+        assert answer_server.requests == 12
+        assert [r['id'] for r in records] == [item['id'] for item in ITEMS]
+
+    def test_discards_cache_without_endpoint_keys(self, tmp_path):
+        """Test a cache written before endpoints were part of the key is not reused"""
+        path = tmp_path / 'cache.sqlite3'
+        with sqlite3.connect(str(path)) as conn:
+            conn.execute("CREATE TABLE responses (model TEXT, prompt_hash TEXT, params TEXT, response TEXT,"
+                         " created REAL, PRIMARY KEY (model, prompt_hash, params))")
+            conn.execute("INSERT INTO responses VALUES ('stand-in', 'h', '{}', 'A', 0)")
+        cache = ResponseCache(path)
+        assert cache.get_many('http://a/v1/completions', 'stand-in', ['h'], '{}') == {}
+        cache.put_many('http://a/v1/completions', 'stand-in', '{}', {'h': 'B'})
+        assert cache.get_many('http://a/v1/completions', 'stand-in', ['h'], '{}') == {'h': 'B'}
+        cache.close()
+
+    def test_parse_answer(self):
+        """Test the first standalone choice letter is taken as the answer"""
+        assert parse_answer(' B. because', 4) == 'B'
+        assert parse_answer('The answer is C', 4) == 'C'
+        assert parse_answer('Eh', 4) is None
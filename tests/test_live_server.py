@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import threading
+import urllib.request
+from pathlib import Path
+
+from llm_testing.framework.live_server import LiveReport, start_live_server
+
+DATA_DIR = Path(__file__).parent.parent / "llm_testing" / "data"
+
+
+def copy_data(tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(DATA_DIR, data_dir)
+    return data_dir
+
+
+def rewrite_description(path, description):
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data["description"] = description
+    tmp_path = path.with_suffix('.json.tmp')
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp_path, path)
+    return data["tool"]
+
+
+def append_run(path, build_id):
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data["runs"].append({**data["runs"][-1], "build_id": build_id})
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+class TestLiveServer:
+
+    def test_refresh_reingests_only_changed_files(self, tmp_path):
+        """Test a refresh rebuilds the changed tool and keeps the others as they were"""
+        data_dir = copy_data(tmp_path)
+        live_report = LiveReport(data_dir)
+        assert len(live_report.refresh()) == len(list(data_dir.glob("*.json")))
+        before = {tool.name: tool for tool in live_report.model.tools}
+        assert live_report.refresh() == []
+
+        tool_name = rewrite_description(data_dir / "mmlu_sample.json", "updated description")
+        changes = live_report.refresh()
+        assert [(kind, tool.name) for kind, tool in changes] == [("tool", tool_name)]
+        after = {tool.name: tool for tool in live_report.model.tools}
+        assert after[tool_name].description == "updated description"
+        assert all(after[name] is tool for name, tool in before.items() if name != tool_name)
+
+        (data_dir / "mmlu_sample.json").unlink()
+        assert live_report.refresh() == [("remove", before[tool_name].tool_id)]
+        assert tool_name not in {tool.name for tool in live_report.model.tools}
+
+    def test_concurrent_pages_use_their_own_model(self, tmp_path):
+        """Test page renders do not swap the model of the renderer shared with the watcher"""
+        data_dir = copy_data(tmp_path)
+        live_report = LiveReport(data_dir)
+        live_report.refresh()
+        shared_model = live_report.renderer._model
+        pages = []
+        threads = [threading.Thread(target=lambda: pages.append(live_report.render_page())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert live_report.renderer._model is shared_model
+        expected = live_report.render_page()
+        assert pages == [expected] * 8
+        assert all(f'id="card-{tool.tool_id}"' in expected for tool in live_report.model.tools)
+
+    def test_changed_file_is_pushed_over_sse(self, tmp_path):
+        """Test the page wraps every card and a data change arrives as a tool event"""
+        data_dir = copy_data(tmp_path)
+        server = start_live_server(data_dir, port=0, poll_interval=0.05)
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        try:
+            page = urllib.request.urlopen(f"{base_url}/", timeout=5).read().decode('utf-8')
+            assert "EventSource('/events')" in page
+            for tool in server.live_report.model.tools:
+                assert f'id="card-{tool.tool_id}"' in page
+
+            with urllib.request.urlopen(f"{base_url}/events", timeout=5) as stream:
+                assert stream.readline() == b': connected\n'
+                stream.readline()
+                append_run(data_dir / "mmlu_sample.json", "build-live")
+                event = None
+                while event != 'tool':
+                    line = stream.readline().decode('utf-8').strip()
+                    if line.startswith('event: '):
+                        event = line[len('event: '):]
+                payload = json.loads(stream.readline().decode('utf-8')[len('data: '):])
+            assert "build-live" in payload["html"]
+        finally:
+            server.shutdown()
+            server.server_close()
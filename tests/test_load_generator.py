@@ -0,0 +1,86 @@
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scripts.load_generator import HTTPTarget, run_closed_loop, run_open_loop
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头与正文一次写出，避免 Nagle 与延迟确认叠加出 40ms 的额外延迟
+    wbufsize = 65536
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+            number = self.server.requests
+        time.sleep(self.server.delay(number))
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(delay):
+    """Local keep-alive server sleeping ``delay(n)`` seconds before answering the n-th request"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, HTTPTarget(f'http://127.0.0.1:{server.server_port}')
+
+
+def stop_stub(server, target):
+    target.close()
+    server.shutdown()
+    server.server_close()
+
+
+class TestLoadGenerator:
+
+    def test_closed_loop_request_count_and_percentiles(self):
+        """Test the closed loop sends exactly the budgeted requests and reports their latency percentiles"""
+        # 每 10 个请求中有 1 个慢请求
+        server, target = start_stub(lambda n: 0.08 if n % 10 == 0 else 0.005)
+        try:
+            result = run_closed_loop(target, 1, 30, max_requests=50)
+        finally:
+            stop_stub(server, target)
+
+        assert server.requests == 50
+        assert (result.total, result.errors) == (50, 0)
+        summary = result.summary()
+        assert 5 <= summary['p50_latency'] < 40
+        assert summary['p95_latency'] >= 80
+        assert summary['avg_latency'] < summary['p95_latency']
+
+    def test_open_loop_keeps_schedule_under_slow_server(self):
+        """Test open-loop arrivals follow the schedule and queueing counts in latency (no coordinated omission)"""
+        rate, duration, seed = 40.0, 0.5, 7
+        rng = random.Random(seed)
+        arrivals, next_arrival = 0, rng.expovariate(rate)
+        while next_arrival < duration:
+            arrivals += 1
+            next_arrival += rng.expovariate(rate)
+
+        # 服务时间 0.05s 而只有一个发送线程：请求排队，但发送计划不随之推迟
+        server, target = start_stub(lambda n: 0.05)
+        try:
+            started = time.perf_counter()
+            result = run_open_loop(target, rate, duration, max_workers=1, seed=seed)
+            elapsed = time.perf_counter() - started
+        finally:
+            stop_stub(server, target)
+
+        assert result.total == server.requests == arrivals
+        assert elapsed >= arrivals * 0.05
+        # 最后一个请求的延迟包含它在队列中等待的时间，而不只是 50ms 的服务时间
+        assert result.summary()['p99_latency'] > (arrivals * 0.05 - duration) * 1000 * 0.9
+        assert result.summary()['p50_latency'] > 50
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from asgi_server import start_server
+from llm_testing.benchmark_runner import run_benchmark, summarize
+from mock_llm_server import LatencyDistribution, MockLLMConfig, MockLLMServer
+
+
+async def benchmark_mock(config, prompts, **kwargs):
+    server = await start_server(MockLLMServer(config), '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await run_benchmark(f'http://127.0.0.1:{port}', prompts, 'mock-llm', **kwargs)
+
+
+async def post_completion(server, payload):
+    """Call the mock server's ASGI app directly and return (status, JSON body)"""
+    messages = [{'type': 'http.request', 'body': json.dumps(payload).encode('utf-8')}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'path': '/v1/completions', 'method': 'POST'}
+    await server(scope, receive, send)
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+class TestMockLLMServer:
+
+    def test_streams_tokens_with_configured_latency(self):
+        """Test streamed token count and TTFT follow the configuration"""
+        config = MockLLMConfig(ttft=LatencyDistribution('constant', 0.05),
+                               itl=LatencyDistribution('constant', 0.002), seed=1)
+        results, duration = asyncio.run(benchmark_mock(config, ['hi'] * 20, max_tokens=8, concurrency=20))
+
+        assert all(r.error is None for r in results)
+        assert all(r.output_tokens == 8 for r in results)
+        metrics = summarize(results, duration)
+        assert metrics['TTFT'] >= 50
+
+    def test_chat_endpoint(self):
+        """Test the chat completions endpoint streams delta content"""
+        config = MockLLMConfig(ttft=LatencyDistribution('constant', 0.001),
+                               itl=LatencyDistribution('constant', 0.001))
+        results, _ = asyncio.run(benchmark_mock(config, ['hi'] * 3, max_tokens=4, concurrency=3,
+                                                endpoint='/v1/chat/completions'))
+        assert all(r.output_tokens == 4 for r in results)
+
+    def test_queueing_and_error_injection(self):
+        """Test bounded concurrency queues streams and injected errors surface"""
+        config = MockLLMConfig(ttft=LatencyDistribution('constant', 0.02),
+                               itl=LatencyDistribution('constant', 0.001),
+                               max_concurrency=1, stream_error_rate=1.0, seed=3)
+        results, duration = asyncio.run(benchmark_mock(config, ['hi'] * 4, max_tokens=4, concurrency=4))
+
+        assert summarize(results, duration)['error_rate'] == 100.0
+        # 并发为 1 时四个请求串行，总时长至少为四次 TTFT
+        assert duration >= 0.08
+
+    def test_invalid_max_tokens_rejected_before_queueing(self):
+        """Test non-positive or non-integer max_tokens get 400 without taking a slot"""
+        server = MockLLMServer(MockLLMConfig(ttft=LatencyDistribution('constant', 0.001),
+                                             itl=LatencyDistribution('constant', 0.001), max_concurrency=1))
+        for max_tokens in (0, -1, 2.5, "8", True):
+            status, body = asyncio.run(post_completion(server, {"prompt": "hi", "max_tokens": max_tokens}))
+            assert status == 400 and "max_tokens" in body["error"]["message"]
+        assert asyncio.run(post_completion(server, ["not", "an", "object"]))[0] == 400
+        assert (server.active, server.waiting, server.served) == (0, 0, 0)
+
+        status, body = asyncio.run(post_completion(server, {"prompt": "hi", "max_tokens": 2}))
+        assert status == 200 and body["usage"]["completion_tokens"] == 2
+
+    def test_latency_distributions(self):
+        """Test sampled latencies keep the configured mean"""
+        import random
+        rng = random.Random(0)
+        for kind in LatencyDistribution.KINDS:
+            dist = LatencyDistribution(kind, 0.1, 0.02 if kind != 'lognormal' else 0.3)
+            samples = [dist.sample(rng) for _ in range(5000)]
+            assert all(s >= 0 for s in samples)
+            assert abs(sum(samples) / len(samples) - 0.1) < 0.01
+
+    def test_does_not_import_the_service(self):
+        """Test the mock server loads without pulling in the Flask service"""
+        code = "import sys, mock_llm_server; print(sorted({'app', 'asgi_app', 'flask'} & set(sys.modules)))"
+        output = subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).resolve().parents[1],
+                                capture_output=True, text=True, check=True).stdout
+        assert output.strip() == '[]'
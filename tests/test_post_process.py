@@ -0,0 +1,79 @@
+import sys
+import time
+
+from scripts.post_process import Stage, run_pipeline
+
+
+def write_stage(name, target, deps=(), inputs=(), delay=0.0, fail=False):
+    code = f"import time; time.sleep({delay}); open({target!r}, 'a').write('x')"
+    if fail:
+        code += "; raise SystemExit(3)"
+    return Stage(name, [sys.executable, "-c", code], deps=list(deps), inputs=list(inputs), outputs=[target])
+
+
+class TestPostProcess:
+
+    def test_independent_stages_run_concurrently_and_cache(self, tmp_path):
+        """Test independent stages overlap, dependents wait and unchanged inputs are cached"""
+        (tmp_path / "input.txt").write_text("v1")
+        stages = [
+            write_stage("a", "a.out", inputs=["input.txt"], delay=0.4),
+            write_stage("b", "b.out", delay=0.4),
+            write_stage("c", "c.out", deps=["a", "b"]),
+        ]
+        start = time.perf_counter()
+        timings = run_pipeline(stages, root=str(tmp_path), workers=2)
+        assert time.perf_counter() - start < 1.2
+        assert {name: entry["status"] for name, entry in timings.items()} == {"a": "ran", "b": "ran", "c": "ran"}
+        assert timings["c"]["started"] >= max(timings["a"]["seconds"], timings["b"]["seconds"])
+        assert (tmp_path / "tests" / "reports" / "post_process_timings.json").exists()
+
+        timings = run_pipeline(stages, root=str(tmp_path), workers=2)
+        assert {entry["status"] for entry in timings.values()} == {"cached"}
+
+        # 输入变化后该阶段及其下游重新执行
+        (tmp_path / "input.txt").write_text("v2")
+        timings = run_pipeline(stages, root=str(tmp_path), workers=2)
+        assert [timings[name]["status"] for name in "abc"] == ["ran", "cached", "ran"]
+        assert (tmp_path / "a.out").read_text() == "xx"
+
+    def test_failed_stage_skips_dependents(self, tmp_path):
+        """Test a failing stage skips its dependents and a stage without inputs does not"""
+        stages = [
+            write_stage("broken", "broken.out", fail=True),
+            write_stage("after_broken", "after.out", deps=["broken"]),
+            write_stage("optional", "optional.out", inputs=["missing/*.xml"]),
+            write_stage("after_optional", "after_optional.out", deps=["optional"]),
+        ]
+        timings = run_pipeline(stages, root=str(tmp_path), workers=2)
+        assert {name: entry["status"] for name, entry in timings.items()} == {
+            "broken": "failed", "after_broken": "skipped", "optional": "no-input", "after_optional": "ran"}
+
+    def test_editing_the_script_invalidates_the_cache(self, tmp_path):
+        """Test a stage reruns when the script it runs changes, even with unchanged inputs"""
+        (tmp_path / "tool").mkdir()
+        script = tmp_path / "tool" / "render.py"
+        script.write_text("open('render.out', 'a').write('x')\n")
+        stages = [Stage("render", [sys.executable, "render.py"], cwd="tool", outputs=["tool/render.out"]),
+                  write_stage("after", "after.out", deps=["render"])]
+        assert {entry["status"] for entry in run_pipeline(stages, root=str(tmp_path)).values()} == {"ran"}
+        assert {entry["status"] for entry in run_pipeline(stages, root=str(tmp_path)).values()} == {"cached"}
+
+        script.write_text("open('render.out', 'a').write('y')\n")
+        timings = run_pipeline(stages, root=str(tmp_path))
+        assert [timings[name]["status"] for name in ("render", "after")] == ["ran", "ran"]
+        assert (tmp_path / "tool" / "render.out").read_text() == "xy"
+
+    def test_editing_an_imported_module_invalidates_the_cache(self, tmp_path):
+        """Test a stage reruns when a module listed in its sources changes"""
+        (tmp_path / "lib").mkdir()
+        (tmp_path / "lib" / "helper.py").write_text("MARK = 'x'\n")
+        (tmp_path / "render.py").write_text("import sys; sys.path.insert(0, 'lib'); from helper import MARK\n"
+                                            "open('render.out', 'a').write(MARK)\n")
+        stages = [Stage("render", [sys.executable, "render.py"], outputs=["render.out"], sources=["lib/*.py"])]
+        assert run_pipeline(stages, root=str(tmp_path))["render"]["status"] == "ran"
+        assert run_pipeline(stages, root=str(tmp_path))["render"]["status"] == "cached"
+
+        (tmp_path / "lib" / "helper.py").write_text("MARK = 'y'\n")
+        assert run_pipeline(stages, root=str(tmp_path))["render"]["status"] == "ran"
+        assert (tmp_path / "render.out").read_text() == "xy"
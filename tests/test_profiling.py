@@ -0,0 +1,46 @@
+import json
+import tracemalloc
+
+from llm_testing.framework.generator_html import LLMReportGenerator
+from llm_testing.framework.profiling import ReportProfiler
+from llm_testing.synthetic_data import generate_history
+
+
+class TestReportProfiler:
+
+    def test_phases_memory_pass_and_restore(self, tmp_path):
+        """Test phases are timed without cProfile or tracemalloc and the originals come back"""
+        data_dir = tmp_path / 'data'
+        generate_history(data_dir, n_tools=2, n_metrics=3, total_runs=60)
+        report = tmp_path / 'reports' / 'report.html'
+
+        profiler = ReportProfiler()
+        profiler.start()
+        assert not tracemalloc.is_tracing() and profiler.profile is None
+        generator = LLMReportGenerator(str(data_dir), profiler=profiler)
+        assert 'load_all_data' in vars(generator)
+        generator.generate_html_report(str(report))
+        profiler.stop()
+
+        assert {"load_all_data", "build_model", "generate_html_report", "copy_static_files"} <= set(profiler.phases)
+        assert profiler.phases["load_all_data"]["calls"] == 1
+        assert profiler.phases["generate_html_report"]["seconds"] <= profiler.total_seconds
+        # 计时结束后包装器被移除，再调用不会继续累计
+        assert not set(vars(generator)) & set(profiler.phases)
+        assert generator.build_model.__func__ is LLMReportGenerator.build_model
+        generator.build_model()
+        assert profiler.phases["build_model"]["calls"] == 1
+
+        assert profiler.peak_bytes is None and profiler.top_functions_stats() == []
+        profiler.measure_functions(lambda: LLMReportGenerator(str(data_dir)).generate_html_report(
+            str(tmp_path / 'profile' / 'report.html')))
+        assert profiler.phases["generate_html_report"]["calls"] == 1
+        profiler.measure_memory(lambda: LLMReportGenerator(str(data_dir)).generate_html_report(
+            str(tmp_path / 'memory' / 'report.html')))
+        assert not tracemalloc.is_tracing()
+        assert profiler.peak_bytes > 0 and profiler.allocations
+
+        timings = json.loads(profiler.write(report).read_text(encoding='utf-8'))
+        assert timings["phases"]["load_all_data"]["calls"] == 1
+        assert timings["peak_memory_bytes"] == profiler.peak_bytes
+        assert timings["top_functions"] and (tmp_path / 'reports' / 'report.prof').exists()
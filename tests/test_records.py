@@ -0,0 +1,73 @@
+import json
+import sys
+
+import pytest
+
+from llm_testing.framework.generator_html import LLMReportGenerator
+from llm_testing.framework.records import Run, load_tool, load_tools
+
+
+SCHEMA = [
+    {"name": "TTFT", "display_name": "TTFT", "unit": "ms", "format": "{:.2f}", "default_chart_type": "line"},
+    {"name": "broken", "format": "{:d}"},
+    {"display_name": "no name"},
+]
+
+
+class TestRecords:
+
+    def test_malformed_entries_dropped_at_ingest(self, tmp_path, capsys):
+        """Test bad runs and schema entries are skipped once at load and the report still renders"""
+        runs = [
+            {"build_id": "build-2", "timestamp": "2025-01-02T00:00:00Z", "env": {"description": "gpu"},
+             "metrics": {"TTFT": 90.0, "note": "n/a"}},
+            {"build_id": "build-1", "timestamp": "2025-01-01T00:00:00Z", "metrics": {"TTFT": 100.0}},
+            {"build_id": "no-timestamp", "metrics": {"TTFT": 1.0}},
+            {"build_id": "bad-timestamp", "timestamp": "yesterday", "metrics": {}},
+            {"build_id": "bad-env", "timestamp": "2025-01-03T00:00:00Z", "env": "gpu"},
+            "not a run",
+        ]
+        with open(tmp_path / "bench.json", "w", encoding="utf-8") as f:
+            json.dump({"tool": "Bench", "metrics_schema": SCHEMA, "runs": runs}, f)
+        (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+
+        tools = load_tools(tmp_path)
+        assert list(tools) == ["Bench"]
+        tool = tools["Bench"]
+        assert [metric.name for metric in tool.metrics_schema] == ["TTFT"]
+        assert [run.build_id for run in tool.runs] == ["build-1", "build-2"]
+        assert tool.runs[0].environment == "N/A"
+        assert tool.runs[1].metrics == {"TTFT": 90.0}
+        output = capsys.readouterr().out
+        assert output.count("Warning: skipping run") == 4
+        assert output.count("Warning: skipping metric") == 2
+        assert "Could not load" in output
+
+        model = LLMReportGenerator(tmp_path).model
+        assert [row.cells for row in model.tool("Bench").rows] == [("100.00",), ("90.00",)]
+
+    def test_runs_share_interned_strings(self):
+        """Test records use slots and share build ids and env objects across runs"""
+        runs = [{"build_id": "build-" + str(7), "timestamp": f"2025-01-0{i + 1}T00:00:00Z",
+                 "env": {"model": "Qwen2-" + "7B", "description": "vLLM / Qwen2-7B"},
+                 "metrics": {"TTFT": float(i)}} for i in range(3)]
+        tool = load_tool(json.loads(json.dumps({"tool": "Bench", "runs": runs})), "bench.json")
+        first, second, third = tool.runs
+        assert not hasattr(first, "__dict__") and "build_id" in Run.__slots__
+        assert first.build_id is second.build_id is sys.intern("build-7")
+        assert first.env is second.env is third.env
+        assert first.env["model"] is sys.intern("Qwen2-7B")
+        assert load_tool(tool.to_dict(), "bench.json").to_dict() == tool.to_dict()
+
+    def test_non_list_metrics_schema_rejected(self, tmp_path, capsys):
+        """Test a non-list metrics_schema is a ValueError and load_tools skips only that file"""
+        with pytest.raises(ValueError, match="metrics_schema"):
+            load_tool({"tool": "Bad", "metrics_schema": 5, "runs": []}, "bad.json")
+
+        with open(tmp_path / "bad.json", "w", encoding="utf-8") as f:
+            json.dump({"tool": "Bad", "metrics_schema": {"name": "TTFT"}, "runs": []}, f)
+        with open(tmp_path / "good.json", "w", encoding="utf-8") as f:
+            json.dump({"tool": "Good", "metrics_schema": SCHEMA[:1], "runs": []}, f)
+
+        assert list(load_tools(tmp_path)) == ["Good"]
+        assert "Could not load" in capsys.readouterr().out
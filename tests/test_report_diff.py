@@ -0,0 +1,69 @@
+import json
+import random
+
+import pytest
+
+from llm_testing.framework import bootstrap
+from llm_testing.framework.bootstrap import bootstrap_delta, compare_samples
+from llm_testing.framework.generator_html import LLMReportGenerator
+
+
+SCHEMA = [
+    {"name": "TTFT", "display_name": "TTFT", "unit": "ms", "lower_is_better": True, "format": "{:.2f}"},
+    {"name": "accuracy", "display_name": "Accuracy", "unit": "%", "lower_is_better": False, "format": "{:.2f}"},
+]
+
+
+def write_tool(data_dir, runs_per_build=200):
+    rng = random.Random(0)
+    runs = []
+    for build, ttft in (("build-1", 100.0), ("build-2", 90.0)):
+        for i in range(runs_per_build):
+            runs.append({"build_id": build, "timestamp": f"2025-01-0{build[-1]}T00:00:{i % 60:02d}Z", "env": {},
+                         "metrics": {"TTFT": rng.gauss(ttft, 5), "accuracy": rng.gauss(70, 1)}})
+    with open(data_dir / "bench.json", "w", encoding="utf-8") as f:
+        json.dump({"tool": "Bench", "description": "", "metrics_schema": SCHEMA, "runs": runs}, f)
+
+
+class TestBuildDiff:
+
+    def test_bootstrap_verdicts(self):
+        """Test lower_is_better decides whether a significant delta is an improvement"""
+        rng = random.Random(1)
+        base = [rng.gauss(100, 5) for _ in range(100)]
+        faster = [rng.gauss(90, 5) for _ in range(100)]
+        assert compare_samples(base, faster, lower_is_better=True)["verdict"] == "improved"
+        assert compare_samples(base, faster, lower_is_better=False)["verdict"] == "regressed"
+        assert compare_samples(base, base[::-1], lower_is_better=True)["verdict"] == "unchanged"
+        assert compare_samples([1.0], faster, lower_is_better=True)["verdict"] == "insufficient"
+
+    def test_numpy_and_python_intervals_agree(self, monkeypatch):
+        """Test the numpy and pure-Python resampling give the same seeded interval"""
+        pytest.importorskip("numpy")
+        rng = random.Random(2)
+        base = [rng.gauss(100, 5) for _ in range(100)]
+        head = [rng.gauss(98, 5) for _ in range(120)]
+        numpy_low, numpy_high = bootstrap_delta(base, head, resamples=4000, seed=3)
+        monkeypatch.setattr(bootstrap, "NUMPY_AVAILABLE", False)
+        python_low, python_high = bootstrap_delta(base, head, resamples=4000, seed=3)
+
+        # 两种实现的随机流不同，区间端点只在蒙特卡洛误差内一致
+        assert numpy_low == pytest.approx(python_low, abs=0.15)
+        assert numpy_high == pytest.approx(python_high, abs=0.15)
+        delta = sum(head) / len(head) - sum(base) / len(base)
+        assert python_low < delta < python_high
+
+    def test_diff_report(self, tmp_path):
+        """Test the diff page compares two builds metric by metric"""
+        write_tool(tmp_path)
+        generator = LLMReportGenerator(tmp_path)
+        diffs = generator.compare_builds(["build-1"], ["build-2"])
+
+        verdicts = {row["metric"].name: row["verdict"] for row in diffs["Bench"]}
+        assert verdicts == {"TTFT": "improved", "accuracy": "unchanged"}
+        ttft = diffs["Bench"][0]
+        assert ttft["ci_low"] < ttft["delta"] < ttft["ci_high"] < 0
+
+        output = generator.generate_diff_report(["build-1"], ["build-2"], tmp_path / "diff.html")
+        html = (tmp_path / "diff.html").read_text(encoding="utf-8")
+        assert output and "显著改善" in html and "build-1 → build-2" in html
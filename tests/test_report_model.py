@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from llm_testing.framework import ChartRenderer, LLMTestData
+from llm_testing.framework.generator_html import LLMReportGenerator
+from llm_testing.framework.report_model import ReportModel
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "llm_testing" / "data"
+
+
+class TestReportModel:
+
+    def test_model_sorted_and_formatted(self):
+        """Test the model holds runs in timestamp order with formatted cells and chart geometry"""
+        model = LLMReportGenerator(DATA_DIR).model
+        assert model.tools
+        for tool in model.tools:
+            timestamps = [row.timestamp for row in tool.rows]
+            assert timestamps == sorted(timestamps)
+            assert all(len(row.cells) == len(tool.columns) for row in tool.rows)
+            for chart in tool.charts:
+                assert len(chart.x) == len(chart.y) == len(chart.heights) == len(chart.values)
+                assert all(0 <= y <= 100 for y in chart.y)
+            assert set(tool.key_charts) <= {chart.metric for chart in tool.charts}
+
+    def test_saved_model_renders_identically(self, tmp_path, monkeypatch):
+        """Test every renderer gives the same output from a model loaded from disk"""
+        generator = LLMReportGenerator(DATA_DIR)
+        model_file = generator.save_model(tmp_path / "model.json")
+        loaded = ReportModel.load(model_file)
+        assert loaded == generator.model
+
+        renderer = LLMReportGenerator.from_model_file(model_file)
+        assert renderer.test_data == {}
+        assert renderer.generate_tool_cards() == generator.generate_tool_cards()
+
+        monkeypatch.setenv("LLM_REPORT_MODEL", str(model_file))
+        plugin_data = LLMTestData(str(tmp_path / "missing"))
+        assert plugin_data.get_tools() == [tool.name for tool in generator.model.tools]
+        assert ChartRenderer.render_table(plugin_data.model.tools[0]) == \
+            ChartRenderer.render_table(generator.model.tools[0])
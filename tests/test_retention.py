@@ -0,0 +1,108 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from llm_testing.framework.records import load_tool
+from llm_testing.framework.report_model import build_tool_report
+from llm_testing.framework.retention import RetentionPolicy, apply_retention, chart_points
+from llm_testing.framework.runs import append_run
+from llm_testing.framework.sketch import LatencySketch
+
+
+NOW = datetime(2025, 6, 30, 12, tzinfo=timezone.utc)
+SCHEMA = [
+    {"name": "p99_latency", "format": "{:.2f}", "sketch": "latency", "statistic": "p99",
+     "default_chart_type": "line"},
+    {"name": "throughput", "format": "{:.1f}", "default_chart_type": "bar"},
+]
+
+
+def make_runs(days, per_day=3):
+    runs = []
+    for day in range(days):
+        for i in range(per_day):
+            moment = NOW - timedelta(days=days - day, hours=i)
+            latencies = [10.0 + day + i + k for k in range(20)]
+            runs.append({
+                "build_id": f"build-{day}-{i}",
+                "timestamp": moment.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "env": {"description": "gpu-a" if i % 2 else "gpu-b"},
+                "metrics": {"p99_latency": max(latencies), "throughput": 100.0 + day},
+                "sketches": {"latency": LatencySketch().update(latencies).to_dict()},
+            })
+    return runs
+
+
+class TestRetention:
+
+    def test_rollups_preserve_counts_and_percentiles(self):
+        """Test expired runs fold into daily then weekly rollups without losing runs or merged percentiles"""
+        runs = make_runs(120)
+        data = {"tool": "Bench", "metrics_schema": SCHEMA, "runs": json.loads(json.dumps(runs))}
+        before = build_tool_report("Bench", {"tool": "Bench", "metrics_schema": SCHEMA, "runs": runs})
+
+        folded_runs, folded_days = apply_retention(data, RetentionPolicy(raw_days=7, daily_days=30), NOW)
+        assert folded_runs == len(runs) - len(data["runs"])
+        assert all(run["timestamp"] >= "2025-06-23" for run in data["runs"])
+        weekly, daily = data["rollups"]["weekly"], data["rollups"]["daily"]
+        assert all(rollup["start"] < "2025-06-02" for rollup in weekly)
+        assert {rollup["group"] for rollup in daily} == {"gpu-a", "gpu-b"}
+        assert len(data["runs"]) + sum(rollup["count"] for rollup in weekly + daily) == len(runs)
+        assert folded_days > 0
+
+        summary = weekly[0]["metrics"]["throughput"]
+        members = [run["metrics"]["throughput"] for run in runs
+                   if weekly[0]["first_timestamp"] <= run["timestamp"] <= weekly[0]["last_timestamp"]
+                   and run["env"]["description"] == weekly[0]["group"]]
+        assert summary["count"] == len(members)
+        assert abs(summary["mean"] - sum(members) / len(members)) < 1e-9
+        assert (summary["min"], summary["max"]) == (min(members), max(members))
+
+        # 再次执行不应改变任何内容
+        snapshot = json.dumps(data, sort_keys=True)
+        assert apply_retention(data, RetentionPolicy(raw_days=7, daily_days=30), NOW) == (0, 0)
+        assert json.dumps(data, sort_keys=True) == snapshot
+
+        after = build_tool_report("Bench", data)
+        assert after.merged == before.merged
+        assert len(after.rows) == len(data["runs"]) + len(weekly) + len(daily)
+        assert after.rows[0].build_id.endswith(f"({weekly[0]['count']} runs)")
+
+    def test_long_histories_chart_from_buckets(self, tmp_path):
+        """Test charts stay bounded for long raw histories and appends apply the file's retention"""
+        runs = make_runs(200)
+        points = chart_points(load_tool({"runs": runs}).runs, [], max_points=60)
+        assert len(points) <= 60
+        assert points[0][0].startswith("2024-W") or points[0][0].startswith("2025-W")
+        assert points == sorted(points, key=lambda point: point[1])
+        chart = build_tool_report("Bench", {"metrics_schema": SCHEMA, "runs": runs}).chart("throughput")
+        assert len(chart.values) == len(points)
+
+        output = tmp_path / "bench.json"
+        output.write_text(json.dumps({"tool": "Bench", "metrics_schema": SCHEMA, "runs": runs[:-1],
+                                      "retention": {"raw_days": 3650, "daily_days": 3650}}), encoding='utf-8')
+        append_run(output, runs[-1], "Bench", "", SCHEMA)
+        assert "rollups" not in json.loads(output.read_text(encoding='utf-8'))
+
+        output.write_text(json.dumps({"tool": "Bench", "metrics_schema": SCHEMA, "runs": runs[:-1],
+                                      "retention": {"raw_days": 0, "daily_days": 3650}}), encoding='utf-8')
+        recent = {**runs[-1], "timestamp": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}
+        append_run(output, recent, "Bench", "", SCHEMA)
+        data = json.loads(output.read_text(encoding='utf-8'))
+        assert [run["build_id"] for run in data["runs"]] == [recent["build_id"]]
+        assert sum(rollup["count"] for rollup in data["rollups"]["daily"]) == len(runs) - 1
+
+    def test_runs_without_timestamp_are_kept_unfolded(self, tmp_path):
+        """Test runs the loader would skip do not break an append and are never folded"""
+        runs = make_runs(10, per_day=1)
+        broken = [{"build_id": "no-time", "metrics": {"throughput": 1.0}},
+                  {"build_id": "bad-time", "timestamp": "yesterday", "metrics": {"throughput": 2.0}},
+                  "not a run"]
+        output = tmp_path / "bench.json"
+        output.write_text(json.dumps({"tool": "Bench", "metrics_schema": SCHEMA, "runs": runs[:-1] + broken,
+                                      "retention": {"raw_days": 0, "daily_days": 3650}}), encoding='utf-8')
+        recent = {**runs[-1], "timestamp": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}
+        append_run(output, recent, "Bench", "", SCHEMA)
+
+        data = json.loads(output.read_text(encoding='utf-8'))
+        assert data["runs"] == broken + [recent]
+        assert sum(rollup["count"] for rollup in data["rollups"]["daily"]) == len(runs) - 1
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+from pathlib import Path
+from xml.etree import ElementTree
+
+from llm_testing.framework.sharding import junit_key, plan_shards
+from scripts.merge_shards import merge_shards
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+class TestSharding:
+
+    def test_lpt_plan_balances_known_durations(self):
+        """Test slowest-first packing balances shards and weights unknown tests by the median"""
+        nodeids = [f"tests/test_x.py::TestX::test_{i}" for i in range(7)] + ["tests/test_x.py::test_new[a-1]"]
+        durations = {junit_key(nodeid): duration for nodeid, duration in
+                     zip(nodeids, [8.0, 7.0, 6.0, 5.0, 4.0, 3.0, 3.0])}
+        assert junit_key("tests/test_x.py::test_new[a-1]") == ("tests.test_x", "test_new[a-1]")
+
+        shards, loads = plan_shards(nodeids, durations, 3)
+        assert sorted(sum(shards, [])) == sorted(nodeids)
+        assert loads == [15.0, 12.0, 14.0]
+        assert plan_shards(nodeids, durations, 3) == (shards, loads)
+
+    def test_shards_run_disjoint_tests_and_merge(self, tmp_path):
+        """Test every shard runs its own tests and the merged junit covers all of them"""
+        (tmp_path / "test_sample.py").write_text(
+            "import pytest\n"
+            "@pytest.mark.parametrize('n', range(6))\n"
+            "def test_n(n):\n    assert n != 4\n", encoding='utf-8')
+        reports = tmp_path / "reports"
+        for index in range(2):
+            shard_dir = reports / f"shard-{index}"
+            subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+                            "-p", "llm_testing.framework.sharding", "--shards", "2", "--shard-index", str(index),
+                            f"--shard-durations={tmp_path / 'missing.xml'}",
+                            f"--junit-xml={shard_dir / 'junit.xml'}", f"--html={shard_dir / 'test_report.html'}",
+                            "--self-contained-html", str(tmp_path / "test_sample.py")],
+                           cwd=REPO_ROOT, capture_output=True)
+            (shard_dir / "allure-results").mkdir()
+            (shard_dir / "allure-results" / f"{index}-result.json").write_text("{}")
+
+        assert merge_shards(reports) == 2
+        suite = ElementTree.parse(reports / "junit.xml").getroot().find("testsuite")
+        assert (suite.get("tests"), suite.get("failures")) == ("6", "1")
+        assert sorted(case.get("name") for case in suite.iter("testcase")) == [f"test_n[{n}]" for n in range(6)]
+        assert sorted(path.name for path in (reports / "allure-results").iterdir()) == ["0-result.json",
+                                                                                         "1-result.json"]
+        page = (reports / "test_report.html").read_text(encoding='utf-8')
+        assert '<span class="passed">5 Passed,</span>' in page and '<span class="failed">1 Failed,</span>' in page
+        assert all(f"test_n[{n}]" in page for n in range(6))
@@ -0,0 +1,63 @@
+import json
+import random
+
+from llm_testing.framework.runs import percentile
+from llm_testing.framework.sketch import (LatencySketch, aggregate_metrics, aggregate_runs,
+                                          validate_sketches)
+
+
+SCHEMA = [
+    {"name": "p50_latency", "sketch": "latency", "statistic": "p50"},
+    {"name": "p99_latency", "sketch": "latency", "statistic": "p99"},
+    {"name": "avg_latency", "sketch": "latency", "statistic": "mean"},
+    {"name": "requests_per_second"},
+]
+
+
+class TestLatencySketch:
+
+    def test_quantiles_within_relative_accuracy(self):
+        """Test sketch percentiles stay within the configured relative error"""
+        rng = random.Random(0)
+        values = [rng.lognormvariate(3, 1) for _ in range(20000)]
+        sketch = LatencySketch(0.01).update(values)
+        ordered = sorted(values)
+        for q in (1, 50, 90, 99, 99.9):
+            exact = percentile(ordered, q)
+            assert abs(sketch.quantile(q) - exact) <= 0.01 * exact + 1e-9
+        assert sketch.quantile(100) == ordered[-1]
+
+    def test_merge_matches_single_sketch(self):
+        """Test merged shard sketches give the same answer as one sketch over all samples"""
+        rng = random.Random(1)
+        shards = [[rng.expovariate(1 / 20.0) for _ in range(3000)] for _ in range(4)]
+        whole = LatencySketch().update(v for shard in shards for v in shard)
+        merged = LatencySketch()
+        for shard in shards:
+            encoded = json.loads(json.dumps(LatencySketch().update(shard).to_dict()))
+            merged.merge(LatencySketch.from_dict(encoded))
+        assert merged.count == whole.count
+        for q in (50, 95, 99):
+            assert merged.quantile(q) == whole.quantile(q)
+
+    def test_aggregate_runs_by_build(self):
+        """Test runs sharing a build id are aggregated from their sketches"""
+        runs = [
+            {"build_id": "b1", "sketches": {"latency": LatencySketch().update([1, 2, 3]).to_dict()}},
+            {"build_id": "b1", "sketches": {"latency": LatencySketch().update([100] * 3).to_dict()}},
+            {"build_id": "b2"},
+        ]
+        groups = aggregate_runs(runs, SCHEMA)
+        assert abs(groups["b1"]["p99_latency"] - 100) <= 1
+        assert abs(groups["b1"]["avg_latency"] - 51) < 1e-9
+        assert "requests_per_second" not in groups["b1"]
+        assert groups["b2"] == {}
+        # 缺少 sketch 的运行无法参与合并
+        assert aggregate_metrics(runs, SCHEMA) == {}
+
+    def test_malformed_sketches_dropped(self):
+        """Test loaders drop sketches that cannot be decoded"""
+        good = LatencySketch().update([5]).to_dict()
+        data = {"runs": [{"build_id": "b1", "sketches": {"latency": good, "broken": {"type": "tdigest"}}}]}
+        validate_sketches(data, "test.json")
+        assert list(data["runs"][0]["sketches"]) == ["latency"]
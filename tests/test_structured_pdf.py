@@ -0,0 +1,83 @@
+import re
+import zlib
+
+from llm_testing.framework.records import load_tool
+from llm_testing.framework.report_model import build_report_model
+from scripts.structured_pdf import fit, generate_structured_pdf, wrap
+
+
+def write_junit(path, count):
+    cases = []
+    for i in range(count):
+        body = ''
+        if i == 3:
+            body = '<failure message="assert 1 == 2">Traceback (most recent call last):\nAssertionError</failure>'
+        elif i == 5:
+            body = '<skipped message="not on CI" />'
+        cases.append(f'<testcase classname="tests.test_app.TestHello" name="test_{i}" time="0.{i % 10}">'
+                     f'{body}</testcase>')
+    path.write_text(f'<?xml version="1.0"?><testsuites><testsuite name="pytest">{"".join(cases)}'
+                    f'</testsuite></testsuites>', encoding='utf-8')
+
+
+def page_texts(pdf_file):
+    """Decoded page content streams in page order"""
+    data = pdf_file.read_bytes()
+    streams = {int(obj_id): zlib.decompress(body).decode('cp1252') for obj_id, body in
+               re.findall(rb'(\d+) 0 obj\n<< /Length \d+ /Filter /FlateDecode >>\nstream\n(.*?)\nendstream',
+                          data, re.S)}
+    # 页面对象在文件末尾按页序写出
+    order = re.findall(rb'/Contents \[(\d+) 0 R (\d+) 0 R\]', data)
+    return data, [streams[int(content)] + streams[int(footer)] for content, footer in order]
+
+
+class TestStructuredPDF:
+
+    def test_renders_sections_from_junit(self, tmp_path):
+        """Test summary, failure details and chunked test list are rendered in order"""
+        junit = tmp_path / 'junit.xml'
+        write_junit(junit, 1200)
+        pdf = tmp_path / 'report.pdf'
+        pages = generate_structured_pdf(str(junit), str(pdf), workers=2, chunk_size=300)
+
+        data, streams = page_texts(pdf)
+        assert data.startswith(b'%PDF-1.4') and data.rstrip().endswith(b'%%EOF')
+        assert data.count(b'/Type /Page ') == pages
+        text = '\n'.join(streams)
+        assert '(Total tests) Tj' in text and '(1200) Tj' in text
+        assert 'TestHello::test_3' in text and 'AssertionError' in text
+        assert text.index('Failures and Errors') < text.index('All Test Cases')
+        assert f'(Page {pages} of {pages})' in text
+
+    def test_parallel_output_matches_inline(self, tmp_path):
+        """Test parallel rendering yields the same pages as rendering in-process"""
+        junit = tmp_path / 'junit.xml'
+        write_junit(junit, 700)
+        generate_structured_pdf(str(junit), str(tmp_path / 'inline.pdf'), workers=1, chunk_size=200)
+        generate_structured_pdf(str(junit), str(tmp_path / 'parallel.pdf'), workers=3, chunk_size=200)
+        # 生成时间可能跨秒，比较前去掉
+        inline, parallel = ([re.sub(r'Generated on [\d:\- ]+', '', page) for page in page_texts(tmp_path / name)[1]]
+                            for name in ('inline.pdf', 'parallel.pdf'))
+        assert inline == parallel
+
+    def test_chinese_text_uses_cjk_font(self, tmp_path):
+        """Test Chinese descriptions are written with the CJK font instead of '?'"""
+        junit = tmp_path / 'junit.xml'
+        write_junit(junit, 10)
+        tool = load_tool({"tool": "Bench", "description": "vLLM原生 测试套件",
+                          "metrics_schema": [{"name": "TTFT", "display_name": "首 token 延迟", "unit": "ms"}],
+                          "runs": [{"build_id": "build-1", "timestamp": "2025-01-01T00:00:00Z",
+                                    "metrics": {"TTFT": 12.5}}]})
+        model = build_report_model({"Bench": tool})
+        pdf = tmp_path / 'report.pdf'
+        generate_structured_pdf(str(junit), str(pdf), model=model, workers=1)
+
+        data, streams = page_texts(pdf)
+        text = '\n'.join(streams)
+        assert b'/BaseFont /STSong-Light-UniGB-UCS2-H' in data and b'/ToUnicode' in data
+        # Latin 部分用 Helvetica，中文部分以 UCS-2 写出
+        assert '(Bench - vLLM) Tj /F4 12 Tf <539F751F> Tj /F2 12 Tf ( ) Tj /F4 12 Tf <6D4B8BD559574EF6> Tj' in text
+        assert '??' not in text
+
+        assert fit('原生测试套件', 30, 10) == '原生~'
+        assert wrap('原生测试套件abc', 40, 10) == ['原生测试', '套件abc']
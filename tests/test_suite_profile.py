@@ -0,0 +1,71 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from llm_testing.framework.records import load_tools
+from llm_testing.framework.report_model import build_report_model
+from llm_testing.framework.suite_profile import merge_profiles, slowest_regressions
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def profile_run(build_id, tests):
+    return {"build_id": build_id, "timestamp": f"2025-01-0{build_id[-1]}T00:00:00Z", "metrics": {},
+            "tests": {nodeid: [wall, wall, 0] for nodeid, wall in tests.items()}}
+
+
+class TestSuiteProfile:
+
+    def test_plugin_appends_run_per_session(self, tmp_path):
+        """Test the plugin records every test and appends one run per session"""
+        (tmp_path / "test_sample.py").write_text(
+            "import time\n"
+            "def test_fast():\n    pass\n"
+            "def test_slow():\n    time.sleep(0.05)\n", encoding='utf-8')
+        output = tmp_path / "data" / "pytest_suite.json"
+        for build_id in ("build-1", "build-2"):
+            subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+                            "-p", "llm_testing.framework.suite_profile", f"--suite-profile={output}",
+                            f"--suite-profile-build-id={build_id}", str(tmp_path / "test_sample.py")],
+                           cwd=REPO_ROOT, check=True, capture_output=True)
+
+        data = json.loads(output.read_text(encoding='utf-8'))
+        assert [run["build_id"] for run in data["runs"]] == ["build-1", "build-2"]
+        run = data["runs"][-1]
+        assert run["metrics"]["tests"] == 2
+        slow = next(value for nodeid, value in run["tests"].items() if nodeid.endswith("test_slow"))
+        assert slow[0] >= 0.05
+
+        tool = build_report_model(load_tools(output.parent)).tool("PytestSuite")
+        assert tool.tables[0].title == "Slowest Tests (build-2)"
+        assert tool.tables[0].rows[0][0].endswith("test_slow")
+
+    def test_slowest_regressions_against_recent_median(self):
+        """Test regressions compare the latest run with the median of recent runs"""
+        runs = [profile_run(f"build-{i}", {"t::a": 0.2, "t::b": 1.0, "t::c": 0.01}) for i in range(1, 4)]
+        runs.append(profile_run("build-4", {"t::a": 0.5, "t::b": 1.1, "t::c": 0.04, "t::new": 3.0}))
+
+        regressions = slowest_regressions([run["tests"] for run in runs])
+        assert [row[0] for row in regressions] == ["t::a"]
+        assert regressions[0][1:3] == (0.2, 0.5)
+
+    def test_shard_profiles_merge_into_one_run_per_build(self, tmp_path):
+        """Test shard profiles fold into a single run and re-merging a build replaces it"""
+        shard_files = []
+        for index, tests in enumerate(({"t::a": [0.5, 0.4, 10]}, {"t::b": [1.5, 1.0, 30], "t::c": [0.1, 0.1, 0]})):
+            shard_file = tmp_path / f"shard-{index}" / "suite_profile.json"
+            shard_file.parent.mkdir()
+            shard_file.write_text(json.dumps({"runs": [profile_run("build-1", {}), {**profile_run("build-2", {}),
+                                                                                  "tests": tests}]}), encoding='utf-8')
+            shard_files.append(shard_file)
+
+        output = tmp_path / "pytest_suite.json"
+        for _ in range(2):
+            merge_profiles(shard_files, output, build_id="build-7")
+        runs = json.loads(output.read_text(encoding='utf-8'))["runs"]
+        assert [run["build_id"] for run in runs] == ["build-7"]
+        assert sorted(runs[0]["tests"]) == ["t::a", "t::b", "t::c"]
+        assert runs[0]["metrics"]["tests"] == 3
+        assert runs[0]["metrics"]["wall_time"] == 2.1
+        assert merge_profiles([], output) is None